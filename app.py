@@ -1,23 +1,42 @@
-from flask_mail import Mail, Message
-from werkzeug.utils import secure_filename
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask_mail import Mail
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify, stream_with_context
 import psycopg2
 import psycopg2.extras
 import os
-from conexion import obtener_conexion, obtener_conexion_categorias, obtener_conexion_departamentos_db, obtener_conexion_reportes_generales
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from conexion import obtener_conexion_departamentos_db, obtener_conexion_reportes_generales
+from cache_http import invalidar_cache_http, respuesta_cacheada
+from cache_paginas import estadisticas_paginas, pagina_cacheada
+from catalogos import a_entero, estadisticas_catalogos, notificar_cambio_catalogos, obtener_catalogos
+from asignaciones import asignar_reportes, carga_personal, estadisticas_asignaciones, rebalancear
+from busqueda_reportes import buscar_reportes, leer_busqueda
+from cola_correos import ASUNTO_NUEVO_REPORTE, DESTINATARIO_POR_DEFECTO, construir_mensaje, datos_correo, encolar_correo, marcar_envio, registrar_correo
+from consultas_correos import filtros_correos, listar_correos
+from consultas_paralelas import en_paralelo
+from flujo_reportes import ESTADOS, RESUELTO, TransicionInvalida, leer_transicion, transicionar
+from exportacion import FORMATOS, exportar_reportes
+from lotes_reportes import LoteInvalido, insertar_lote, leer_lote
+from mapa_reportes import ZOOM_POR_DEFECTO, clusters_mapa, leer_caja
+from metricas import instrumentar
+from subidas import PeticionSubidas
+from imagenes import borrar_imagen, encolar_imagenes, guardar_original, miniatura
+from consultas_reportes import filtros_reportes, listar_reportes, reportes_por_cedula, resolver_nombres
+from paginacion import leer_direccion, leer_entero, leer_limite, parametros_filtros
+from pivote import como_valores, matriz_sede_categoria
+from resumen import totales_por_sede_categoria
 from dashboard_router import dashboard_bp
 from dotenv import load_dotenv
-import requests
-from PIL import Image
-from PIL.ExifTags import TAGS, GPSTAGS
 
 
 # Cargar variables del archivo .env
 load_dotenv()
 
 app = Flask(__name__)
+# Las fotos se reciben por bloques con validación temprana (subidas.py)
+app.request_class = PeticionSubidas
 app.secret_key = "12345"
 app.register_blueprint(dashboard_bp)
+instrumentar(app)
 
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
 from app import app  # tu Flask app principal
@@ -49,7 +68,8 @@ UPLOAD_FOLDER = 'static/uploads'
 app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Tamaño máximo permitido (500 MB)
+# Tamaño máximo permitido (500 MB, para /api/reportes/batch con fotos); las
+# rutas de un solo reporte usan FOTO_TAMANO_MAX (subidas.py)
 app.config['MAX_CONTENT_LENGTH'] = 500 * 1024 * 1024
 
 # Extensiones permitidas
@@ -60,81 +80,79 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+# Ruta de la miniatura en las plantillas: {{ url_for('static', filename=r.foto_path|miniatura) }}
+app.add_template_filter(miniatura)
+
+
 # -----------------------------------------------------
 # INDEX Y FORMULARIO
 # -----------------------------------------------------
 
-@app.route('/')
-def index():
-    conexion_cat = obtener_conexion_categorias()
-    cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor_cat.execute("SELECT id, inf FROM categorias")
-    categorias_inf = cursor_cat.fetchall()
-    cursor_cat.close()
-    conexion_cat.close()
-
-    categorias = [
-        {"id": 1, "nombre": "Electricos", "imagen": "electrico.png"},
-        {"id": 2, "nombre": "Plomeria", "imagen": "plomeria.png"},
-        {"id": 3, "nombre": "Refrigeracion", "imagen": "refrigeracion.png"},
-        {"id": 4, "nombre": "Seguridad", "imagen": "seguridad.png"},
-        {"id": 5, "nombre": "Infraestructura", "imagen": "infraestructura.png"},
-        {"id": 6, "nombre": "Mobiliario", "imagen": "mobiliario.png"},
-        {"id": 7, "nombre": "Suministros", "imagen": "suministros.png"},
-        {"id": 8, "nombre": "Tecnologicos", "imagen": "tecnologico.png"},
-    ]
-
-    for cat in categorias:
-        for inf_data in categorias_inf:
-            if cat["id"] == inf_data["id"]:
-                cat["inf"] = inf_data["inf"]
-                break
+CATEGORIAS_INICIO = [
+    {"id": 1, "nombre": "Electricos", "imagen": "electrico.png"},
+    {"id": 2, "nombre": "Plomeria", "imagen": "plomeria.png"},
+    {"id": 3, "nombre": "Refrigeracion", "imagen": "refrigeracion.png"},
+    {"id": 4, "nombre": "Seguridad", "imagen": "seguridad.png"},
+    {"id": 5, "nombre": "Infraestructura", "imagen": "infraestructura.png"},
+    {"id": 6, "nombre": "Mobiliario", "imagen": "mobiliario.png"},
+    {"id": 7, "nombre": "Suministros", "imagen": "suministros.png"},
+    {"id": 8, "nombre": "Tecnologicos", "imagen": "tecnologico.png"},
+]
+
 
+def _categoria_valida(catalogos):
+    """categoria_id de la query string si existe en el catálogo, si no None."""
     categoria_id = request.args.get('categoria_id', type=int)
-    categoria = None
-    if categoria_id:
-        conexion_cat = obtener_conexion_categorias()
-        cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor_cat.execute("SELECT inf FROM categorias WHERE id = %s", (categoria_id,))
-        categoria = cursor_cat.fetchone()
-        cursor_cat.close()
-        conexion_cat.close()
+    return categoria_id if categoria_id in catalogos.categorias else None
+
+
+def _contexto_index(categoria_id):
+    def contexto(catalogos):
+        categorias = []
+        for cat in CATEGORIAS_INICIO:
+            cat = dict(cat)
+            if cat["id"] in catalogos.categorias_inf:
+                cat["inf"] = catalogos.categorias_inf[cat["id"]]
+            categorias.append(cat)
+
+        categoria = None
+        if categoria_id:
+            categoria = {"inf": catalogos.categorias_inf.get(categoria_id)}
+        return {"categorias": categorias, "categoria": categoria}
+    return contexto
+
+
+def _contexto_formulario(categoria_id):
+    def contexto(catalogos):
+        sedes = [{"id": id, "nombre": nombre} for id, nombre in catalogos.sedes.items()]
+        categoria = None
+        if categoria_id is not None:
+            categoria = {
+                "id": categoria_id,
+                "nombre": catalogos.categorias[categoria_id],
+                "inf": catalogos.categorias_inf.get(categoria_id),
+            }
+        fallas = catalogos.fallas_por_categoria.get(categoria_id, [])
+        return {"sedes": sedes, "categoria": categoria, "fallas": fallas}
+    return contexto
 
-    return render_template('paginas/index.html', categorias=categorias, categoria=categoria)
+
+@app.route('/')
+def index():
+    categoria_id = _categoria_valida(obtener_catalogos())
+    return pagina_cacheada('paginas/index.html', categoria_id, _contexto_index(categoria_id))
 
 
 @app.route('/formulario')
 def formulario():
-    categoria_id = request.args.get('categoria_id', type=int)
-
-    conexion = obtener_conexion()
-    cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor.execute("SELECT id, nombre FROM sedes")
-    sedes = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    conexion_cat = obtener_conexion_categorias()
-    cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor_cat.execute("SELECT id, nombre, inf FROM categorias WHERE id = %s", (categoria_id,))
-    categoria = cursor_cat.fetchone()
-    cursor_cat.execute("SELECT id, descripcion, inf FROM fallas WHERE categoria_id = %s", (categoria_id,))
-    fallas = cursor_cat.fetchall()
-    cursor_cat.close()
-    conexion_cat.close()
-
-    return render_template('paginas/formulario.html', sedes=sedes, categoria=categoria, fallas=fallas)
+    categoria_id = _categoria_valida(obtener_catalogos())
+    return pagina_cacheada('paginas/formulario.html', categoria_id, _contexto_formulario(categoria_id))
 
 
 @app.route("/obtener_fallas/<int:categoria_id>")
 def obtener_fallas(categoria_id):
-    conexion = obtener_conexion_categorias()
-    cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor.execute("SELECT id, descripcion FROM fallas WHERE categoria_id = %s", (categoria_id,))
-    fallas = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-    return jsonify(fallas)
+    fallas = obtener_catalogos().fallas_por_categoria.get(categoria_id, [])
+    return jsonify([[f['id'], f['descripcion']] for f in fallas])
 
 
 # -----------------------------------------------------
@@ -143,58 +161,57 @@ def obtener_fallas(categoria_id):
 
 @app.route('/reportes', methods=['GET'])
 def reportes():
-    cedula = request.args.get('cedula')
-    reportes_usuario = []
+    cedula = (request.args.get('cedula') or '').strip()
+    limite = leer_limite(request.args.get('limite'), por_defecto=20)
+    pagina = {"items": [], "siguiente": None, "anterior": None, "limite": limite}
 
     if cedula:
         try:
             print(f"\nConsultando reportes para la cédula: {cedula}")
 
-            conexion = obtener_conexion_reportes_generales()
-            cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-            cursor.execute("""
-                SELECT id, cedula, categoria, tipo_falla, sede, foto_path, descripcion, fecha_reporte
-                FROM reportes
-                WHERE cedula = %s
-                ORDER BY fecha_reporte DESC
-            """, (cedula,))
-            reportes_usuario = cursor.fetchall()
-            cursor.close()
-            conexion.close()
-
-            conexion_cat = obtener_conexion_categorias()
-            cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-            cursor_cat.execute("SELECT id, nombre FROM categorias")
-            categorias_data = cursor_cat.fetchall()
-            cursor_cat.execute("SELECT id, descripcion AS nombre FROM fallas")
-            fallas_data = cursor_cat.fetchall()
-            cursor_cat.close()
-            conexion_cat.close()
-
-            conexion_sedes = obtener_conexion()
-            cursor_sedes = conexion_sedes.cursor(cursor_factory=psycopg2.extras.DictCursor)
-            cursor_sedes.execute("SELECT id, nombre FROM sedes")
-            sedes_data = cursor_sedes.fetchall()
-            cursor_sedes.close()
-            conexion_sedes.close()
-
-            categorias = {str(c['id']).strip(): c['nombre'] for c in categorias_data}
-            fallas = {str(f['id']).strip(): f['nombre'] for f in fallas_data}
-            sedes = {str(s['id']).strip(): s['nombre'] for s in sedes_data}
-
-            for rep in reportes_usuario:
-                cat_id = str(rep.get('categoria')) if rep.get('categoria') is not None else None
-                falla_id = str(rep.get('tipo_falla')) if rep.get('tipo_falla') is not None else None
-                sede_id = str(rep.get('sede')) if rep.get('sede') is not None else None
-                rep['categoria'] = categorias.get(cat_id, f"(Sin nombre, ID={cat_id})") if cat_id else "(N/D)"
-                rep['tipo_falla'] = fallas.get(falla_id, f"(Sin nombre, ID={falla_id})") if falla_id else "(N/D)"
-                rep['sede'] = sedes.get(sede_id, f"(Sin nombre, ID={sede_id})") if sede_id else "(N/D)"
+            cursor = request.args.get('cursor')
+            direccion = leer_direccion(request.args.get('direccion'))
+            resultados = en_paralelo(
+                pagina=lambda: reportes_por_cedula(cedula, cursor=cursor, direccion=direccion, limite=limite),
+                catalogos=obtener_catalogos,
+            )
+            pagina, catalogos = resultados['pagina'], resultados['catalogos']
+
+            for rep in pagina['items']:
+                resolver_nombres(rep, catalogos)
 
         except Exception as e:
             flash(f"Error al obtener reportes: {e}", "danger")
             print(f" Error en reportes(): {e}")
 
-    return render_template("paginas/reportes.html", cedula=cedula, reportes=reportes_usuario)
+    return render_template(
+        "paginas/reportes.html",
+        cedula=cedula,
+        reportes=pagina['items'],
+        pagina=pagina,
+        parametros={"cedula": cedula, "limite": limite},
+    )
+
+
+@app.route('/api/reportes/por_cedula/<cedula>')
+def api_reportes_por_cedula(cedula):
+    try:
+        cursor = request.args.get('cursor')
+        direccion = leer_direccion(request.args.get('direccion'))
+        limite = leer_limite(request.args.get('limite'), por_defecto=20)
+        resultados = en_paralelo(
+            pagina=lambda: reportes_por_cedula(cedula.strip(), cursor=cursor, direccion=direccion, limite=limite),
+            catalogos=obtener_catalogos,
+        )
+        pagina, catalogos = resultados['pagina'], resultados['catalogos']
+        for rep in pagina['items']:
+            resolver_nombres(rep, catalogos)
+            rep['fecha_reporte'] = rep['fecha_reporte'].isoformat() if rep['fecha_reporte'] else None
+            rep['foto_url'] = url_for('static', filename=miniatura(rep['foto_path'])) if rep['foto_path'] else None
+        return jsonify(pagina)
+    except Exception as e:
+        print("Error en /api/reportes/por_cedula:", e)
+        return jsonify({"error": str(e)}), 500
 
 
 # -----------------------------------------------------
@@ -202,6 +219,13 @@ def reportes():
 # -----------------------------------------------------
 @app.route('/enviar_reporte', methods=['POST'])
 def enviar_reporte():
+    try:
+        # Lee el multipart: una foto inválida o muy grande se rechaza aquí
+        request.files
+    except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+        flash(f"No se pudo recibir la foto: {e.description}", "danger")
+        return redirect(url_for('index'))
+
     cedula = request.form.get('cedula')
     categoria_id = request.form.get('categoria')
     falla_id = request.form.get('falla_id')
@@ -214,56 +238,47 @@ def enviar_reporte():
     lon_foto = None
 
 
-    upload_folder = os.path.join(app.root_path, 'static', 'uploads')
-    os.makedirs(upload_folder, exist_ok=True)
-
     foto_path = None
 
+    # La foto se guarda tal cual y se procesa en segundo plano (imagenes.py),
+    # que además llena lat_foto/lon_foto con el GPS del EXIF
     if foto and allowed_file(foto.filename):
-        filename = secure_filename(foto.filename)
-        nombre_foto = f"{cedula}_{filename}"
-        ruta_foto_completa = os.path.join(upload_folder, nombre_foto)
-        foto.save(ruta_foto_completa)
-        foto_path = f"uploads/{nombre_foto}"
+        try:
+            foto_path = guardar_original(foto, app.static_folder)
+        except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+            flash(f"No se pudo recibir la foto: {e.description}", "danger")
+            return redirect(url_for('index', categoria_id=categoria_id))
 
 
     try:
-        conexion = obtener_conexion_reportes_generales()
-        cursor = conexion.cursor()
-
-        # ⬅️ SQL ACTUALIZADO PARA GUARDAR COORDENADAS
-        sql = """
-        INSERT INTO reportes 
-        (cedula, categoria, tipo_falla, fallas_otros, sede, foto_path, descripcion, lat_foto, lon_foto)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-
-        # ⬅️ COLOCAMOS LOS VALORES SIN CAMBIAR NADA MÁS 
-        valores = (
-            cedula, categoria_id, falla_id, otra_falla, 
-            sede_id, foto_path, descripcion, lat_foto, lon_foto
-        )
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor()
 
-        cursor.execute(sql, valores)
-        conexion.commit()
-        cursor.close()
-        conexion.close()
+            # ⬅️ SQL ACTUALIZADO PARA GUARDAR COORDENADAS
+            sql = """
+            INSERT INTO reportes 
+            (cedula, categoria, tipo_falla, fallas_otros, sede, foto_path, descripcion, lat_foto, lon_foto)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
+            """
 
-        try:
-            # Llamar a la API de correo
-            requests.post(
-                "http://127.0.0.1:5000/api/enviar_correo",
-                json={
-                    "cedula": cedula,
-                    "categoria_id": categoria_id,
-                    "falla_id": falla_id,
-                    "sede_id": sede_id,
-                    "descripcion": descripcion,
-                    "foto_path": foto_path
-                }
+            # ⬅️ COLOCAMOS LOS VALORES SIN CAMBIAR NADA MÁS 
+            valores = (
+                cedula, categoria_id, falla_id, otra_falla, 
+                sede_id, foto_path, descripcion, lat_foto, lon_foto
             )
-        except Exception as e:
-            print(f"Error al llamar a la API de correo: {e}")
+
+            cursor.execute(sql, valores)
+            reporte_id = cursor.fetchone()[0]
+
+            # El correo y la foto quedan en cola en la misma transacción;
+            # worker_correos.py y worker_imagenes.py los procesan
+            encolar_correo(cursor, [reporte_id])
+            encolar_imagenes(cursor, [(reporte_id, foto_path)])
+
+            conexion.commit()
+            invalidar_cache_http()
+            cursor.close()
 
         flash("Reporte guardado correctamente con imagen.", "success")
 
@@ -273,74 +288,89 @@ def enviar_reporte():
 
     return redirect(url_for('index', categoria_id=categoria_id))
 
+@app.route('/api/reportes/batch', methods=['POST'])
+def api_reportes_batch():
+    # Lote de reportes en JSON, NDJSON o multipart con fotos (ver lotes_reportes.py)
+    try:
+        items, archivos = leer_lote(request)
+    except LoteInvalido as e:
+        return jsonify({"error": str(e)}), 400
+    except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+        return jsonify({"error": e.description}), e.code
+
+    try:
+        resultados = insertar_lote(items, archivos, app.static_folder)
+        invalidar_cache_http()
+    except Exception as e:
+        print(f"Error al guardar lote de reportes: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    insertados = sum(1 for r in resultados if "id" in r)
+    return jsonify({
+        "insertados": insertados,
+        "errores": len(resultados) - insertados,
+        "resultados": resultados,
+    })
+
 # -----------------------------------------------------
 # EDITAR REPORTE
 # -----------------------------------------------------
 
 @app.route('/editar_reporte/<int:reporte_id>', methods=['GET', 'POST'])
 def editar_reporte(reporte_id):
-    conexion = obtener_conexion_reportes_generales()
-    cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor.execute("SELECT * FROM reportes WHERE id = %s", (reporte_id,))
-    reporte = cursor.fetchone()
-    cursor.close()
-    conexion.close()
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        cursor.execute("SELECT * FROM reportes WHERE id = %s", (reporte_id,))
+        reporte = cursor.fetchone()
+        cursor.close()
 
     if not reporte:
         flash("Reporte no encontrado.", "warning")
         return redirect(url_for('reportes'))
 
-    conexion_cat_nombre = obtener_conexion_categorias()
-    cursor_cat_nombre = conexion_cat_nombre.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor_cat_nombre.execute("SELECT nombre FROM categorias WHERE id = %s", (reporte['categoria'],))
-    categoria_nombre = cursor_cat_nombre.fetchone()
-    cursor_cat_nombre.close()
-    conexion_cat_nombre.close()
-
-    conexion_cat = obtener_conexion_categorias()
-    cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor_cat.execute("SELECT id, descripcion FROM fallas WHERE categoria_id = %s", (reporte['categoria'],))
-    fallas = cursor_cat.fetchall()
-    cursor_cat.close()
-    conexion_cat.close()
-
-    conexion_sede = obtener_conexion()
-    cursor_sede = conexion_sede.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    cursor_sede.execute("SELECT id, nombre FROM sedes")
-    sedes = cursor_sede.fetchall()
-    cursor_sede.close()
-    conexion_sede.close()
+    catalogos = obtener_catalogos()
+    categoria_nombre = catalogos.categorias.get(reporte['categoria'])
+    fallas = catalogos.fallas_por_categoria.get(reporte['categoria'], [])
+    sedes = [{"id": id, "nombre": nombre} for id, nombre in catalogos.sedes.items()]
 
     if request.method == 'POST':
+        try:
+            request.files
+        except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+            flash(f"No se pudo recibir la foto: {e.description}", "danger")
+            return redirect(url_for('editar_reporte', reporte_id=reporte_id))
+
         nueva_falla = request.form.get('falla')
         nueva_sede = request.form.get('sede')
         nueva_descripcion = request.form.get('descripcion')
         nueva_foto = request.files.get('foto_path')
 
         if nueva_foto and allowed_file(nueva_foto.filename):
-            if reporte['foto_path']:
-                ruta_anterior = os.path.join(app.static_folder, reporte['foto_path'])
-                if os.path.exists(ruta_anterior):
-                    os.remove(ruta_anterior)
-            filename = secure_filename(nueva_foto.filename)
-            nombre_foto = f"{reporte['cedula']}_{filename}"
-            ruta_foto = os.path.join(app.config['UPLOAD_FOLDER'], nombre_foto)
-            nueva_foto.save(ruta_foto)
-            ruta_relativa = os.path.join('uploads', nombre_foto).replace("\\", "/")
+            try:
+                ruta_relativa = guardar_original(nueva_foto, app.static_folder)
+            except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+                flash(f"No se pudo recibir la foto: {e.description}", "danger")
+                return redirect(url_for('editar_reporte', reporte_id=reporte_id))
         else:
             ruta_relativa = reporte['foto_path']
 
-        conexion_upd = obtener_conexion_reportes_generales()
-        cursor_upd = conexion_upd.cursor()
-        sql = """
-        UPDATE reportes
-        SET tipo_falla = %s, sede = %s, descripcion = %s, foto_path = %s
-        WHERE id = %s
-        """
-        cursor_upd.execute(sql, (nueva_falla, nueva_sede, nueva_descripcion, ruta_relativa, reporte_id))
-        conexion_upd.commit()
-        cursor_upd.close()
-        conexion_upd.close()
+        with obtener_conexion_reportes_generales() as conexion_upd:
+            cursor_upd = conexion_upd.cursor()
+            sql = """
+            UPDATE reportes
+            SET tipo_falla = %s, sede = %s, descripcion = %s, foto_path = %s
+            WHERE id = %s
+            """
+            cursor_upd.execute(sql, (nueva_falla, nueva_sede, nueva_descripcion, ruta_relativa, reporte_id))
+            if ruta_relativa != reporte['foto_path']:
+                encolar_imagenes(cursor_upd, [(reporte_id, ruta_relativa)])
+            conexion_upd.commit()
+            invalidar_cache_http()
+            cursor_upd.close()
+
+        if ruta_relativa != reporte['foto_path']:
+            # La foto anterior se borra solo si ningún otro reporte la usa
+            borrar_imagen(reporte['foto_path'], app.static_folder)
 
         flash("Reporte actualizado correctamente.", "success")
         return redirect(url_for('reportes', cedula=reporte['cedula']))
@@ -352,7 +382,7 @@ def editar_reporte(reporte_id):
         reporte=reporte,
         fallas=fallas,
         sedes=sedes,
-        categoria_nombre=categoria_nombre['nombre'] if categoria_nombre else 'Sin categoría',
+        categoria_nombre=categoria_nombre or 'Sin categoría',
         foto_url=foto_url
     )
 
@@ -364,32 +394,29 @@ def editar_reporte(reporte_id):
 @app.route('/borrar_reporte/<int:reporte_id>', methods=['POST'])
 def borrar_reporte(reporte_id):
     try:
-        conexion = obtener_conexion_reportes_generales()
-        cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor.execute("SELECT foto_path, cedula FROM reportes WHERE id = %s", (reporte_id,))
-        reporte = cursor.fetchone()
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cursor.execute("SELECT foto_path, cedula FROM reportes WHERE id = %s", (reporte_id,))
+            reporte = cursor.fetchone()
 
-        if not reporte:
-            cursor.close()
-            conexion.close()
-            flash("Reporte no encontrado.", "warning")
-            return redirect(url_for('reportes'))
+            if not reporte:
+                cursor.close()
+                flash("Reporte no encontrado.", "warning")
+                return redirect(url_for('reportes'))
 
-        foto_path = reporte.get('foto_path')
-        cedula = reporte.get('cedula')
+            foto_path = reporte.get('foto_path')
+            cedula = reporte.get('cedula')
 
-        cursor.execute("DELETE FROM reportes WHERE id = %s", (reporte_id,))
-        conexion.commit()
-        cursor.close()
-        conexion.close()
+            cursor.execute("DELETE FROM reportes WHERE id = %s", (reporte_id,))
+            conexion.commit()
+            invalidar_cache_http()
+            cursor.close()
 
         if foto_path:
             ruta_rel = str(foto_path).lstrip('/')
             if not ruta_rel.startswith('uploads/'):
                 ruta_rel = os.path.join('uploads', ruta_rel)
-            ruta_absoluta = os.path.join(app.static_folder, ruta_rel)
-            if os.path.exists(ruta_absoluta):
-                os.remove(ruta_absoluta)
+            borrar_imagen(ruta_rel, app.static_folder)
 
         flash("Reporte eliminado correctamente.", "success")
 
@@ -404,57 +431,24 @@ def borrar_reporte(reporte_id):
 #API DE DASHBOARD
 # -----------------------------------------------------
 
-@app.route('/api/fallas_por_sede_categoria')
-def fallas_por_sede_categoria():
+@app.route('/api/fallas_por_sede_categoria/matriz')
+@respuesta_cacheada()
+def fallas_por_sede_categoria_matriz():
+    # Misma matriz que la gráfica de /dashboard, en forma de filas (sedes) × columnas (categorías)
     try:
-        conexion = obtener_conexion_reportes_generales()
-        cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        query = """
-        SELECT 
-            s.nombre AS sede,
-            c.nombre AS categoria,
-            COUNT(r.id) AS cantidad
-        FROM reportes r
-        JOIN sedes s ON r.sede = s.id
-        JOIN categorias c ON r.categoria = c.id
-        GROUP BY s.nombre, c.nombre
-        ORDER BY s.nombre, c.nombre
-        """
-        cursor.execute(query)
-        resultados = cursor.fetchall()
-        cursor.close()
-        conexion.close()
-
-        sedes = sorted(list({fila['sede'] for fila in resultados}))
-        categorias = sorted(list({fila['categoria'] for fila in resultados}))
-        valores = []
-        for sede in sedes:
-            fila = []
-            for categoria in categorias:
-                coincidencia = next((f for f in resultados if f['sede'] == sede and f['categoria'] == categoria), None)
-                fila.append(coincidencia['cantidad'] if coincidencia else 0)
-            valores.append(fila)
-
-        return jsonify({
-            "sedes": sedes,
-            "categorias": categorias,
-            "valores": valores
-        })
+        matriz = matriz_sede_categoria(obtener_catalogos(), totales_por_sede_categoria())
+        return jsonify(como_valores(matriz))
 
     except Exception as e:
-        print("Error en fallas_por_sede_categoria:", e)
+        print("Error en fallas_por_sede_categoria_matriz:", e)
         return jsonify({"error": str(e)}), 500
 
 
 @app.route('/api/categorias')
+@respuesta_cacheada(depende_de_reportes=False)
 def obtener_categorias():
     try:
-        conexion = obtener_conexion_categorias()
-        cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor.execute("SELECT nombre FROM categorias ORDER BY nombre ASC")
-        categorias = [fila['nombre'] for fila in cursor.fetchall()]
-        cursor.close()
-        conexion.close()
+        categorias = sorted(obtener_catalogos().categorias.values())
         return jsonify({"categorias": categorias})
     except Exception as e:
         print("Error en /api/categorias:", e)
@@ -477,121 +471,54 @@ def api_enviar_correo():
         foto_path = data.get('foto_path')
         reporte_id = data.get('reporte_id')
 
-        destinatario = "acalcurian671@gmail.com"
-        asunto = "Nuevo Reporte Registrado"
-
-        # --------------------------------------------------------
-        # 1. OBTENER NOMBRE DE LA CATEGORÍA
-        # --------------------------------------------------------
-        conexion_cat = obtener_conexion_categorias()
-        cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-
-        cursor_cat.execute("SELECT nombre FROM categorias WHERE id = %s", (categoria_id,))
-        categoria_nombre = cursor_cat.fetchone()
-        categoria_nombre = categoria_nombre["nombre"] if categoria_nombre else "No encontrado"
-
-        # --------------------------------------------------------
-        # 2. OBTENER NOMBRE DE LA FALLA
-        # --------------------------------------------------------
-        cursor_cat.execute("SELECT descripcion FROM fallas WHERE id = %s", (falla_id,))
-        falla_nombre = cursor_cat.fetchone()
-        falla_nombre = falla_nombre["descripcion"] if falla_nombre else "No encontrado"
-
-        cursor_cat.close()
-        conexion_cat.close()
+        destinatario = DESTINATARIO_POR_DEFECTO
+        asunto = ASUNTO_NUEVO_REPORTE
+
+        # El correo va a la persona asignada al reporte (asignaciones.py)
+        if a_entero(reporte_id):
+            try:
+                asignado = asignar_reportes([{
+                    "id": a_entero(reporte_id), "categoria": a_entero(categoria_id), "sede": a_entero(sede_id),
+                }])
+                persona = asignado.get(a_entero(reporte_id))
+                if persona and persona['email']:
+                    destinatario = persona['email']
+            except Exception as e:
+                print("Error al asignar reporte:", e)
 
         # --------------------------------------------------------
-        # 3. OBTENER NOMBRE DE LA SEDE
+        # 1-3. NOMBRES DE CATEGORÍA, FALLA Y SEDE (caché de catálogos)
         # --------------------------------------------------------
-        conexion_sede = obtener_conexion()
-        cursor_sede = conexion_sede.cursor(cursor_factory=psycopg2.extras.DictCursor)
-
-        cursor_sede.execute("SELECT nombre FROM sedes WHERE id = %s", (sede_id,))
-        sede_nombre = cursor_sede.fetchone()
-        sede_nombre = sede_nombre["nombre"] if sede_nombre else "No encontrado"
-
-        cursor_sede.close()
-        conexion_sede.close()
+        datos = datos_correo({
+            "id": reporte_id,
+            "cedula": cedula,
+            "categoria": categoria_id,
+            "tipo_falla": falla_id,
+            "sede": sede_id,
+            "descripcion": descripcion,
+            "foto_path": foto_path,
+        }, obtener_catalogos())
 
         # --------------------------------------------------------
         # 4. GUARDAR REGISTRO DEL CORREO EN BD
         # --------------------------------------------------------
-        conexion = obtener_conexion_departamentos_db() 
-        cursor = conexion.cursor()
         correo_id = None
-
         try:
-            sql = """
-                INSERT INTO correos_enviados 
-                (reporte_id, cedula, destinatario, asunto, mensaje, foto_path, estatus_confirmacion)
-                VALUES (%s, %s, %s, %s, %s, %s, FALSE)
-                RETURNING id
-            """
-            valores = (
-                reporte_id,
-                cedula,
-                destinatario,
-                asunto,
-                descripcion,
-                foto_path
-            )
-
-            cursor.execute(sql, valores)
-            correo_id = cursor.fetchone()[0]
-            conexion.commit()
-
+            correo_id = registrar_correo(datos, destinatario, asunto)
         except Exception as db_error:
             print("Error al guardar correo:", db_error)
 
-        cursor.close()
-        conexion.close()
-
-        # --------------------------------------------------------
-        # 5. CREACIÓN DEL CORREO HTML
-        # --------------------------------------------------------
-        msg = Message(
-            subject=asunto,
-            recipients=[destinatario],
-        )
-
-        msg.html = f"""
-        <h2>📋 Nuevo reporte recibido</h2>
-
-        <p><b>Cédula:</b> {cedula}</p>
-        <p><b>Categoría:</b> {categoria_nombre}</p>
-        <p><b>Falla:</b> {falla_nombre}</p>
-        <p><b>Sede:</b> {sede_nombre}</p>
-        <p><b>Descripción:</b> {descripcion}</p>
-
-        <br>
-        {'<img src="cid:foto_reporte">' if foto_path else '<p>Sin imagen adjunta</p>'}
-
-        <br><br>
-        <p>Confirma que recibiste este correo:</p>
-        <a href="http://127.0.0.1:5000/confirmar_recepcion?correo_id={correo_id}" 
-           style="background-color:#4CAF50;color:white;padding:10px 20px;
-           text-decoration:none;border-radius:5px;">
-           Confirmar Recepción ✅
-        </a>
-        """
-
         # --------------------------------------------------------
-        # 6. ADJUNTAR FOTO SI EXISTE
+        # 5-6. CREACIÓN DEL CORREO HTML Y FOTO ADJUNTA
         # --------------------------------------------------------
-        if foto_path:
-            with app.open_resource(os.path.join('static', foto_path)) as fp:
-                msg.attach(
-                    "reporte.jpg",
-                    "image/jpeg",
-                    fp.read(),
-                    disposition='inline',
-                    headers={"Content-ID": "<foto_reporte>"}
-                )
+        msg = construir_mensaje(datos, destinatario, correo_id, asunto)
 
         # --------------------------------------------------------
         # 7. ENVIAR CORREO
         # --------------------------------------------------------
         mail.send(msg)
+        if correo_id:
+            marcar_envio([(correo_id, 'enviado', None)])
         print("Correo enviado correctamente")
 
         return jsonify({"success": True, "message": "Correo enviado correctamente"}), 200
@@ -614,12 +541,11 @@ def confirmar_recepcion():
         return "Faltan datos para confirmar.", 400
 
     try:
-        conexion = obtener_conexion_departamentos_db()
-        cursor = conexion.cursor()
-        cursor.execute("UPDATE correos_enviados SET estatus_confirmacion = TRUE WHERE id = %s", (correo_id,))
-        conexion.commit()
-        cursor.close()
-        conexion.close()
+        with obtener_conexion_departamentos_db() as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("UPDATE correos_enviados SET estatus_confirmacion = TRUE WHERE id = %s", (correo_id,))
+            conexion.commit()
+            cursor.close()
         print(f"✅ Confirmación registrada para correo ID: {correo_id}")
 
         # No redirige, solo muestra mensaje simple
@@ -644,35 +570,40 @@ def confirmar_recepcion():
 
 @app.route('/dashboard_admin')
 def dashboard_admin():
-    conexion = obtener_conexion_departamentos_db()
-    cursor = conexion.cursor()
+    return _vista_correos()
+
 
-    cursor.execute("""
-        SELECT fecha_envio, reporte_id, cedula, destinatario, asunto, mensaje, foto_path,
-               estatus_confirmacion, estatus_solucion
-        FROM correos_enviados
-        ORDER BY id DESC
-    """)
+def _vista_correos(confirmado=None):
+    """Listado paginado de correos compartido por las vistas de /dashboard_admin."""
+    filtros = filtros_correos(request.args, confirmado=confirmado)
+    limite = leer_limite(request.args.get('limite'))
 
-    correos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
+    try:
+        pagina = listar_correos(
+            filtros,
+            cursor=request.args.get('cursor'),
+            direccion=leer_direccion(request.args.get('direccion')),
+            limite=limite,
+        )
+    except Exception as e:
+        flash(f"Error al obtener correos: {e}", "danger")
+        print(f"Error en dashboard_admin(): {e}")
+        pagina = {"items": [], "siguiente": None, "anterior": None, "limite": limite}
 
-    lista = []
-    for c in correos:
-        lista.append({
-            "fecha_envio": c[0],
-            "reporte_id": c[1],
-            "cedula": c[2],
-            "destinatario": c[3],
-            "asunto": c[4],
-            "mensaje": c[5],
-            "foto_path": c[6],
-            "estatus_confirmacion": c[7],
-            "estatus_solucion": c[8],
-        })
+    parametros = parametros_filtros(filtros)
+    if confirmado is not None:
+        # La ruta de la vista ya fija el estatus de confirmación
+        parametros.pop('confirmado', None)
+    parametros['limite'] = limite
 
-    return render_template("paginas/dashboard_admin.html", correos=lista)
+    return render_template(
+        "paginas/dashboard_admin.html",
+        correos=pagina['items'],
+        pagina=pagina,
+        filtros=filtros,
+        parametros=parametros,
+        vista=request.endpoint,
+    )
 
 
 
@@ -680,18 +611,24 @@ def dashboard_admin():
 @app.route("/marcar_solucionado/<int:correo_id>", methods=["POST"])
 def marcar_solucionado(correo_id):
     try:
-        conexion = obtener_conexion_departamentos_db()
-        cursor = conexion.cursor()
+        with obtener_conexion_departamentos_db() as conexion:
+            cursor = conexion.cursor()
 
-        cursor.execute("""
-            UPDATE correos_enviados
-            SET estatus_solucion = TRUE
-            WHERE id = %s
-        """, (correo_id,))
+            cursor.execute("""
+                UPDATE correos_enviados
+                SET estatus_solucion = TRUE
+                WHERE id = %s
+                RETURNING reporte_id
+            """, (correo_id,))
+            fila = cursor.fetchone()
 
-        conexion.commit()
-        cursor.close()
-        conexion.close()
+            conexion.commit()
+            cursor.close()
+
+        # El reporte del correo pasa a resuelto (flujo_reportes.py)
+        if fila and fila[0]:
+            transicionar([fila[0]], RESUELTO, comentario="Marcado como solucionado desde el correo")
+            invalidar_cache_http()
 
         return jsonify({"success": True}), 200
 
@@ -702,147 +639,190 @@ def marcar_solucionado(correo_id):
 
 
 
+@app.route('/api/reportes/estado', methods=['POST'])
+def api_reportes_estado():
+    # {"ids": [...], "estado": "resuelto", "comentario": "", "usuario": "", "asignado_a": ""}
+    try:
+        ids, destino, opciones = leer_transicion(request.get_json(silent=True))
+    except TransicionInvalida as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+        resultado = transicionar(ids, destino, **opciones)
+        if resultado["actualizados"]:
+            invalidar_cache_http()
+        return jsonify(resultado)
+    except Exception as e:
+        print("Error en /api/reportes/estado:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/asignaciones/carga')
+def api_asignaciones_carga():
+    # Cola abierta de cada persona según el índice en memoria de asignaciones.py
+    try:
+        return jsonify({"personal": carga_personal(), "estadisticas": estadisticas_asignaciones()})
+    except Exception as e:
+        print("Error en /api/asignaciones/carga:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/asignaciones/rebalancear', methods=['POST'])
+def api_asignaciones_rebalancear():
+    limite = leer_entero(request.args.get('limite'))
+    try:
+        resultado = rebalancear() if limite is None else rebalancear(max(limite, 1))
+        return jsonify(resultado)
+    except Exception as e:
+        print("Error en /api/asignaciones/rebalancear:", e)
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/dashboard_admin/confirmados')
 def dashboard_admin_confirmados():
-    conexion = obtener_conexion_departamentos_db()
-    cursor = conexion.cursor()
-
-    cursor.execute("""
-        SELECT id, reporte_id, cedula, destinatario, asunto, mensaje, foto_path,
-               estatus_confirmacion, estatus_solucion
-        FROM correos_enviados
-        WHERE estatus_confirmacion = TRUE
-        ORDER BY id DESC
-    """)
-
-    correos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    lista = []
-    for c in correos:
-        lista.append({
-            "id": c[0],
-            "reporte_id": c[1],
-            "cedula": c[2],
-            "destinatario": c[3],
-            "asunto": c[4],
-            "mensaje": c[5],
-            "foto_path": c[6],
-            "estatus_confirmacion": c[7],
-            "estatus_solucion": c[8],
-        })
-
-    return render_template("paginas/dashboard_admin.html", correos=lista)
+    return _vista_correos(confirmado=True)
 
 
 
 @app.route('/dashboard_admin/no_confirmados')
 def dashboard_admin_no_confirmados():
-    conexion = obtener_conexion_departamentos_db()
-    cursor = conexion.cursor()
-
-    cursor.execute("""
-        SELECT id, reporte_id, cedula, destinatario, asunto, mensaje, foto_path,
-               estatus_confirmacion, estatus_solucion
-        FROM correos_enviados
-        WHERE estatus_confirmacion = FALSE
-        ORDER BY id DESC
-    """)
-
-    correos = cursor.fetchall()
-    cursor.close()
-    conexion.close()
-
-    lista = []
-    for c in correos:
-        lista.append({
-            "id": c[0],
-            "reporte_id": c[1],
-            "cedula": c[2],
-            "destinatario": c[3],
-            "asunto": c[4],
-            "mensaje": c[5],
-            "foto_path": c[6],
-            "estatus_confirmacion": c[7],
-            "estatus_solucion": c[8],
-        })
-
-    return render_template("paginas/dashboard_admin.html", correos=lista)
+    return _vista_correos(confirmado=False)
 
 
 @app.route('/dashboard_admin/reportes')
 def dashboard_admin_reportes():
+    filtros = filtros_reportes(request.args)
+    limite = leer_limite(request.args.get('limite'))
+    cursor = request.args.get('cursor')
+    direccion = leer_direccion(request.args.get('direccion'))
+
     try:
-        print("\nConsultando TODOS los reportes...")
+        # 1. Una sola página de reportes, filtrada y ordenada en SQL, y los
+        #    catálogos a la vez (son bases distintas)
+        resultados = en_paralelo(
+            pagina=lambda: listar_reportes(filtros, cursor=cursor, direccion=direccion, limite=limite),
+            catalogos=obtener_catalogos,
+        )
+        pagina, catalogos = resultados['pagina'], resultados['catalogos']
 
-        # 1. Obtener TODOS los reportes
-        conexion = obtener_conexion_reportes_generales()
-        cursor = conexion.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor.execute("""
-            SELECT categoria, tipo_falla, sede, foto_path, descripcion, fecha_reporte
-            FROM reportes
-            ORDER BY fecha_reporte DESC
-        """)
-        reportes = cursor.fetchall()
-        cursor.close()
-        conexion.close()
-
-        # 2. Obtener categorías y fallas
-        conexion_cat = obtener_conexion_categorias()
-        cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.DictCursor)
-
-        cursor_cat.execute("SELECT id, nombre FROM categorias")
-        categorias_data = cursor_cat.fetchall()
-
-        cursor_cat.execute("SELECT id, descripcion AS nombre FROM fallas")
-        fallas_data = cursor_cat.fetchall()
-
-        cursor_cat.close()
-        conexion_cat.close()
-
-        # 3. Obtener sedes
-        conexion_sedes = obtener_conexion()
-        cursor_sedes = conexion_sedes.cursor(cursor_factory=psycopg2.extras.DictCursor)
-        cursor_sedes.execute("SELECT id, nombre, latitud, longitud FROM sedes")
-        sedes_data = cursor_sedes.fetchall()
-        cursor_sedes.close()
-        conexion_sedes.close()
-
-        # Mapear IDs → nombres
-        categorias = {str(c['id']).strip(): c['nombre'] for c in categorias_data}
-        fallas = {str(f['id']).strip(): f['nombre'] for f in fallas_data}
-        sedes = {str(s['id']).strip(): s['nombre'] for s in sedes_data}
-        sedes_lat = {str(s['id']).strip(): s['latitud'] for s in sedes_data}
-        sedes_lng = {str(s['id']).strip(): s['longitud'] for s in sedes_data}
-
-        # Convertir DictRow → dict para permitir agregar lat/lng
-        reportes = [dict(r) for r in reportes]
-        
-        # Convertir IDs a nombres legibles
-        for rep in reportes:
-
-            sede_id = str(rep.get('sede'))
-            rep['categoria'] = categorias.get(str(rep.get('categoria')), "(N/D)")
-            rep['tipo_falla'] = fallas.get(str(rep.get('tipo_falla')), "(N/D)")
-            rep['sede'] = sedes.get(str(rep.get('sede')), "(N/D)")
-            
-            rep['latitud'] = sedes_lat.get(sede_id, None)
-            rep['longitud'] = sedes_lng.get(sede_id, None)
-            print("LAT:", rep["latitud"], "LONG:", rep["longitud"])
-
-        
+        # 2. Convertir IDs a nombres legibles desde la caché de catálogos
+        for rep in pagina['items']:
+            resolver_nombres(rep, catalogos)
 
     except Exception as e:
         flash(f"Error al obtener reportes: {e}", "danger")
         print(f"Error en dashboard_admin_reportes(): {e}")
-        reportes = []
+        pagina = {"items": [], "siguiente": None, "anterior": None, "limite": limite}
+        catalogos = obtener_catalogos()
+
+    return render_template(
+        "paginas/dashboard_admin.html",
+        reportes=pagina['items'],
+        pagina=pagina,
+        filtros=filtros,
+        parametros=dict(parametros_filtros(filtros), limite=limite),
+        sedes=sorted(catalogos.sedes.items(), key=lambda s: s[1]),
+        categorias=sorted(catalogos.categorias.items(), key=lambda c: c[1]),
+        estados=ESTADOS,
+    )
+
+
+@app.route('/api/dashboard_admin/reportes')
+def api_dashboard_admin_reportes():
+    try:
+        filtros = filtros_reportes(request.args)
+        cursor = request.args.get('cursor')
+        direccion = leer_direccion(request.args.get('direccion'))
+        limite = leer_limite(request.args.get('limite'))
+        resultados = en_paralelo(
+            pagina=lambda: listar_reportes(filtros, cursor=cursor, direccion=direccion, limite=limite),
+            catalogos=obtener_catalogos,
+        )
+        pagina, catalogos = resultados['pagina'], resultados['catalogos']
+        for rep in pagina['items']:
+            resolver_nombres(rep, catalogos)
+            rep['fecha_reporte'] = rep['fecha_reporte'].isoformat() if rep['fecha_reporte'] else None
+            rep['foto_url'] = url_for('static', filename=miniatura(rep['foto_path'])) if rep['foto_path'] else None
+        return jsonify(pagina)
+    except Exception as e:
+        print("Error en /api/dashboard_admin/reportes:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/reportes/buscar')
+@respuesta_cacheada()
+def api_reportes_buscar():
+    # ?q=texto y los mismos filtros y cursores que /api/dashboard_admin/reportes
+    texto = leer_busqueda(request.args.get('q'))
+    if texto is None:
+        return jsonify({"error": "Falta el texto de búsqueda (q)"}), 400
+    try:
+        filtros = filtros_reportes(request.args)
+        cursor = request.args.get('cursor')
+        direccion = leer_direccion(request.args.get('direccion'))
+        limite = leer_limite(request.args.get('limite'), por_defecto=20)
+        resultados = en_paralelo(
+            pagina=lambda: buscar_reportes(texto, filtros, cursor=cursor, direccion=direccion, limite=limite),
+            catalogos=obtener_catalogos,
+        )
+        pagina, catalogos = resultados['pagina'], resultados['catalogos']
+        for rep in pagina['items']:
+            resolver_nombres(rep, catalogos)
+            rep['fecha_reporte'] = rep['fecha_reporte'].isoformat() if rep['fecha_reporte'] else None
+            rep['foto_url'] = url_for('static', filename=miniatura(rep['foto_path'])) if rep['foto_path'] else None
+        pagina['q'] = texto
+        return jsonify(pagina)
+    except Exception as e:
+        print("Error en /api/reportes/buscar:", e)
+        return jsonify({"error": str(e)}), 500
+
 
-    return render_template("paginas/dashboard_admin.html", reportes=reportes)
+@app.route('/api/reportes/mapa')
+@respuesta_cacheada()
+def api_reportes_mapa():
+    # ?bbox=oeste,sur,este,norte&zoom=N y los mismos filtros que /dashboard_admin/reportes
+    caja = leer_caja(request.args.get('bbox'))
+    if caja is None:
+        return jsonify({"error": "bbox inválido, se espera oeste,sur,este,norte"}), 400
+    zoom = leer_entero(request.args.get('zoom'))
+    try:
+        return jsonify(clusters_mapa(caja, ZOOM_POR_DEFECTO if zoom is None else zoom, filtros_reportes(request.args)))
+    except Exception as e:
+        print("Error en /api/reportes/mapa:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/api/reportes/export')
+def api_exportar_reportes():
+    # ?formato=csv|ndjson&gzip=1 y los mismos filtros que /dashboard_admin/reportes
+    formato = request.args.get('formato', 'csv')
+    if formato not in FORMATOS:
+        return jsonify({"error": f"Formato no soportado: {formato}"}), 400
+    comprimir = request.args.get('gzip') in ('1', 'true', 'True')
+
+    tipo, extension = FORMATOS[formato]
+    nombre = f"reportes.{extension}{'.gz' if comprimir else ''}"
+    return Response(
+        stream_with_context(exportar_reportes(filtros_reportes(request.args), formato, comprimir)),
+        mimetype='application/gzip' if comprimir else tipo,
+        headers={"Content-Disposition": f"attachment; filename={nombre}"},
+    )
 
 
+@app.route('/dashboard_admin/catalogos/invalidar', methods=['POST'])
+def invalidar_catalogos_admin():
+    try:
+        notificar_cambio_catalogos()
+        return jsonify({"success": True}), 200
+    except Exception as e:
+        print("Error al invalidar catálogos:", e)
+        return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route('/api/catalogos/estadisticas')
+def api_estadisticas_catalogos():
+    estadisticas = estadisticas_catalogos()
+    estadisticas["paginas"] = estadisticas_paginas()
+    return jsonify(estadisticas)
 
 
 # -----------------------------------------------------
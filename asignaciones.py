@@ -0,0 +1,515 @@
+import json
+import os
+import select
+import threading
+import time
+from collections import deque
+
+import psycopg2.extensions
+import psycopg2.extras
+
+from conexion import conexion_dedicada, obtener_conexion_departamentos_db, obtener_conexion_reportes_generales
+from flujo_reportes import ASIGNACION_ABIERTA, ASIGNACION_COMPLETADA, ESTADOS_ABIERTOS
+
+# -----------------------------------------------------
+# ASIGNACIÓN DE REPORTES AL PERSONAL
+# -----------------------------------------------------
+# Cada reporte se asigna a una persona activa que cubra su categoría y sede
+# (personal_cobertura, migración 014) y que tenga la menor carga abierta en
+# proporción a su capacidad. Cada proceso guarda la carga por persona en
+# memoria: se lee completa una vez y después la actualizan los deltas de
+# NOTIFY asignaciones, así decidir no cuenta asignaciones en la base. Las
+# escrituras van por lotes (execute_values) en una sola transacción.
+#
+# Cada aviso lleva el id de la transacción que lo generó (migración 016) y
+# la carga completa guarda la instantánea con la que se leyó: un delta cuya
+# transacción ya estaba en la instantánea se descarta, y los que llegaron
+# mientras se recargaba y no estaban en ella se vuelven a aplicar. Así la
+# recarga y los avisos no cuentan dos veces la misma asignación.
+CANAL_ASIGNACIONES = 'asignaciones'
+# Segundos entre recargas completas del índice, por si se perdió algún aviso
+ASIGNACIONES_RECARGA = float(os.getenv('ASIGNACIONES_RECARGA', 600))
+REBALANCEO_MAXIMO = int(os.getenv('REBALANCEO_MAXIMO', 1000))
+ASIGNACION_REASIGNADA = 'reasignado'
+# Cobertura de todas las categorías o todas las sedes
+TODAS = 0
+
+# Avisos recientes que se revisan al instalar una carga completa nueva
+AVISOS_RECIENTES = 1000
+
+# Índice en memoria: {"personal": {id: datos}, "cobertura": {(categoria, sede): [ids]},
+# "carga": {id: abiertas}, "instantanea": (xmin, xmax, xip), "cargado": monotonic}
+_indice = None
+_avisos = deque(maxlen=AVISOS_RECIENTES)
+_lock = threading.Lock()
+_listener_pid = None
+_estadisticas = {"recargas": 0, "avisos": 0, "descartados": 0, "decisiones": 0, "sin_personal": 0}
+
+
+def _leer_instantanea(texto):
+    """(xmin, xmax, xip) de un txid_snapshot ('xmin:xmax:xip1,xip2')."""
+    xmin, xmax, xip = texto.split(':')
+    return int(xmin), int(xmax), frozenset(int(x) for x in xip.split(',') if x)
+
+
+def visible_en(xid, instantanea):
+    """True si la transacción `xid` ya estaba confirmada en `instantanea`
+    (la misma regla que txid_visible_in_snapshot)."""
+    xmin, xmax, xip = instantanea
+    return xid < xmin or (xid < xmax and xid not in xip)
+
+
+def _cargar_indice():
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        # Todas las lecturas (y la instantánea) ven el mismo momento de la base
+        cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+        cursor.execute("SELECT txid_current_snapshot()::text AS instantanea")
+        instantanea = _leer_instantanea(cursor.fetchone()['instantanea'])
+        cursor.execute("""
+            SELECT p.id, p.nombres || ' ' || p.apellidos AS nombre, p.email, p.capacidad,
+                   p.departamento_id, d.nombre AS departamento
+            FROM personal p
+            LEFT JOIN departamentos d ON d.id = p.departamento_id
+            WHERE p.activo IS NOT FALSE
+        """)
+        personal = {p['id']: p for p in cursor.fetchall()}
+        cursor.execute("SELECT personal_id, categoria, sede FROM personal_cobertura")
+        cobertura = {}
+        for c in cursor.fetchall():
+            if c['personal_id'] in personal:
+                cobertura.setdefault((c['categoria'], c['sede']), []).append(c['personal_id'])
+        cursor.execute("""
+            SELECT personal_id, COUNT(*)::int AS abiertas
+            FROM asignaciones_reportes
+            WHERE estado = %s
+            GROUP BY personal_id
+        """, (ASIGNACION_ABIERTA,))
+        carga = {c['personal_id']: c['abiertas'] for c in cursor.fetchall()}
+        conexion.commit()
+        cursor.close()
+    return {
+        "personal": personal, "cobertura": cobertura, "carga": carga,
+        "instantanea": instantanea, "cargado": time.monotonic(),
+    }
+
+
+def obtener_indice(recargar=False):
+    """Índice de personal, cobertura y carga de este proceso."""
+    global _indice
+    _iniciar_listener()
+
+    indice = _indice
+    if not recargar and indice is not None and time.monotonic() - indice["cargado"] < ASIGNACIONES_RECARGA:
+        return indice
+
+    with _lock:
+        if not recargar and _indice is not None and _indice is not indice:
+            return _indice
+        _indice = _cargar_indice()
+        # Avisos que llegaron durante la recarga y no entraron en la instantánea
+        for xid, cambios in _avisos:
+            _sumar_cambios(_indice, cambios, xid)
+        _estadisticas["recargas"] += 1
+        return _indice
+
+
+def invalidar_indice():
+    global _indice
+    with _lock:
+        _indice = None
+        _avisos.clear()
+
+
+def _sumar_cambios(indice, cambios, xid):
+    if xid is not None and visible_en(xid, indice["instantanea"]):
+        # La carga completa ya incluye esta transacción
+        _estadisticas["descartados"] += 1
+        return
+    carga = indice["carga"]
+    for cambio in cambios:
+        carga[cambio['personal_id']] = max(carga.get(cambio['personal_id'], 0) + cambio['delta'], 0)
+
+
+def _aplicar_cambios(cambios, xid=None):
+    with _lock:
+        # Sin xid (avisos anteriores a la migración 016) no se puede saber si
+        # la próxima carga completa ya los incluye: se asume que sí y no se
+        # guardan para reaplicar, así no se cuentan dos veces
+        if xid is not None:
+            _avisos.append((xid, cambios))
+        if _indice is not None:
+            _sumar_cambios(_indice, cambios, xid)
+
+
+# -----------------------------------------------------
+# DECISIÓN
+# -----------------------------------------------------
+
+def _claves_cobertura(categoria, sede):
+    """Coberturas que aplican a un reporte, de la más específica a la más general."""
+    claves = []
+    for clave in ((categoria, sede), (categoria, TODAS), (TODAS, sede), (TODAS, TODAS)):
+        if clave not in claves:
+            claves.append(clave)
+    return claves
+
+
+def elegir_personal(reporte, indice, carga):
+    """Id de la persona para `reporte`, o None si nadie con cupo lo cubre.
+
+    Se prefiere la cobertura más específica; dentro de ella, la menor
+    ocupación (abiertas / capacidad). Solo lee `carga`; el llamador la
+    incrementa al planificar un lote.
+    """
+    personal = indice["personal"]
+    categoria = reporte.get('categoria') or TODAS
+    sede = reporte.get('sede') or TODAS
+    for clave in _claves_cobertura(categoria, sede):
+        candidatos = [
+            pid for pid in indice["cobertura"].get(clave, ())
+            if carga.get(pid, 0) < personal[pid]['capacidad']
+        ]
+        if candidatos:
+            return min(candidatos, key=lambda pid: (carga.get(pid, 0) / personal[pid]['capacidad'], pid))
+    return None
+
+
+def planificar(reportes, indice, carga=None):
+    """[(reporte_id, personal_id)] para `reportes` y la lista de ids sin personal."""
+    carga = dict(indice["carga"] if carga is None else carga)
+    plan = []
+    sin_personal = []
+    for reporte in reportes:
+        personal_id = elegir_personal(reporte, indice, carga)
+        if personal_id is None:
+            sin_personal.append(reporte['id'])
+            continue
+        carga[personal_id] = carga.get(personal_id, 0) + 1
+        plan.append((reporte['id'], personal_id))
+    _estadisticas["decisiones"] += len(plan)
+    _estadisticas["sin_personal"] += len(sin_personal)
+    return plan, sin_personal
+
+
+# -----------------------------------------------------
+# ESCRITURA
+# -----------------------------------------------------
+
+def _insertar_asignaciones(cursor, plan):
+    """Inserta el plan y devuelve {reporte_id: personal_id} de lo insertado.
+
+    Si otro proceso asignó el mismo reporte en paralelo, el índice único
+    parcial de la migración 014 descarta la fila repetida.
+    """
+    if not plan:
+        return {}
+    filas = psycopg2.extras.execute_values(cursor, """
+        INSERT INTO asignaciones_reportes (reporte_id, personal_id)
+        VALUES %s
+        ON CONFLICT (reporte_id) WHERE estado = 'asignado' DO NOTHING
+        RETURNING reporte_id, personal_id
+    """, plan, fetch=True)
+    return dict(filas)
+
+
+def _actualizar_asignado_a(asignados, indice):
+    """Copia el nombre de la persona a reportes.asignado_a (reportes_generales)."""
+    if not asignados:
+        return
+    valores = [
+        (reporte_id, indice["personal"][pid]['nombre'] if pid in indice["personal"] else None)
+        for reporte_id, pid in asignados.items()
+    ]
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor()
+        psycopg2.extras.execute_values(cursor, """
+            UPDATE reportes AS r
+            SET asignado_a = v.nombre
+            FROM (VALUES %s) AS v(id, nombre)
+            WHERE r.id = v.id AND r.asignado_a IS DISTINCT FROM v.nombre
+        """, valores, template="(%s, %s::varchar)")
+        conexion.commit()
+        cursor.close()
+
+
+def _datos_personal(personal_id, indice):
+    persona = indice["personal"].get(personal_id)
+    if persona is None:
+        return {"id": personal_id, "nombre": None, "email": None}
+    return {"id": personal_id, "nombre": persona['nombre'], "email": persona['email']}
+
+
+def _solo_abiertos(reportes):
+    """Filtra {id: reporte} a los reportes en ESTADOS_ABIERTOS.
+
+    Los que no traen estado (por ejemplo desde /api/enviar_correo) se
+    consultan en reportes_generales; los que ya no existen se descartan.
+    """
+    sin_estado = [rid for rid, r in reportes.items() if 'estado' not in r]
+    estados = {}
+    if sin_estado:
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("SELECT id, estado FROM reportes WHERE id = ANY(%s)", (sin_estado,))
+            estados = dict(cursor.fetchall())
+            cursor.close()
+    return {
+        rid: r for rid, r in reportes.items()
+        if r.get('estado', estados.get(rid)) in ESTADOS_ABIERTOS
+    }
+
+
+def asignar_reportes(reportes):
+    """Asigna los reportes (dicts con id, categoria, sede y estado) que no tengan asignación abierta.
+
+    Solo se asignan reportes abiertos (ESTADOS_ABIERTOS). Devuelve
+    {reporte_id: {id, nombre, email}} con la persona de cada reporte, sea una
+    asignación nueva o la que ya tenía. Se puede repetir sin duplicar.
+    """
+    reportes = {r['id']: r for r in reportes}
+    if not reportes:
+        return {}
+
+    indice = obtener_indice()
+    abiertos = _solo_abiertos(reportes)
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT reporte_id, personal_id
+            FROM asignaciones_reportes
+            WHERE reporte_id = ANY(%s) AND estado = %s
+        """, (list(reportes), ASIGNACION_ABIERTA))
+        asignados = dict(cursor.fetchall())
+
+        plan, _ = planificar([r for rid, r in abiertos.items() if rid not in asignados], indice)
+        nuevos = _insertar_asignaciones(cursor, plan)
+        conexion.commit()
+        cursor.close()
+
+    _actualizar_asignado_a(nuevos, indice)
+    asignados.update(nuevos)
+    return {rid: _datos_personal(pid, indice) for rid, pid in asignados.items()}
+
+
+def _reportes_sin_asignar(asignados, limite):
+    """Reportes abiertos sin asignación, del más antiguo al más reciente."""
+    if limite <= 0:
+        return []
+    encontrados = []
+    with obtener_conexion_reportes_generales() as conexion:
+        # Cursor del lado del servidor: se leen solo las filas necesarias
+        cursor = conexion.cursor(name='reportes_sin_asignar', cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.itersize = 2000
+        cursor.execute("""
+            SELECT id, categoria, sede
+            FROM reportes
+            WHERE estado = ANY(%s)
+            ORDER BY fecha_reporte, id
+        """, (list(ESTADOS_ABIERTOS),))
+        for reporte in cursor:
+            if reporte['id'] not in asignados:
+                encontrados.append(reporte)
+                if len(encontrados) >= limite:
+                    break
+        cursor.close()
+        conexion.commit()
+    return encontrados
+
+
+def rebalancear(limite=REBALANCEO_MAXIMO):
+    """Redistribuye hasta `limite` reportes en una sola pasada.
+
+    - Asignaciones de reportes que ya no están abiertos: se completan.
+    - Asignaciones de personas inactivas o sin cobertura: se reasignan.
+    - Personas por encima de su capacidad: sus asignaciones más recientes
+      pasan a quien tenga cupo.
+    - Reportes abiertos sin asignación: se asignan con el cupo que quede.
+
+    Los UPDATE solo tocan asignaciones que siguen abiertas: si entre la
+    lectura y la escritura otro proceso completó una, no se reabre ni se
+    le crea un destino.
+    """
+    indice = obtener_indice(recargar=True)
+    personal = indice["personal"]
+    con_cobertura = {pid for ids in indice["cobertura"].values() for pid in ids}
+
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT id, reporte_id, personal_id
+            FROM asignaciones_reportes
+            WHERE estado = %s
+            ORDER BY fecha_asignacion, id
+        """, (ASIGNACION_ABIERTA,))
+        abiertas = cursor.fetchall()
+        cursor.close()
+
+    reportes = {}
+    if abiertas:
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("""
+                SELECT id, categoria, sede, estado
+                FROM reportes
+                WHERE id = ANY(%s)
+            """, (sorted({reporte_id for _, reporte_id, _ in abiertas}),))
+            reportes = {r['id']: r for r in cursor.fetchall()}
+            cursor.close()
+
+    # Asignaciones a mover: {asignacion_id: (reporte, personal_id)}
+    carga = {}
+    completar = []
+    mover = {}
+    for asignacion_id, reporte_id, pid in abiertas:
+        reporte = reportes.get(reporte_id)
+        if reporte is None or reporte['estado'] not in ESTADOS_ABIERTOS:
+            completar.append(asignacion_id)
+        elif pid not in con_cobertura:
+            mover[asignacion_id] = (reporte, pid)
+        elif carga.get(pid, 0) >= personal[pid]['capacidad'] and len(mover) < limite:
+            # Vienen de la más antigua a la más reciente: se mueven las que exceden
+            mover[asignacion_id] = (reporte, pid)
+        else:
+            carga[pid] = carga.get(pid, 0) + 1
+
+    plan, _ = planificar([r for r, _ in mover.values()], indice, carga)
+    destino = dict(plan)
+    # Se mueve solo lo que tiene a dónde ir, salvo si la persona ya no atiende
+    reasignar = [aid for aid, (r, pid) in mover.items() if r['id'] in destino or pid not in con_cobertura]
+    for r, pid in mover.values():
+        if r['id'] not in destino and pid in con_cobertura:
+            carga[pid] = carga.get(pid, 0) + 1
+
+    asignados = {rid for _, rid, _ in abiertas}
+    sin_asignar = _reportes_sin_asignar(asignados, limite - len(plan))
+    plan_nuevos, sin_personal = planificar(sin_asignar, indice, _carga_con_plan(carga, plan))
+
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor()
+        completadas = []
+        if completar:
+            cursor.execute("""
+                UPDATE asignaciones_reportes
+                SET estado = %s, fecha_completado = NOW()
+                WHERE id = ANY(%s) AND estado = %s
+                RETURNING id
+            """, (ASIGNACION_COMPLETADA, completar, ASIGNACION_ABIERTA))
+            completadas = cursor.fetchall()
+        movidos = set()
+        if reasignar:
+            cursor.execute("""
+                UPDATE asignaciones_reportes
+                SET estado = %s, fecha_completado = NOW()
+                WHERE id = ANY(%s) AND estado = %s
+                RETURNING reporte_id
+            """, (ASIGNACION_REASIGNADA, reasignar, ASIGNACION_ABIERTA))
+            movidos = {fila[0] for fila in cursor.fetchall()}
+        # Solo reciben destino los reportes cuya asignación se cerró aquí
+        plan = [(rid, pid) for rid, pid in plan if rid in movidos]
+        nuevos = _insertar_asignaciones(cursor, plan + plan_nuevos)
+        conexion.commit()
+        cursor.close()
+
+    # Reportes que quedaron sin persona tras una reasignación forzada
+    liberados = {rid: None for rid in movidos if rid not in nuevos}
+    _actualizar_asignado_a({**liberados, **nuevos}, indice)
+
+    return {
+        "completadas": len(completadas),
+        "reasignadas": sum(1 for rid, _ in plan if rid in nuevos),
+        "asignadas": sum(1 for rid, _ in plan_nuevos if rid in nuevos),
+        "sin_personal": len(sin_personal) + len(liberados),
+    }
+
+
+def _carga_con_plan(carga, plan):
+    carga = dict(carga)
+    for _, pid in plan:
+        carga[pid] = carga.get(pid, 0) + 1
+    return carga
+
+
+# -----------------------------------------------------
+# CONSULTA DE CARGA
+# -----------------------------------------------------
+
+def carga_personal():
+    """Cola de cada persona activa, de la más ocupada a la menos ocupada."""
+    indice = obtener_indice()
+    filas = []
+    for pid, persona in indice["personal"].items():
+        abiertas = indice["carga"].get(pid, 0)
+        filas.append({
+            "personal_id": pid,
+            "nombre": persona['nombre'],
+            "departamento": persona['departamento'],
+            "capacidad": persona['capacidad'],
+            "abiertas": abiertas,
+            "ocupacion": round(abiertas / persona['capacidad'], 3),
+        })
+    filas.sort(key=lambda f: (-f["ocupacion"], f["personal_id"]))
+    return filas
+
+
+def estadisticas_asignaciones():
+    indice = _indice
+    return {
+        **_estadisticas,
+        "personal": len(indice["personal"]) if indice else None,
+        "edad_segundos": round(time.monotonic() - indice["cargado"], 1) if indice else None,
+        "pid": os.getpid(),
+        "listener": _listener_pid == os.getpid(),
+    }
+
+
+# -----------------------------------------------------
+# LISTEN/NOTIFY
+# -----------------------------------------------------
+
+def _escuchar_asignaciones():
+    while True:
+        conexion = None
+        try:
+            conexion = conexion_dedicada("departamentos_db")
+            conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            cursor = conexion.cursor()
+            cursor.execute(f"LISTEN {CANAL_ASIGNACIONES}")
+            cursor.close()
+
+            while True:
+                if not select.select([conexion], [], [], 60)[0]:
+                    continue
+                conexion.poll()
+                while conexion.notifies:
+                    aviso = conexion.notifies.pop(0)
+                    _estadisticas["avisos"] += 1
+                    try:
+                        evento = json.loads(aviso.payload)
+                    except ValueError:
+                        continue
+                    if evento.get('tipo') == 'carga':
+                        _aplicar_cambios(evento.get('cambios') or [], evento.get('xid'))
+                    else:
+                        invalidar_indice()
+        except Exception as e:
+            print("Error en el listener de asignaciones:", e)
+            # Mientras no hubo LISTEN se pudieron perder cambios de carga
+            invalidar_indice()
+            time.sleep(5)
+        finally:
+            if conexion is not None and not conexion.closed:
+                conexion.close()
+
+
+def _iniciar_listener():
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+    hilo = threading.Thread(target=_escuchar_asignaciones, name="asignaciones", daemon=True)
+    hilo.start()
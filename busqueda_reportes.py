@@ -0,0 +1,96 @@
+import html
+import os
+
+import psycopg2.extras
+
+from consultas_reportes import condiciones_filtros, consulta_con_nombres
+from paginacion import SIGUIENTE, armar_pagina, condicion_keyset, decodificar_cursor, orden_keyset
+
+# -----------------------------------------------------
+# BÚSQUEDA DE TEXTO EN REPORTES (migración 012)
+# -----------------------------------------------------
+# La consulta del usuario se interpreta con websearch_to_tsquery ("frase
+# exacta", OR, -excluir) y se compara con la columna busqueda por el índice
+# GIN. El orden es por relevancia y luego por id, y la paginación continúa
+# desde el par (rango, id) de la última fila, igual que listar_reportes.
+CONFIGURACION = 'spanish'
+BUSQUEDA_LARGO_MAX = int(os.getenv('BUSQUEDA_LARGO_MAX', 200))
+COLUMNAS_KEYSET = ("p.rango", "p.id")
+
+# ts_headline marca las coincidencias con caracteres de uso privado; después
+# de escapar el texto se cambian por <mark>, así el fragmento es HTML seguro.
+_INICIO_MARCA = '\ue000'
+_FIN_MARCA = '\ue001'
+OPCIONES_FRAGMENTO = (
+    f'StartSel="{_INICIO_MARCA}", StopSel="{_FIN_MARCA}", '
+    "MaxWords=25, MinWords=8, MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+
+def leer_busqueda(valor):
+    """Texto de búsqueda limpio, o None si viene vacío."""
+    texto = ' '.join((valor or '').split())[:BUSQUEDA_LARGO_MAX]
+    return texto or None
+
+
+def fragmento_html(fragmento):
+    texto = html.escape(fragmento or '')
+    return texto.replace(_INICIO_MARCA, '<mark>').replace(_FIN_MARCA, '</mark>')
+
+
+def buscar_reportes(texto, filtros, cursor=None, direccion=SIGUIENTE, limite=50):
+    """Una página de reportes que coinciden con `texto`, de más a menos relevante.
+
+    El rango se redondea a 6 decimales para que el valor que vuelve en el
+    cursor sea exactamente el mismo que compara PostgreSQL. ts_headline se
+    calcula solo sobre las filas de la página.
+    """
+    condiciones, parametros = condiciones_filtros(filtros)
+    condiciones.insert(0, "r.busqueda @@ b.q")
+
+    filtro_cursor = ""
+    parametros_cursor = []
+    valores_cursor = decodificar_cursor(cursor)
+    if valores_cursor and len(valores_cursor) == len(COLUMNAS_KEYSET):
+        filtro_cursor, parametros_cursor = condicion_keyset(COLUMNAS_KEYSET, valores_cursor, direccion)
+        filtro_cursor = f"WHERE {filtro_cursor}"
+    else:
+        valores_cursor = None
+
+    columnas_nombres, join_nombres, obtener_conexion = consulta_con_nombres()
+    sql = f"""
+        WITH b AS (SELECT websearch_to_tsquery('{CONFIGURACION}', %s) AS q)
+        SELECT pagina.*,
+               ts_headline('{CONFIGURACION}', concat_ws(' — ', pagina.descripcion, pagina.fallas_otros),
+                           b.q, %s) AS fragmento
+        FROM (
+            SELECT p.*
+            FROM (
+                SELECT r.id, r.categoria, r.tipo_falla, r.sede, r.foto_path, r.descripcion,
+                       r.fallas_otros, r.fecha_reporte, r.estado, r.lat_foto, r.lon_foto,
+                       round(ts_rank(r.busqueda, b.q)::numeric, 6)::float8 AS rango{columnas_nombres}
+                FROM b, reportes r{join_nombres}
+                WHERE {' AND '.join(condiciones)}
+            ) p
+            {filtro_cursor}
+            ORDER BY {orden_keyset(COLUMNAS_KEYSET, direccion)}
+            LIMIT %s
+        ) pagina, b
+        ORDER BY {orden_keyset(("pagina.rango", "pagina.id"), direccion)}
+    """
+
+    with obtener_conexion() as conexion:
+        cursor_db = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor_db.execute(
+            sql, [texto, OPCIONES_FRAGMENTO] + parametros + parametros_cursor + [limite + 1]
+        )
+        filas = cursor_db.fetchall()
+        cursor_db.close()
+
+    for fila in filas:
+        fila['fragmento'] = fragmento_html(fila['fragmento'])
+
+    return armar_pagina(
+        filas, limite, direccion, valores_cursor is not None,
+        clave=lambda r: (r['rango'], r['id']),
+    )
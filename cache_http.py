@@ -0,0 +1,180 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from functools import wraps
+
+from flask import make_response, request
+
+from catalogos import obtener_catalogos
+from conexion import obtener_conexion_reportes_generales
+
+# -----------------------------------------------------
+# CACHÉ HTTP DE LAS APIs JSON DEL DASHBOARD
+# -----------------------------------------------------
+# Cada respuesta se identifica con una versión de los datos: max(id) y
+# max(fecha_actualizacion) de reportes, el total de reportes_resumen (cambia
+# también al borrar) y el contenido de los catálogos. Con esa versión:
+#   - se responde 304 a If-None-Match sin ejecutar la consulta agregada, y
+#   - el cuerpo se guarda en disco para que los 4 workers de gunicorn lo
+#     compartan (se escribe con os.replace, así nunca se lee a medias).
+CACHE_HTTP_DIR = os.getenv('CACHE_HTTP_DIR', os.path.join(tempfile.gettempdir(), 'dashboard_unegia_http'))
+# Segundos que un worker reutiliza la versión antes de volver a consultarla
+CACHE_HTTP_TTL = float(os.getenv('CACHE_HTTP_TTL', 5))
+CACHE_HTTP_MAX_AGE = int(os.getenv('CACHE_HTTP_MAX_AGE', 10))
+# Los archivos más viejos que esto se borran al escribir nuevos
+CACHE_HTTP_EXPIRACION = float(os.getenv('CACHE_HTTP_EXPIRACION', 3600))
+
+_lock = threading.Lock()
+_version_reportes = None   # (valor, última modificación, momento de la consulta)
+_huella_catalogos = None   # (versión local, cargado, huella)
+_ultima_limpieza = 0.0
+
+
+def _consultar_version_reportes():
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            SELECT
+                (SELECT MAX(id) FROM reportes),
+                (SELECT MAX(fecha_actualizacion) FROM reportes),
+                (SELECT COALESCE(SUM(total), 0) FROM reportes_resumen)
+        """)
+        max_id, max_actualizacion, total = cursor.fetchone()
+        cursor.close()
+    return f"{max_id}:{max_actualizacion.isoformat() if max_actualizacion else ''}:{total}", max_actualizacion
+
+
+def version_reportes():
+    """Versión de la tabla reportes y su última modificación, con un TTL corto."""
+    global _version_reportes
+    actual = _version_reportes
+    if actual is None or time.monotonic() - actual[2] > CACHE_HTTP_TTL:
+        valor, modificado = _consultar_version_reportes()
+        actual = _version_reportes = (valor, modificado, time.monotonic())
+    return actual[0], actual[1]
+
+
+def huella_catalogos():
+    """Hash del contenido de los catálogos.
+
+    Catalogos.version es un contador por proceso; aquí se necesita un valor
+    igual en todos los workers para que compartan ETag y cuerpos en disco.
+    """
+    global _huella_catalogos
+    catalogos = obtener_catalogos()
+    actual = _huella_catalogos
+    if actual is None or actual[:2] != (catalogos.version, catalogos.cargado):
+        contenido = repr((
+            sorted(catalogos.categorias.items()),
+            sorted(catalogos.fallas.items()),
+            sorted(catalogos.sedes.items()),
+        ))
+        huella = hashlib.sha1(contenido.encode()).hexdigest()[:16]
+        actual = _huella_catalogos = (catalogos.version, catalogos.cargado, huella)
+    return actual[2]
+
+
+def invalidar_cache_http():
+    """Olvida la versión local de reportes (la próxima petición la consulta)."""
+    global _version_reportes
+    _version_reportes = None
+
+
+def _ruta(etag):
+    return os.path.join(CACHE_HTTP_DIR, f"{etag}.json")
+
+
+def _leer(etag):
+    try:
+        with open(_ruta(etag), 'rb') as archivo:
+            return archivo.read()
+    except OSError:
+        return None
+
+
+def _guardar(etag, cuerpo):
+    try:
+        os.makedirs(CACHE_HTTP_DIR, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=CACHE_HTTP_DIR, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(cuerpo)
+        os.replace(temporal, _ruta(etag))
+    except OSError as e:
+        print(f"No se pudo guardar la respuesta en caché: {e}")
+        return
+    _limpiar()
+
+
+def _limpiar():
+    global _ultima_limpieza
+    ahora = time.time()
+    with _lock:
+        if ahora - _ultima_limpieza < 60:
+            return
+        _ultima_limpieza = ahora
+    try:
+        for entrada in os.scandir(CACHE_HTTP_DIR):
+            if ahora - entrada.stat().st_mtime > CACHE_HTTP_EXPIRACION:
+                os.remove(entrada.path)
+    except OSError:
+        pass
+
+
+def _respuesta(cuerpo, etag, modificado, max_age):
+    respuesta = make_response(cuerpo)
+    respuesta.mimetype = 'application/json'
+    _cabeceras(respuesta, etag, modificado, max_age)
+    return respuesta
+
+
+def _cabeceras(respuesta, etag, modificado, max_age):
+    respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = f"private, max-age={max_age}, must-revalidate"
+    if modificado:
+        respuesta.last_modified = modificado
+
+
+def respuesta_cacheada(depende_de_reportes=True, max_age=CACHE_HTTP_MAX_AGE, clave=None):
+    """Decorador para endpoints JSON de solo lectura.
+
+    Solo se guardan en caché las respuestas 200; los errores pasan tal cual.
+    `depende_de_reportes=False` para endpoints que solo leen catálogos.
+    `clave` es una función sin argumentos que devuelve una parte más del
+    ETag, para lo que la respuesta usa y no está en la URL (por ejemplo un
+    rango de fechas implícito que depende del día actual).
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            try:
+                partes = [request.path, request.query_string.decode(), huella_catalogos()]
+                if clave is not None:
+                    partes.append(str(clave()))
+                modificado = None
+                if depende_de_reportes:
+                    version, modificado = version_reportes()
+                    partes.append(version)
+                etag = hashlib.sha1('|'.join(partes).encode()).hexdigest()
+            except Exception as e:
+                # Sin versión no se puede cachear, pero el endpoint debe responder igual
+                print(f"Error al calcular la versión para {request.path}: {e}")
+                return vista(*args, **kwargs)
+
+            if etag in request.if_none_match:
+                respuesta = make_response('', 304)
+                _cabeceras(respuesta, etag, modificado, max_age)
+                return respuesta
+
+            cuerpo = _leer(etag)
+            if cuerpo is not None:
+                return _respuesta(cuerpo, etag, modificado, max_age)
+
+            respuesta = make_response(vista(*args, **kwargs))
+            if respuesta.status_code == 200 and respuesta.is_json:
+                _guardar(etag, respuesta.get_data())
+                _cabeceras(respuesta, etag, modificado, max_age)
+            return respuesta
+        return envoltura
+    return decorador
@@ -0,0 +1,54 @@
+import threading
+
+from flask import render_template, request
+
+from catalogos import obtener_catalogos
+
+# -----------------------------------------------------
+# CACHÉ DE PÁGINAS RENDERIZADAS (index y formulario)
+# -----------------------------------------------------
+# Estas páginas solo dependen de la categoría pedida y de los catálogos, así
+# que el HTML se guarda por (página, raíz de la app, categoría) junto con la
+# versión de los catálogos. Un acierto no consulta la base de datos; cuando
+# cambian categorias, fallas o sedes la versión cambia (NOTIFY o TTL en
+# catalogos.py) y la página se vuelve a renderizar.
+_paginas = {}
+_lock = threading.Lock()
+_estadisticas = {"hits": 0, "misses": 0}
+
+
+def pagina_cacheada(plantilla, clave, contexto):
+    """Renderiza `plantilla` o devuelve el HTML guardado para `clave`.
+
+    `contexto(catalogos)` arma las variables de la plantilla; solo se llama
+    si hay que renderizar. `clave` debe tomar pocos valores (p. ej. un id de
+    categoría válido o None) porque cada valor ocupa una entrada.
+    """
+    catalogos = obtener_catalogos()
+    # url_for depende de la raíz (/dashboard_unegia o /)
+    llave = (plantilla, request.script_root, clave)
+
+    guardada = _paginas.get(llave)
+    if guardada is not None and guardada[0] == catalogos.version:
+        _estadisticas["hits"] += 1
+        return guardada[1]
+
+    _estadisticas["misses"] += 1
+    html = render_template(plantilla, **contexto(catalogos))
+    with _lock:
+        if guardada is not None and guardada[0] != catalogos.version:
+            # Cambiaron los catálogos: se descartan todas las versiones viejas
+            for otra in [k for k, v in _paginas.items() if v[0] != catalogos.version]:
+                del _paginas[otra]
+        _paginas[llave] = (catalogos.version, html)
+    return html
+
+
+def estadisticas_paginas():
+    total = _estadisticas["hits"] + _estadisticas["misses"]
+    return {
+        "hits": _estadisticas["hits"],
+        "misses": _estadisticas["misses"],
+        "ratio_hits": round(_estadisticas["hits"] / total, 4) if total else 0,
+        "entradas": len(_paginas),
+    }
@@ -0,0 +1,215 @@
+import os
+import select
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import psycopg2
+import psycopg2.extensions
+import psycopg2.extras
+
+from conexion import conexion_dedicada, obtener_conexion, obtener_conexion_categorias
+from consultas_paralelas import en_paralelo
+
+# -----------------------------------------------------
+# CACHÉ DE CATÁLOGOS (categorías, fallas y sedes)
+# -----------------------------------------------------
+# Estas tablas casi nunca cambian, así que cada worker las carga una vez y las
+# reutiliza hasta que vence el TTL o llega una invalidación explícita (endpoint
+# de administración o NOTIFY desde los triggers de la migración 002).
+CATALOGOS_TTL = float(os.getenv('CATALOGOS_TTL', 300))
+CATALOGOS_LISTEN = os.getenv('CATALOGOS_LISTEN', 'True') == 'True'
+CANAL_CATALOGOS = 'catalogos_cambio'
+
+
+class Catalogos(NamedTuple):
+    categorias: Dict[int, str]
+    categorias_inf: Dict[int, Optional[str]]
+    fallas: Dict[int, str]
+    fallas_por_categoria: Dict[int, List[dict]]
+    sedes: Dict[int, str]
+    sedes_coordenadas: Dict[int, Tuple[Optional[float], Optional[float]]]
+    version: int
+    cargado: float
+
+
+_catalogos: Optional[Catalogos] = None
+_version = 0
+_lock = threading.Lock()
+_estadisticas = {"hits": 0, "misses": 0, "recargas": 0, "invalidaciones": 0}
+_listener_pid = None
+
+
+def a_entero(valor):
+    """Normaliza un id que puede venir como int, str o None."""
+    try:
+        return int(str(valor).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def _cargar_categorias():
+    with obtener_conexion_categorias() as conexion_cat:
+        cursor_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor_cat.execute("SELECT id, nombre, inf FROM categorias")
+        categorias_data = cursor_cat.fetchall()
+        cursor_cat.execute("SELECT id, categoria_id, descripcion, inf FROM fallas ORDER BY id")
+        fallas_data = cursor_cat.fetchall()
+        cursor_cat.close()
+    return categorias_data, fallas_data
+
+
+def _cargar_sedes():
+    with obtener_conexion() as conexion_sedes:
+        cursor_sedes = conexion_sedes.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor_sedes.execute("SELECT id, nombre, latitud, longitud FROM sedes ORDER BY id")
+        sedes_data = cursor_sedes.fetchall()
+        cursor_sedes.close()
+    return sedes_data
+
+
+def _cargar():
+    # categorias_fallas y sedes_uneg son bases distintas: se consultan a la vez
+    resultados = en_paralelo(categorias=_cargar_categorias, sedes=_cargar_sedes)
+    categorias_data, fallas_data = resultados['categorias']
+    sedes_data = resultados['sedes']
+
+    fallas_por_categoria = {}
+    for f in fallas_data:
+        fallas_por_categoria.setdefault(f['categoria_id'], []).append(
+            {"id": f['id'], "descripcion": f['descripcion'], "inf": f['inf']}
+        )
+
+    return dict(
+        categorias={c['id']: c['nombre'] for c in categorias_data},
+        categorias_inf={c['id']: c['inf'] for c in categorias_data},
+        fallas={f['id']: f['descripcion'] for f in fallas_data},
+        fallas_por_categoria=fallas_por_categoria,
+        sedes={s['id']: s['nombre'] for s in sedes_data},
+        sedes_coordenadas={
+            s['id']: (
+                float(s['latitud']) if s['latitud'] is not None else None,
+                float(s['longitud']) if s['longitud'] is not None else None,
+            )
+            for s in sedes_data
+        },
+    )
+
+
+def _vigente(catalogos):
+    return catalogos is not None and time.monotonic() - catalogos.cargado < CATALOGOS_TTL
+
+
+def obtener_catalogos() -> Catalogos:
+    """Devuelve el snapshot actual de catálogos, recargándolo si venció."""
+    global _catalogos, _version
+    _iniciar_listener()
+
+    catalogos = _catalogos
+    if _vigente(catalogos):
+        _estadisticas["hits"] += 1
+        return catalogos
+
+    with _lock:
+        # Otro hilo pudo recargar mientras esperábamos el lock
+        if _vigente(_catalogos):
+            _estadisticas["hits"] += 1
+            return _catalogos
+
+        _estadisticas["misses"] += 1
+        datos = _cargar()
+        anterior = _catalogos
+        # La versión solo cambia si el contenido cambió; así las cachés que
+        # dependen de ella no se invalidan en cada vencimiento del TTL.
+        if anterior is None or anterior._replace(version=0, cargado=0) != Catalogos(version=0, cargado=0, **datos):
+            _version += 1
+        _catalogos = Catalogos(version=_version, cargado=time.monotonic(), **datos)
+        _estadisticas["recargas"] += 1
+        return _catalogos
+
+
+def invalidar_catalogos():
+    """Marca el snapshot de este worker como vencido."""
+    global _catalogos
+    with _lock:
+        if _catalogos is not None:
+            _catalogos = _catalogos._replace(cargado=float('-inf'))
+        _estadisticas["invalidaciones"] += 1
+
+
+def notificar_cambio_catalogos():
+    """Invalida este worker y avisa al resto por NOTIFY en ambas bases."""
+    invalidar_catalogos()
+
+    def notificar(obtener):
+        with obtener() as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("SELECT pg_notify(%s, 'manual')", (CANAL_CATALOGOS,))
+            conexion.commit()
+            cursor.close()
+
+    en_paralelo(
+        categorias=lambda: notificar(obtener_conexion_categorias),
+        sedes=lambda: notificar(obtener_conexion),
+    )
+
+
+def estadisticas_catalogos():
+    catalogos = _catalogos
+    total = _estadisticas["hits"] + _estadisticas["misses"]
+    return {
+        **_estadisticas,
+        "ratio_hits": round(_estadisticas["hits"] / total, 4) if total else 0,
+        "version": catalogos.version if catalogos else None,
+        "edad_segundos": round(time.monotonic() - catalogos.cargado, 1) if catalogos and catalogos.cargado > 0 else None,
+        "pid": os.getpid(),
+        "listener": _listener_pid == os.getpid(),
+    }
+
+
+# -----------------------------------------------------
+# LISTEN/NOTIFY
+# -----------------------------------------------------
+
+def _escuchar_cambios():
+    while True:
+        conexiones = []
+        try:
+            for nombre_db in ("categorias_fallas", "sedes_uneg"):
+                conexion = conexion_dedicada(nombre_db)
+                conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conexion.cursor()
+                cursor.execute(f"LISTEN {CANAL_CATALOGOS}")
+                cursor.close()
+                conexiones.append(conexion)
+
+            while True:
+                listas, _, _ = select.select(conexiones, [], [], 60)
+                recibidas = False
+                for conexion in listas:
+                    conexion.poll()
+                    if conexion.notifies:
+                        conexion.notifies.clear()
+                        recibidas = True
+                if recibidas:
+                    invalidar_catalogos()
+        except Exception as e:
+            print("Error en el listener de catálogos:", e)
+            time.sleep(5)
+        finally:
+            for conexion in conexiones:
+                if not conexion.closed:
+                    conexion.close()
+
+
+def _iniciar_listener():
+    global _listener_pid
+    pid = os.getpid()
+    if not CATALOGOS_LISTEN or _listener_pid == pid:
+        return
+    with _lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+    hilo = threading.Thread(target=_escuchar_cambios, name="catalogos-listener", daemon=True)
+    hilo.start()
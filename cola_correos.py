@@ -0,0 +1,301 @@
+import mimetypes
+import os
+
+import psycopg2.extras
+from flask import current_app
+from flask_mail import Message
+
+from asignaciones import asignar_reportes
+from catalogos import a_entero, obtener_catalogos
+from conexion import obtener_conexion_departamentos_db, obtener_conexion_reportes_generales
+
+# -----------------------------------------------------
+# COLA DE CORREOS SALIENTES
+# -----------------------------------------------------
+# enviar_reporte solo inserta una fila en cola_correos dentro de la misma
+# transacción del reporte; worker_correos.py la envía después por SMTP y deja
+# el resultado en correos_enviados (departamentos_db). Antes de enviar asigna
+# los reportes al personal (asignaciones.py) y el correo de un reporte nuevo
+# va a la persona asignada; sin asignación va a CORREO_DESTINATARIO.
+DESTINATARIO_POR_DEFECTO = os.getenv('CORREO_DESTINATARIO', 'acalcurian671@gmail.com')
+URL_PUBLICA = os.getenv('URL_PUBLICA', 'http://127.0.0.1:5000').rstrip('/')
+ASUNTO_NUEVO_REPORTE = "Nuevo Reporte Registrado"
+ASUNTO_RESUMEN = "Resumen de reportes registrados"
+
+TIPO_NUEVO_REPORTE = 'nuevo_reporte'
+# Un solo correo para varios reportes (carga por lotes)
+TIPO_RESUMEN = 'resumen'
+
+CANAL_COLA = 'cola_correos'
+CORREOS_LOTE = int(os.getenv('CORREOS_LOTE', 20))
+CORREOS_MAX_INTENTOS = int(os.getenv('CORREOS_MAX_INTENTOS', 6))
+# Espera base (segundos) entre reintentos; se duplica en cada intento
+CORREOS_BACKOFF = float(os.getenv('CORREOS_BACKOFF', 30))
+
+
+def encolar_correo(cursor, reporte_ids, tipo=TIPO_NUEVO_REPORTE, destinatario=None):
+    """Agrega un correo a la cola usando el cursor (y la transacción) del llamador."""
+    cursor.execute("""
+        INSERT INTO cola_correos (tipo, reporte_ids, destinatario)
+        VALUES (%s, %s, %s)
+        RETURNING id
+    """, (tipo, list(reporte_ids), destinatario))
+    cola_id = cursor.fetchone()[0]
+    # Se entrega al confirmar la transacción y despierta al worker
+    cursor.execute(f"NOTIFY {CANAL_COLA}")
+    return cola_id
+
+
+def datos_correo(reporte, catalogos):
+    """Campos legibles de un reporte para el cuerpo del correo."""
+    return {
+        "reporte_id": reporte.get('id'),
+        "cedula": reporte.get('cedula'),
+        "categoria": catalogos.categorias.get(a_entero(reporte.get('categoria')), "No encontrado"),
+        "falla": catalogos.fallas.get(a_entero(reporte.get('tipo_falla')), "No encontrado"),
+        "sede": catalogos.sedes.get(a_entero(reporte.get('sede')), "No encontrado"),
+        "descripcion": reporte.get('descripcion'),
+        "foto_path": reporte.get('foto_path'),
+    }
+
+
+def registrar_correo(datos, destinatario, asunto, estatus_envio='pendiente'):
+    """Inserta el registro en correos_enviados y devuelve su id."""
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            INSERT INTO correos_enviados
+            (reporte_id, cedula, destinatario, asunto, mensaje, foto_path, estatus_confirmacion, estatus_envio)
+            VALUES (%s, %s, %s, %s, %s, %s, FALSE, %s)
+            RETURNING id
+        """, (
+            datos["reporte_id"], datos["cedula"], destinatario, asunto,
+            datos["descripcion"], datos["foto_path"], estatus_envio,
+        ))
+        correo_id = cursor.fetchone()[0]
+        conexion.commit()
+        cursor.close()
+    return correo_id
+
+
+def marcar_envio(estados):
+    """Guarda el estatus de envío de varios correos en un solo UPDATE.
+
+    `estados` es una lista de tuplas (correo_id, estatus_envio, error).
+    """
+    if not estados:
+        return
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor()
+        psycopg2.extras.execute_values(cursor, """
+            UPDATE correos_enviados AS c
+            SET estatus_envio = v.estado, error_envio = v.error
+            FROM (VALUES %s) AS v(id, estado, error)
+            WHERE c.id = v.id
+        """, estados)
+        conexion.commit()
+        cursor.close()
+
+
+def construir_mensaje(datos, destinatario, correo_id, asunto=ASUNTO_NUEVO_REPORTE):
+    msg = Message(
+        subject=asunto,
+        recipients=[destinatario],
+    )
+
+    foto_path = datos["foto_path"]
+    msg.html = f"""
+    <h2>📋 Nuevo reporte recibido</h2>
+
+    <p><b>Cédula:</b> {datos["cedula"]}</p>
+    <p><b>Categoría:</b> {datos["categoria"]}</p>
+    <p><b>Falla:</b> {datos["falla"]}</p>
+    <p><b>Sede:</b> {datos["sede"]}</p>
+    <p><b>Descripción:</b> {datos["descripcion"]}</p>
+
+    <br>
+    {'<img src="cid:foto_reporte">' if foto_path else '<p>Sin imagen adjunta</p>'}
+
+    <br><br>
+    <p>Confirma que recibiste este correo:</p>
+    <a href="{URL_PUBLICA}/confirmar_recepcion?correo_id={correo_id}"
+       style="background-color:#4CAF50;color:white;padding:10px 20px;
+       text-decoration:none;border-radius:5px;">
+       Confirmar Recepción ✅
+    </a>
+    """
+
+    if foto_path:
+        # Después de imagenes.py la foto ya viene reducida (WebP o JPEG)
+        tipo = mimetypes.guess_type(foto_path)[0] or "image/jpeg"
+        with current_app.open_resource(os.path.join('static', foto_path)) as fp:
+            msg.attach(
+                f"reporte{os.path.splitext(foto_path)[1] or '.jpg'}",
+                tipo,
+                fp.read(),
+                disposition='inline',
+                headers={"Content-ID": "<foto_reporte>"}
+            )
+
+    return msg
+
+
+def datos_resumen(reportes, catalogos):
+    """Campos del correo de resumen; `reportes` en el orden del lote."""
+    detalle = [datos_correo(r, catalogos) for r in reportes]
+    cedulas = {d["cedula"] for d in detalle}
+    return {
+        "reporte_id": detalle[0]["reporte_id"],
+        "cedula": cedulas.pop() if len(cedulas) == 1 else None,
+        "descripcion": "\n".join(
+            f"#{d['reporte_id']} {d['categoria']} / {d['falla']} / {d['sede']}" for d in detalle
+        ),
+        "foto_path": None,
+        "reportes": detalle,
+    }
+
+
+def construir_resumen(datos, destinatario, correo_id, asunto=ASUNTO_RESUMEN):
+    msg = Message(
+        subject=asunto,
+        recipients=[destinatario],
+    )
+
+    filas = "".join(
+        f"<tr><td>{d['reporte_id']}</td><td>{d['cedula']}</td><td>{d['categoria']}</td>"
+        f"<td>{d['falla']}</td><td>{d['sede']}</td><td>{d['descripcion'] or ''}</td></tr>"
+        for d in datos["reportes"]
+    )
+    msg.html = f"""
+    <h2>📋 {len(datos["reportes"])} reportes recibidos</h2>
+
+    <table border="1" cellpadding="4" cellspacing="0">
+        <tr><th>ID</th><th>Cédula</th><th>Categoría</th><th>Falla</th><th>Sede</th><th>Descripción</th></tr>
+        {filas}
+    </table>
+
+    <br><br>
+    <p>Confirma que recibiste este correo:</p>
+    <a href="{URL_PUBLICA}/confirmar_recepcion?correo_id={correo_id}"
+       style="background-color:#4CAF50;color:white;padding:10px 20px;
+       text-decoration:none;border-radius:5px;">
+       Confirmar Recepción ✅
+    </a>
+    """
+    return msg
+
+
+# -----------------------------------------------------
+# PROCESAMIENTO DE LA COLA (worker_correos.py)
+# -----------------------------------------------------
+
+def _mensaje_de_trabajo(trabajo, reportes, catalogos, asignados):
+    """Devuelve (datos, destinatario, asunto, función que arma el mensaje)."""
+    destinatario = trabajo['destinatario'] or DESTINATARIO_POR_DEFECTO
+    if trabajo['tipo'] == TIPO_RESUMEN:
+        encontrados = [reportes[rid] for rid in trabajo['reporte_ids'] if rid in reportes]
+        if not encontrados:
+            raise LookupError(f"ninguno de los reportes {trabajo['reporte_ids']} existe")
+        return datos_resumen(encontrados, catalogos), destinatario, ASUNTO_RESUMEN, construir_resumen
+
+    reporte = reportes.get(trabajo['reporte_ids'][0])
+    if reporte is None:
+        raise LookupError(f"reporte {trabajo['reporte_ids'][0]} no existe")
+    asignado = asignados.get(reporte['id'])
+    if not trabajo['destinatario'] and asignado and asignado['email']:
+        destinatario = asignado['email']
+    return datos_correo(reporte, catalogos), destinatario, ASUNTO_NUEVO_REPORTE, construir_mensaje
+
+
+def procesar_lote(mail, limite=CORREOS_LOTE):
+    """Envía hasta `limite` correos pendientes por una sola conexión SMTP.
+
+    Las filas se bloquean con FOR UPDATE SKIP LOCKED, así que se pueden
+    ejecutar varios workers a la vez sin enviar dos veces el mismo correo.
+    Devuelve la cantidad de trabajos procesados.
+    """
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute("""
+            SELECT id, tipo, reporte_ids, destinatario, intentos, correo_id
+            FROM cola_correos
+            WHERE estado = 'pendiente' AND proximo_intento <= NOW()
+            ORDER BY proximo_intento
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (limite,))
+        trabajos = cursor.fetchall()
+
+        if not trabajos:
+            conexion.commit()
+            cursor.close()
+            return 0
+
+        reporte_ids = sorted({rid for t in trabajos for rid in t['reporte_ids']})
+        cursor.execute("""
+            SELECT id, cedula, categoria, tipo_falla, sede, descripcion, foto_path, estado
+            FROM reportes
+            WHERE id = ANY(%s)
+        """, (reporte_ids,))
+        reportes = {r['id']: r for r in cursor.fetchall()}
+        catalogos = obtener_catalogos()
+
+        # Todo el lote se asigna con un solo INSERT (solo los reportes que siguen
+        # abiertos); si falla se usa el destinatario por defecto
+        try:
+            asignados = asignar_reportes(reportes.values())
+        except Exception as e:
+            print(f"Error al asignar reportes del lote: {e}")
+            asignados = {}
+
+        resultados = []
+        try:
+            with mail.connect() as smtp:
+                for trabajo in trabajos:
+                    correo_id = trabajo['correo_id']
+                    try:
+                        datos, destinatario, asunto, construir = _mensaje_de_trabajo(trabajo, reportes, catalogos, asignados)
+                        if not correo_id:
+                            # Se registra una sola vez; los reintentos reutilizan el id
+                            correo_id = registrar_correo(datos, destinatario, asunto)
+                        smtp.send(construir(datos, destinatario, correo_id, asunto))
+                        resultados.append((trabajo, correo_id, None))
+                    except Exception as e:
+                        print(f"Error al enviar correo de la cola {trabajo['id']}: {e}")
+                        resultados.append((trabajo, correo_id, str(e)))
+        except Exception as e:
+            # Falló la conexión SMTP: todo lo que no se alcanzó a enviar se reintenta
+            print(f"Error de conexión SMTP: {e}")
+            procesados = {t['id'] for t, _, _ in resultados}
+            resultados.extend((t, t['correo_id'], str(e)) for t in trabajos if t['id'] not in procesados)
+
+        estados_correo = []
+        for trabajo, correo_id, error in resultados:
+            intentos = trabajo['intentos'] + 1
+            if error is None:
+                estado = 'enviado'
+            elif intentos >= CORREOS_MAX_INTENTOS:
+                estado = 'fallido'
+            else:
+                estado = 'pendiente'
+            cursor.execute("""
+                UPDATE cola_correos
+                SET estado = %s,
+                    intentos = %s,
+                    correo_id = %s,
+                    ultimo_error = %s,
+                    proximo_intento = NOW() + make_interval(secs => %s),
+                    fecha_envio = CASE WHEN %s = 'enviado' THEN NOW() END
+                WHERE id = %s
+            """, (
+                estado, intentos, correo_id, error,
+                CORREOS_BACKOFF * (2 ** (intentos - 1)), estado, trabajo['id'],
+            ))
+            if correo_id:
+                estados_correo.append((correo_id, 'reintentando' if estado == 'pendiente' else estado, error))
+
+        conexion.commit()
+        cursor.close()
+
+    marcar_envio(estados_correo)
+    return len(trabajos)
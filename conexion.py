@@ -1,46 +1,312 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
 import psycopg2
+import psycopg2.extensions
+import psycopg2.pool
 
 from config import DATABASES
+from metricas import ConexionInstrumentada, observar_conexion
 
-# --- Conexión a base de datos de SEDES ---
-def obtener_conexion():
-    try:
-        db = DATABASES["sedes_uneg"]
-        conexion = psycopg2.connect(**db)
+# -----------------------------------------------------
+# CONFIGURACIÓN DEL POOL DE CONEXIONES
+# -----------------------------------------------------
+# Un pool por base de datos lógica de DATABASES. Los valores se pueden
+# ajustar por variables de entorno sin tocar config.py.
+POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+# Segundos que se espera por una conexión libre antes de fallar
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+# Conexiones libres por más de este tiempo (segundos) se cierran
+POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+# Si una conexión lleva más de este tiempo sin usarse se verifica con SELECT 1
+POOL_PING_INTERVAL = float(os.getenv('DB_POOL_PING_INTERVAL', 30))
+
+# -----------------------------------------------------
+# MODO DE DESPLIEGUE DE LAS BASES DE DATOS
+# -----------------------------------------------------
+#   separado - las cuatro bases físicas de DATABASES (por defecto)
+#   esquemas - una sola base (DB_FEDERADA) con un esquema por base lógica;
+#              todas las conexiones van a un mismo pool
+#   fdw      - bases separadas; DB_FEDERADA ve las demás con postgres_fdw
+# En esquemas y fdw las vistas pueden resolver nombres con JOIN en una sola
+# consulta (ver consultas_reportes.py). scripts/db/federacion prepara ambos.
+DB_MODO = os.getenv('DB_MODO', 'separado')
+DB_FEDERADA = os.getenv('DB_FEDERADA', 'unegia' if DB_MODO == 'esquemas' else 'reportes_generales')
+ESQUEMAS = ('reportes_generales', 'departamentos_db', 'categorias_fallas', 'sedes_uneg')
+
+
+def modo_federado():
+    return DB_MODO in ('esquemas', 'fdw')
+
+
+def _base_fisica(nombre_db):
+    """Entrada de DATABASES que atiende a la base lógica `nombre_db`."""
+    return DB_FEDERADA if DB_MODO == 'esquemas' else nombre_db
+
+
+def _parametros(nombre_db):
+    parametros = dict(DATABASES[_base_fisica(nombre_db)])
+    if DB_MODO == 'esquemas':
+        # Las consultas sin esquema encuentran sus tablas en cualquiera de los cuatro
+        parametros['options'] = f"-c search_path={','.join(ESQUEMAS)},public"
+    return parametros
+
+
+class PoolConexiones(psycopg2.pool.ThreadedConnectionPool):
+    """Pool de psycopg2 con verificación de salud y cierre de conexiones ociosas."""
+
+    def __init__(self, minconn, maxconn, *args, nombre_db=None, **kwargs):
+        self.nombre_db = nombre_db
+        self._ultimo_uso = {}
+        self._cupos = threading.BoundedSemaphore(maxconn)
+        kwargs.setdefault('connection_factory', ConexionInstrumentada)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def _connect(self, key=None):
+        conexion = super()._connect(key)
+        conexion.nombre_db = self.nombre_db
+        self._ultimo_uso[id(conexion)] = time.monotonic()
         return conexion
+
+    def _putconn(self, conexion, key=None, close=False):
+        """Devuelve la conexión al pool hasta `maxconn` libres.
+
+        putconn de psycopg2 cierra toda conexión devuelta por encima de
+        `minconn`, así que con DB_POOL_MIN=1 casi cada petición abriría una
+        conexión nueva. Aquí se conservan y _cerrar_ociosas las cierra tras
+        POOL_IDLE_TIMEOUT.
+        """
+        if self.closed:
+            raise psycopg2.pool.PoolError("connection pool is closed")
+        if key is None:
+            key = self._rused.get(id(conexion))
+            if key is None:
+                raise psycopg2.pool.PoolError("trying to put unkeyed connection")
+
+        if not close and not conexion.closed and len(self._pool) < self.maxconn:
+            estado = conexion.info.transaction_status
+            if estado == psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN:
+                # Se perdió la conexión con el servidor
+                close = True
+            elif estado != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                # Transacción abierta o con error
+                conexion.rollback()
+        else:
+            close = True
+
+        if close:
+            self._ultimo_uso.pop(id(conexion), None)
+            if not conexion.closed:
+                conexion.close()
+        else:
+            self._pool.append(conexion)
+
+        if not self.closed or key in self._used:
+            del self._used[key]
+            del self._rused[id(conexion)]
+
+    def _closeall(self):
+        super()._closeall()
+        self._ultimo_uso.clear()
+
+    def _conexion_sana(self, conexion):
+        if conexion.closed:
+            return False
+        inactiva = time.monotonic() - self._ultimo_uso.get(id(conexion), 0)
+        if inactiva < POOL_PING_INTERVAL:
+            return True
+        try:
+            cursor = conexion.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conexion.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def obtener(self):
+        if not self._cupos.acquire(timeout=POOL_TIMEOUT):
+            raise psycopg2.pool.PoolError("tiempo de espera agotado para obtener una conexión")
+        try:
+            # Descarta las conexiones caídas hasta encontrar una sana
+            while True:
+                conexion = self.getconn()
+                if self._conexion_sana(conexion):
+                    return conexion
+                self._descartar(conexion)
+        except Exception:
+            self._cupos.release()
+            raise
+
+    def devolver(self, conexion):
+        try:
+            if conexion.closed:
+                self._descartar(conexion)
+            else:
+                self._ultimo_uso[id(conexion)] = time.monotonic()
+                self.putconn(conexion)
+                self._cerrar_ociosas()
+        finally:
+            self._cupos.release()
+
+    def _descartar(self, conexion):
+        self._ultimo_uso.pop(id(conexion), None)
+        self.putconn(conexion, close=True)
+
+    def _cerrar_ociosas(self):
+        ahora = time.monotonic()
+        with self._lock:
+            for conexion in list(self._pool):
+                if len(self._pool) <= self.minconn:
+                    break
+                if ahora - self._ultimo_uso.get(id(conexion), ahora) > POOL_IDLE_TIMEOUT:
+                    self._pool.remove(conexion)
+                    self._ultimo_uso.pop(id(conexion), None)
+                    conexion.close()
+
+
+_pools = {}
+_pools_pid = None
+_pools_lock = threading.Lock()
+# Pools heredados de un proceso padre (gunicorn --preload). No se cierran en el
+# hijo porque cerrarlos terminaría las conexiones que el padre sigue usando.
+_pools_heredados = []
+
+
+def _reiniciar_pools():
+    global _pools, _pools_pid
+    if _pools:
+        _pools_heredados.append(_pools)
+    _pools = {}
+    _pools_pid = None
+
+
+def _despues_de_fork():
+    # El lock pudo quedar tomado por otro hilo del padre al momento del fork
+    global _pools_lock
+    _pools_lock = threading.Lock()
+    _reiniciar_pools()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_despues_de_fork)
+
+
+def obtener_pool(nombre_db):
+    global _pools_pid
+    nombre_db = _base_fisica(nombre_db)
+    pid = os.getpid()
+    with _pools_lock:
+        if _pools_pid != pid:
+            _reiniciar_pools()
+            _pools_pid = pid
+        pool = _pools.get(nombre_db)
+        if pool is None:
+            pool = PoolConexiones(POOL_MIN, POOL_MAX, nombre_db=nombre_db, **_parametros(nombre_db))
+            _pools[nombre_db] = pool
+        return pool
+
+
+@contextmanager
+def conexion_pool(nombre_db):
+    """Toma una conexión del pool de `nombre_db` y la devuelve siempre al salir.
+
+    Si el bloque lanza una excepción la transacción pendiente se revierte.
+    """
+    inicio = time.perf_counter()
+    try:
+        pool = obtener_pool(nombre_db)
+        conexion = pool.obtener()
     except Exception as e:
-        print(" Error al conectar a la base de datos sedes_uneg:", e)
-        return None
+        print(f"Error al conectar a la base de datos {nombre_db}:", e)
+        raise
+    observar_conexion(nombre_db, time.perf_counter() - inicio)
+
+    try:
+        yield conexion
+    except Exception:
+        if not conexion.closed:
+            try:
+                conexion.rollback()
+            except psycopg2.Error:
+                pass
+        raise
+    finally:
+        pool.devolver(conexion)
+
+
+def conexion_dedicada(nombre_db):
+    """Conexión fuera del pool, para procesos de larga duración como LISTEN."""
+    return psycopg2.connect(**_parametros(nombre_db))
+
+
+def _esperar_gevent(conexion, timeout=None):
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        estado = conexion.poll()
+        if estado == psycopg2.extensions.POLL_OK:
+            return
+        if estado == psycopg2.extensions.POLL_READ:
+            wait_read(conexion.fileno(), timeout=timeout)
+        elif estado == psycopg2.extensions.POLL_WRITE:
+            wait_write(conexion.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f"estado inesperado de poll(): {estado}")
+
+
+def usar_espera_cooperativa():
+    """Hace que psycopg2 ceda el control a gevent mientras espera al servidor.
+
+    Se llama una vez por worker gevent (gunicorn.conf.py), antes de abrir
+    conexiones. En este modo psycopg2 no admite COPY.
+    """
+    psycopg2.extensions.set_wait_callback(_esperar_gevent)
+
+
+def bases_distintas(nombres):
+    """Una base lógica de `nombres` por cada base física.
+
+    En modo esquemas todas comparten la misma base; un LISTEN por cada una
+    recibiría cada NOTIFY repetido.
+    """
+    por_base = {}
+    for nombre in nombres:
+        por_base.setdefault(_base_fisica(nombre), nombre)
+    return list(por_base.values())
+
+
+def cerrar_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.closeall()
+        _pools.clear()
+
+
+# --- Conexión a base de datos de SEDES ---
+def obtener_conexion():
+    return conexion_pool("sedes_uneg")
 
 
 # --- Conexión a base de datos de CATEGORÍAS y FALLAS ---
 def obtener_conexion_categorias():
-    try:
-        db = DATABASES["categorias_fallas"]
-        conexion = psycopg2.connect(**db)
-        return conexion
-    except Exception as e:
-        print("Error al conectar a la base de datos categorias_fallas:", e)
-        return None
+    return conexion_pool("categorias_fallas")
 
 
 # --- Conexión a base de datos de REPORTES GENERALES ---
 def obtener_conexion_reportes_generales():
-    try:
-        db = DATABASES["reportes_generales"]
-        conexion = psycopg2.connect(**db)
-        return conexion
-    except Exception as e:
-        print("Error al conectar a la base de datos reportes_generales:", e)
-        return None
+    return conexion_pool("reportes_generales")
 
 
-# --- Conexión a base de datos de REPORTES GENERALES ---
+# --- Conexión a base de datos de DEPARTAMENTOS ---
 def obtener_conexion_departamentos_db():
-    try:
-        db = DATABASES["departamentos_db"]
-        conexion = psycopg2.connect(**db)
-        return conexion
-    except Exception as e:
-        print("Error al conectar a la base de datos departamentos_db:", e)
-        return None
\ No newline at end of file
+    return conexion_pool("departamentos_db")
+
+
+# --- Conexión federada (solo con DB_MODO=esquemas o fdw) ---
+def obtener_conexion_federada():
+    """Conexión desde la que se ven reportes, catálogos y sedes a la vez."""
+    return conexion_pool(DB_FEDERADA)
@@ -0,0 +1,89 @@
+from datetime import timedelta
+
+import psycopg2.extras
+
+from conexion import obtener_conexion_departamentos_db
+from paginacion import (
+    SIGUIENTE,
+    armar_pagina,
+    condicion_keyset,
+    decodificar_cursor,
+    leer_fecha,
+    orden_keyset,
+)
+
+# -----------------------------------------------------
+# CONSULTAS DE CORREOS ENVIADOS
+# -----------------------------------------------------
+# Un solo motor de consulta para las vistas de /dashboard_admin. Las
+# condiciones de estatus se escriben igual que los predicados de los índices
+# parciales de la migración 003 para que PostgreSQL pueda usarlos.
+COLUMNAS_KEYSET = ("id",)
+
+CONDICIONES_ESTATUS = {
+    ("confirmacion", True): "estatus_confirmacion = TRUE",
+    ("confirmacion", False): "estatus_confirmacion = FALSE",
+    ("solucion", True): "estatus_solucion = TRUE",
+    ("solucion", False): "estatus_solucion IS NOT TRUE",
+}
+
+
+def _leer_booleano(valor):
+    if valor in ('1', 'true', 'True', 'si'):
+        return True
+    if valor in ('0', 'false', 'False', 'no'):
+        return False
+    return None
+
+
+def filtros_correos(args, confirmado=None):
+    """Filtros de la query string; `confirmado` lo fija la vista si aplica."""
+    return {
+        "confirmado": confirmado if confirmado is not None else _leer_booleano(args.get('confirmado')),
+        "solucionado": _leer_booleano(args.get('solucionado')),
+        "desde": leer_fecha(args.get('desde')),
+        "hasta": leer_fecha(args.get('hasta')),
+    }
+
+
+def listar_correos(filtros, cursor=None, direccion=SIGUIENTE, limite=50):
+    """Una página de correos_enviados ordenada por id descendente."""
+    condiciones = []
+    parametros = []
+
+    if filtros.get("confirmado") is not None:
+        condiciones.append(CONDICIONES_ESTATUS[("confirmacion", filtros["confirmado"])])
+    if filtros.get("solucionado") is not None:
+        condiciones.append(CONDICIONES_ESTATUS[("solucion", filtros["solucionado"])])
+    if filtros.get("desde"):
+        condiciones.append("fecha_envio >= %s")
+        parametros.append(filtros["desde"])
+    if filtros.get("hasta"):
+        condiciones.append("fecha_envio < %s")
+        parametros.append(filtros["hasta"] + timedelta(days=1))
+
+    valores_cursor = decodificar_cursor(cursor)
+    if valores_cursor and len(valores_cursor) == len(COLUMNAS_KEYSET):
+        condicion, params_cursor = condicion_keyset(COLUMNAS_KEYSET, valores_cursor, direccion)
+        condiciones.append(condicion)
+        parametros.extend(params_cursor)
+    else:
+        valores_cursor = None
+
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    sql = f"""
+        SELECT id, fecha_envio, reporte_id, cedula, destinatario, asunto, mensaje, foto_path,
+               estatus_confirmacion, estatus_solucion
+        FROM correos_enviados
+        {where}
+        ORDER BY {orden_keyset(COLUMNAS_KEYSET, direccion)}
+        LIMIT %s
+    """
+
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor_db = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor_db.execute(sql, parametros + [limite + 1])
+        filas = cursor_db.fetchall()
+        cursor_db.close()
+
+    return armar_pagina(filas, limite, direccion, valores_cursor is not None, clave=lambda c: (c['id'],))
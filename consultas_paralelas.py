@@ -0,0 +1,55 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# -----------------------------------------------------
+# CONSULTAS INDEPENDIENTES EN PARALELO
+# -----------------------------------------------------
+# Cada base lógica tiene su propio pool (conexion.py), así que las consultas a
+# bases distintas se pueden hacer a la vez: la latencia queda en la de la
+# consulta más lenta y no en la suma. Las funciones no deben depender del
+# contexto de Flask (request, url_for), porque corren en otro hilo.
+CONSULTAS_PARALELAS_WORKERS = int(os.getenv('CONSULTAS_PARALELAS_WORKERS', 8))
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+# Marca los hilos del executor para que una llamada anidada no espere por
+# cupos del mismo executor (podría bloquearse si están todos ocupados)
+_local = threading.local()
+
+
+def _obtener_executor():
+    global _executor, _executor_pid
+    pid = os.getpid()
+    with _lock:
+        # Los hilos no sobreviven a un fork: cada worker de gunicorn crea su pool
+        if _executor is None or _executor_pid != pid:
+            _executor = ThreadPoolExecutor(
+                max_workers=CONSULTAS_PARALELAS_WORKERS,
+                thread_name_prefix='consultas',
+                initializer=_marcar_hilo,
+            )
+            _executor_pid = pid
+    return _executor
+
+
+def _marcar_hilo():
+    _local.en_executor = True
+
+
+def en_paralelo(**consultas):
+    """Ejecuta funciones sin argumentos a la vez y devuelve {nombre: resultado}.
+
+        r = en_paralelo(pagina=lambda: listar_reportes(...), catalogos=obtener_catalogos)
+
+    Espera a todas antes de volver; si alguna falló se relanza la primera
+    excepción en el orden de los argumentos.
+    """
+    if len(consultas) <= 1 or getattr(_local, 'en_executor', False):
+        return {nombre: funcion() for nombre, funcion in consultas.items()}
+
+    executor = _obtener_executor()
+    futuros = {nombre: executor.submit(funcion) for nombre, funcion in consultas.items()}
+    wait(futuros.values())
+    return {nombre: futuro.result() for nombre, futuro in futuros.items()}
@@ -0,0 +1,144 @@
+from datetime import timedelta
+
+import psycopg2.extras
+
+from conexion import modo_federado, obtener_conexion_federada, obtener_conexion_reportes_generales
+from paginacion import (
+    SIGUIENTE,
+    armar_pagina,
+    condicion_keyset,
+    decodificar_cursor,
+    leer_entero,
+    leer_fecha,
+    orden_keyset,
+)
+
+# -----------------------------------------------------
+# CONSULTAS DE REPORTES (listados paginados y filtros)
+# -----------------------------------------------------
+COLUMNAS_KEYSET = ("r.fecha_reporte", "r.id")
+
+# Con DB_MODO=esquemas o fdw los nombres se resuelven en la misma consulta en
+# lugar de la caché de catálogos (ver conexion.py)
+COLUMNAS_NOMBRES = """,
+    c.nombre AS categoria_nombre, f.descripcion AS falla_nombre,
+    s.nombre AS sede_nombre, s.latitud, s.longitud"""
+JOIN_NOMBRES = """
+    LEFT JOIN categorias_fallas.categorias c ON c.id = r.categoria
+    LEFT JOIN categorias_fallas.fallas f ON f.id = r.tipo_falla
+    LEFT JOIN sedes_uneg.sedes s ON s.id = r.sede"""
+
+
+def consulta_con_nombres():
+    """(columnas extra, JOINs, obtener_conexion) según el modo de despliegue.
+
+    Las consultas deben usar el alias `r` para reportes.
+    """
+    if modo_federado():
+        return COLUMNAS_NOMBRES, JOIN_NOMBRES, obtener_conexion_federada
+    return "", "", obtener_conexion_reportes_generales
+
+
+def filtros_reportes(args):
+    """Lee los filtros opcionales de la query string."""
+    return {
+        "sede": leer_entero(args.get('sede')),
+        "categoria": leer_entero(args.get('categoria')),
+        "estado": (args.get('estado') or '').strip() or None,
+        "desde": leer_fecha(args.get('desde')),
+        "hasta": leer_fecha(args.get('hasta')),
+    }
+
+
+def condiciones_filtros(filtros):
+    condiciones = []
+    parametros = []
+    if filtros.get("cedula"):
+        condiciones.append("r.cedula = %s")
+        parametros.append(filtros["cedula"])
+    if filtros.get("sede") is not None:
+        condiciones.append("r.sede = %s")
+        parametros.append(filtros["sede"])
+    if filtros.get("categoria") is not None:
+        condiciones.append("r.categoria = %s")
+        parametros.append(filtros["categoria"])
+    if filtros.get("estado"):
+        condiciones.append("r.estado = %s")
+        parametros.append(filtros["estado"])
+    if filtros.get("desde"):
+        condiciones.append("r.fecha_reporte >= %s")
+        parametros.append(filtros["desde"])
+    if filtros.get("hasta"):
+        # `hasta` es inclusivo: todo el día indicado
+        condiciones.append("r.fecha_reporte < %s")
+        parametros.append(filtros["hasta"] + timedelta(days=1))
+    return condiciones, parametros
+
+
+def listar_reportes(filtros, cursor=None, direccion=SIGUIENTE, limite=50):
+    """Una página de reportes ordenada por (fecha_reporte, id) descendente."""
+    condiciones, parametros = condiciones_filtros(filtros)
+
+    valores_cursor = decodificar_cursor(cursor)
+    if valores_cursor and len(valores_cursor) == len(COLUMNAS_KEYSET):
+        condicion, params_cursor = condicion_keyset(COLUMNAS_KEYSET, valores_cursor, direccion)
+        condiciones.append(condicion)
+        parametros.extend(params_cursor)
+    else:
+        valores_cursor = None
+
+    columnas_nombres, join_nombres, obtener_conexion = consulta_con_nombres()
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    sql = f"""
+        SELECT r.id, r.categoria, r.tipo_falla, r.sede, r.foto_path, r.descripcion,
+               r.fecha_reporte, r.estado, r.lat_foto, r.lon_foto{columnas_nombres}
+        FROM reportes r{join_nombres}
+        {where}
+        ORDER BY {orden_keyset(COLUMNAS_KEYSET, direccion)}
+        LIMIT %s
+    """
+
+    with obtener_conexion() as conexion:
+        cursor_db = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor_db.execute(sql, parametros + [limite + 1])
+        filas = cursor_db.fetchall()
+        cursor_db.close()
+
+    return armar_pagina(
+        filas, limite, direccion, valores_cursor is not None,
+        clave=lambda r: (r['fecha_reporte'], r['id']),
+    )
+
+
+def resolver_nombres(rep, catalogos):
+    """Reemplaza los ids de categoría, falla y sede por sus nombres.
+
+    Si la consulta ya trajo los nombres por JOIN (modo federado) se usan esos.
+    """
+    for coordenada in ('lat_foto', 'lon_foto'):
+        if rep.get(coordenada) is not None:
+            rep[coordenada] = float(rep[coordenada])
+
+    if 'sede_nombre' in rep:
+        rep['categoria'] = rep.pop('categoria_nombre') or "(N/D)"
+        rep['tipo_falla'] = rep.pop('falla_nombre') or "(N/D)"
+        rep['sede'] = rep.pop('sede_nombre') or "(N/D)"
+        for coordenada in ('latitud', 'longitud'):
+            rep[coordenada] = float(rep[coordenada]) if rep[coordenada] is not None else None
+        return rep
+
+    sede_id = rep.get('sede')
+    rep['categoria'] = catalogos.categorias.get(rep.get('categoria'), "(N/D)")
+    rep['tipo_falla'] = catalogos.fallas.get(rep.get('tipo_falla'), "(N/D)")
+    rep['sede'] = catalogos.sedes.get(sede_id, "(N/D)")
+    rep['latitud'], rep['longitud'] = catalogos.sedes_coordenadas.get(sede_id, (None, None))
+    return rep
+
+
+def reportes_por_cedula(cedula, cursor=None, direccion=SIGUIENTE, limite=50):
+    """Una página de los reportes de una cédula, del más reciente al más antiguo.
+
+    Con `r.cedula = %s` fijo, el keyset (fecha_reporte, id) recorre el índice
+    compuesto de la migración 007 y el costo depende solo de `limite`.
+    """
+    return listar_reportes({"cedula": cedula}, cursor=cursor, direccion=direccion, limite=limite)
@@ -1,10 +1,26 @@
-from flask import Blueprint, render_template, jsonify, current_app
-from conexion import (
-    obtener_conexion,
-    obtener_conexion_categorias,
-    obtener_conexion_reportes_generales
+from flask import Blueprint, Response, render_template, jsonify, current_app, request, stream_with_context
+from cache_http import respuesta_cacheada
+from catalogos import obtener_catalogos
+from consultas_reportes import filtros_reportes
+from eventos_dashboard import (
+    EVENTOS_HABILITADOS,
+    EVENTOS_REFRESCO,
+    estadisticas_eventos,
+    eventos_disponibles,
+    flujo_eventos,
+)
+from pivote import como_datos_por_sede, matriz_sede_categoria
+from resumen import (
+    INTERVALO_POR_DEFECTO,
+    INTERVALOS,
+    TENDENCIAS_PERIODOS_MAX,
+    contar_periodos,
+    rango_tendencias,
+    tendencias,
+    total_categoria,
+    totales_por_categoria,
+    totales_por_sede_categoria,
 )
-import psycopg2.extras
 
 
 dashboard_bp = Blueprint('dashboard', __name__)
@@ -12,28 +28,14 @@ dashboard_bp = Blueprint('dashboard', __name__)
 @dashboard_bp.route("/dashboard")
 def dashboard():
     try:
-        # 1) Contar totales por categoría en reportes_generales
-        conexion_r = obtener_conexion_reportes_generales()
-        cur_r = conexion_r.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur_r.execute("""
-            SELECT categoria AS categoria_id, COUNT(*) AS total
-            FROM reportes
-            GROUP BY categoria
-        """)
-        totals_by_cat = cur_r.fetchall()
-        cur_r.close()
-        conexion_r.close()
-
-        # 2) Obtener nombres de categorías desde categorias_fallas
-        conexion_cat = obtener_conexion_categorias()
-        cur_cat = conexion_cat.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur_cat.execute("SELECT id, nombre FROM categorias")
-        categorias_data = cur_cat.fetchall()
-        cur_cat.close()
-        conexion_cat.close()
-
-        # Crear diccionario {id: nombre}
-        nombres = { str(c['id']): c['nombre'] for c in categorias_data }
+        # 1) Totales por categoría desde la tabla resumen
+        totals_by_cat = [
+            {'categoria_id': cid, 'total': total}
+            for cid, total in totales_por_categoria().items() if cid is not None
+        ]
+
+        # 2) Nombres de categorías desde la caché de catálogos {id: nombre}
+        nombres = { str(id): nombre for id, nombre in obtener_catalogos().categorias.items() }
 
         # Total general de reportes
         total_reportes = sum(row['total'] for row in totals_by_cat) if totals_by_cat else 0
@@ -66,24 +68,24 @@ def dashboard():
         return render_template(
             "paginas/dashboard.html",
             categorias=categorias,
-            total_reportes=total_reportes
+            total_reportes=total_reportes,
+            eventos_en_vivo=EVENTOS_HABILITADOS,
+            refresco=EVENTOS_REFRESCO,
         )
 
     except Exception as e:
         print("Error en /dashboard:", e)
-        return render_template("paginas/dashboard.html", categorias=[], total_reportes=0)
+        return render_template(
+            "paginas/dashboard.html", categorias=[], total_reportes=0,
+            eventos_en_vivo=EVENTOS_HABILITADOS, refresco=EVENTOS_REFRESCO,
+        )
 
 
 @dashboard_bp.route('/api/categoria/<int:categoria_id>/total')
+@respuesta_cacheada()
 def api_categoria_total(categoria_id):
     try:
-        conexion = obtener_conexion_reportes_generales()
-        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT COUNT(*) AS total FROM reportes WHERE categoria = %s", (categoria_id,))
-        row = cursor.fetchone()
-        cursor.close()
-        conexion.close()
-        total = int(row['total']) if row else 0
+        total = total_categoria(categoria_id)
         return jsonify({'categoria_id': categoria_id, 'total': total})
     except Exception as e:
         print("Error en api_categoria_total:", e)
@@ -91,14 +93,13 @@ def api_categoria_total(categoria_id):
 
 
 @dashboard_bp.route('/api/categorias/totales')
+@respuesta_cacheada()
 def api_categorias_totales():
     try:
-        conexion = obtener_conexion_reportes_generales()
-        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cursor.execute("SELECT categoria AS categoria_id, COUNT(*) AS total FROM reportes GROUP BY categoria")
-        totals = cursor.fetchall()
-        cursor.close()
-        conexion.close()
+        totals = [
+            {'categoria_id': cid, 'total': total}
+            for cid, total in totales_por_categoria().items()
+        ]
         return jsonify(totals)
     except Exception as e:
         print("Error en api_categorias_totales:", e)
@@ -106,41 +107,16 @@ def api_categorias_totales():
 
 
 @dashboard_bp.route('/api/fallas_por_categoria')
+@respuesta_cacheada()
 def api_fallas_por_categoria():
     try:
-        # 1) Obtener todos los reportes (solo los campos necesarios)
-        conn_rep = obtener_conexion_reportes_generales()
-        cur_rep = conn_rep.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur_rep.execute("""
-            SELECT categoria
-            FROM reportes
-            WHERE categoria IS NOT NULL
-        """)
-        reportes = cur_rep.fetchall()
-        cur_rep.close()
-        conn_rep.close()
-
-        # 2) Contar por id de categoria
-        conteo = {}
-        for r in reportes:
-            cat_id = r.get('categoria')
-            # normalizar a str para keys consistentes
-            key = str(cat_id) if cat_id is not None else None
-            if key:
-                conteo[key] = conteo.get(key, 0) + 1
-
-        # 3) Obtener nombres de categorias desde la base categorias_fallas
-        conn_cat = obtener_conexion_categorias()
-        cur_cat = conn_cat.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur_cat.execute("SELECT id, nombre FROM categorias")
-        categorias_data = cur_cat.fetchall()
-        cur_cat.close()
-        conn_cat.close()
-
-        # construir mapa id -> nombre
-        map_cat = { str(c['id']): c['nombre'] for c in categorias_data }
-
-        # 4) construir lista de resultados: si hay categorias sin reportes también podemos incluirlas con 0
+        # 1) Conteo por id de categoria desde la tabla resumen
+        conteo = { str(cid): total for cid, total in totales_por_categoria().items() if cid is not None }
+
+        # 2) construir mapa id -> nombre desde la caché de catálogos
+        map_cat = { str(id): nombre for id, nombre in obtener_catalogos().categorias.items() }
+
+        # 3) construir lista de resultados: si hay categorias sin reportes también podemos incluirlas con 0
         resultados = []
         # incluir todas las categorias (para que dashboard siempre muestre las 8)
         for cid, nombre in map_cat.items():
@@ -161,80 +137,13 @@ def api_fallas_por_categoria():
     
 
 @dashboard_bp.route('/api/fallas_por_sede_categoria')
+@respuesta_cacheada()
 def fallas_por_sede_categoria():
-    from conexion import obtener_conexion_reportes_generales, obtener_conexion, obtener_conexion_categorias
     try:
-        # 1. Obtener los nombres de Sedes y Categorías de sus DBs (Consultas Separadas)
-        
-        # Conexión 1: Sedes (asumiendo que obtener_conexion va a la DB de sedes)
-        conn_sede = obtener_conexion() 
-        cur_sede = conn_sede.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur_sede.execute("SELECT id, nombre FROM sedes")
-        sedes_data = cur_sede.fetchall()
-        cur_sede.close()
-        conn_sede.close()
-        map_sedes = {s['id']: s['nombre'] for s in sedes_data}
-        sedes_list = sorted(map_sedes.values())
-
-        # Conexión 2: Categorías
-        conn_cat = obtener_conexion_categorias()
-        cur_cat = conn_cat.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        cur_cat.execute("SELECT id, nombre FROM categorias")
-        categorias_data = cur_cat.fetchall()
-        cur_cat.close()
-        conn_cat.close()
-        map_categorias = {c['id']: c['nombre'] for c in categorias_data}
-        categorias_list = sorted(map_categorias.values())
-
-        # 2. Obtener los conteos (IDs) de la DB de Reportes
-        
-        conn_rep = obtener_conexion_reportes_generales()
-        cur_rep = conn_rep.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        
-        # Consulta de conteo SIMPLE (solo IDs, sin JOINS)
-        cur_rep.execute("""
-            SELECT sede, categoria, COUNT(id) AS cantidad
-            FROM reportes
-            WHERE sede IS NOT NULL AND categoria IS NOT NULL
-            GROUP BY sede, categoria;
-        """)
-        raw_conteo = cur_rep.fetchall()
-        cur_rep.close()
-        conn_rep.close()
-
-        # 3. Procesar y Mapear los datos en Python
-        
-        datos_agrupados = {} # Estructura: {nombre_categoria: {nombre_sede: cantidad}}
-
-        for fila in raw_conteo:
-            # Usamos los mapas creados para obtener los nombres
-            sede_nombre = map_sedes.get(fila["sede"], f"Sede ID {fila['sede']}")
-            categoria_nombre = map_categorias.get(fila["categoria"], f"Cat ID {fila['categoria']}")
-            cantidad = fila["cantidad"]
-
-            if categoria_nombre not in datos_agrupados:
-                datos_agrupados[categoria_nombre] = {}
-            
-            datos_agrupados[categoria_nombre][sede_nombre] = cantidad
-
-        # 4. Construir la Respuesta Final
-        
-        respuesta = {
-            "sedes": sedes_list, # Lista de nombres de sedes
-            "categorias": []
-        }
-
-        # Iterar sobre las categorías (asegurando 0 si no hay reportes)
-        for categoria in categorias_list:
-            datos_por_sede = {}
-            for sede in sedes_list:
-                cantidad = datos_agrupados.get(categoria, {}).get(sede, 0)
-                datos_por_sede[sede] = cantidad
-            
-            respuesta["categorias"].append({
-                "nombre": categoria,
-                "datosPorSede": datos_por_sede
-            })
+        # Conteos por sede y categoría desde la tabla resumen, con los
+        # nombres de la caché de catálogos (0 si no hay reportes)
+        matriz = matriz_sede_categoria(obtener_catalogos(), totales_por_sede_categoria())
+        respuesta = como_datos_por_sede(matriz)
 
         return jsonify(respuesta)
 
@@ -244,3 +153,51 @@ def fallas_por_sede_categoria():
         print(" Error en la consulta/proceso:", e)
         return jsonify({"error": "No se pudieron obtener los datos de la gráfica.", "detalle": str(e)}), 500
 
+
+def _rango_tendencias_actual():
+    # Sin desde/hasta el rango depende de hoy: la respuesta cambia a medianoche
+    desde, hasta = rango_tendencias(filtros_reportes(request.args))
+    return f"{desde.isoformat()}:{hasta.isoformat()}"
+
+
+@dashboard_bp.route('/api/tendencias')
+@respuesta_cacheada(clave=_rango_tendencias_actual)
+def api_tendencias():
+    # ?intervalo=dia|semana|mes&desde=&hasta=&sede=&categoria=&estado=
+    intervalo = request.args.get('intervalo', INTERVALO_POR_DEFECTO)
+    if intervalo not in INTERVALOS:
+        return jsonify({"error": f"intervalo debe ser uno de: {', '.join(INTERVALOS)}"}), 400
+    filtros = filtros_reportes(request.args)
+    desde, hasta = rango_tendencias(filtros)
+    if desde > hasta:
+        return jsonify({"error": "desde no puede ser posterior a hasta"}), 400
+    if contar_periodos(desde, hasta, intervalo) > TENDENCIAS_PERIODOS_MAX:
+        return jsonify({
+            "error": f"El rango supera {TENDENCIAS_PERIODOS_MAX} periodos; use un intervalo mayor o acorte las fechas"
+        }), 400
+    try:
+        return jsonify(tendencias(filtros, intervalo))
+    except Exception as e:
+        print("Error en api_tendencias:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@dashboard_bp.route('/api/dashboard/eventos')
+def api_dashboard_eventos():
+    # Server-Sent Events: deltas de reportes y correos (eventos_dashboard.py)
+    if not eventos_disponibles():
+        # El navegador no reintenta tras un 503; el dashboard pasa a recargar por intervalo
+        return Response(
+            "Eventos en vivo no disponibles", status=503, mimetype='text/plain',
+            headers={'Retry-After': str(EVENTOS_REFRESCO)},
+        )
+    return Response(
+        stream_with_context(flujo_eventos()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@dashboard_bp.route('/api/dashboard/eventos/estadisticas')
+def api_dashboard_eventos_estadisticas():
+    return jsonify(estadisticas_eventos())
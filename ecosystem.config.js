@@ -2,7 +2,7 @@ module.exports = {
   apps: [{
     name: 'dashboard-unegia',
     script: 'gunicorn',
-    args: '-w 4 -b 127.0.0.1:5000 app:app',
+    args: '-c gunicorn.conf.py app:app',
     interpreter: 'venv/bin/python',
     cwd: '/path/to/your/dashboard_unegia',
     instances: 1,
@@ -16,5 +16,29 @@ module.exports = {
     out_file: './logs/pm2-out.log',
     log_file: './logs/pm2-combined.log',
     time: true
+  }, {
+    name: 'dashboard-unegia-correos',
+    script: 'worker_correos.py',
+    interpreter: 'venv/bin/python',
+    cwd: '/path/to/your/dashboard_unegia',
+    instances: 1,
+    autorestart: true,
+    watch: false,
+    max_memory_restart: '300M',
+    error_file: './logs/pm2-correos-error.log',
+    out_file: './logs/pm2-correos-out.log',
+    time: true
+  }, {
+    name: 'dashboard-unegia-imagenes',
+    script: 'worker_imagenes.py',
+    interpreter: 'venv/bin/python',
+    cwd: '/path/to/your/dashboard_unegia',
+    instances: 1,
+    autorestart: true,
+    watch: false,
+    max_memory_restart: '500M',
+    error_file: './logs/pm2-imagenes-error.log',
+    out_file: './logs/pm2-imagenes-out.log',
+    time: true
   }]
 };
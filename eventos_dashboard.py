@@ -0,0 +1,158 @@
+import json
+import os
+import queue
+import select
+import threading
+import time
+
+import psycopg2.extensions
+
+from catalogos import obtener_catalogos
+from conexion import bases_distintas, conexion_dedicada
+
+# -----------------------------------------------------
+# EVENTOS EN VIVO DEL DASHBOARD (Server-Sent Events)
+# -----------------------------------------------------
+# Los triggers de la migración 008 emiten NOTIFY dashboard_eventos con los
+# cambios de reportes (delta por sede y categoría) y las confirmaciones y
+# soluciones de correos_enviados. Cada proceso tiene un solo hilo con LISTEN
+# que reparte los eventos a las colas de los clientes conectados, así la base
+# ve un listener por worker y no un sondeo por cada pestaña abierta.
+CANAL_EVENTOS = 'dashboard_eventos'
+# Eventos pendientes por cliente; si se llena, el cliente recibe "recargar"
+EVENTOS_COLA_MAX = int(os.getenv('EVENTOS_COLA_MAX', 100))
+# Segundos entre comentarios keep-alive para que proxies no corten la conexión
+EVENTOS_KEEPALIVE = float(os.getenv('EVENTOS_KEEPALIVE', 20))
+# Duración máxima de una conexión SSE; el navegador se reconecta solo
+EVENTOS_DURACION_MAX = float(os.getenv('EVENTOS_DURACION_MAX', 300))
+
+# Cada cliente SSE ocupa un hilo (gthread) o un worker completo (sync)
+# mientras dura la conexión. Con sync no se aceptan clientes y con gthread
+# se deja al menos la mitad de los hilos para el resto de las peticiones; el
+# dashboard vuelve a pedir las APIs cacheadas cada cierto tiempo. Sin
+# gunicorn (servidor de desarrollo con hilos) se comporta como gthread.
+CLASE_WORKER = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+EVENTOS_HABILITADOS = CLASE_WORKER != 'sync'
+EVENTOS_CLIENTES_MAX = int(os.getenv(
+    'EVENTOS_CLIENTES_MAX',
+    max(int(os.getenv('GUNICORN_THREADS', 8)) // 2, 1) if CLASE_WORKER == 'gthread' else 500,
+))
+# Segundos entre recargas del dashboard cuando no hay SSE
+EVENTOS_REFRESCO = int(os.getenv('EVENTOS_REFRESCO', 30))
+
+_clientes = set()
+_lock = threading.Lock()
+_listener_pid = None
+_estadisticas = {"eventos": 0, "descartados": 0}
+
+
+def _nombres(evento, catalogos):
+    """Agrega los nombres de sede y categoría a los cambios de reportes."""
+    for cambio in evento.get('cambios') or []:
+        cambio['sede_nombre'] = catalogos.sedes.get(cambio['sede'])
+        cambio['categoria_nombre'] = catalogos.categorias.get(cambio['categoria'])
+    return evento
+
+
+def publicar(evento):
+    """Entrega `evento` a todos los clientes conectados de este proceso."""
+    _estadisticas["eventos"] += 1
+    with _lock:
+        clientes = list(_clientes)
+    for cola in clientes:
+        try:
+            cola.put_nowait(evento)
+        except queue.Full:
+            # Cliente lento: se vacía su cola y se le pide recargar todo
+            _estadisticas["descartados"] += 1
+            with cola.mutex:
+                cola.queue.clear()
+            cola.put_nowait({"tipo": "recargar"})
+
+
+def _escuchar_eventos():
+    while True:
+        conexiones = []
+        try:
+            for nombre_db in bases_distintas(["reportes_generales", "departamentos_db"]):
+                conexion = conexion_dedicada(nombre_db)
+                conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+                cursor = conexion.cursor()
+                cursor.execute(f"LISTEN {CANAL_EVENTOS}")
+                cursor.close()
+                conexiones.append(conexion)
+
+            while True:
+                listas, _, _ = select.select(conexiones, [], [], 60)
+                for conexion in listas:
+                    conexion.poll()
+                    while conexion.notifies:
+                        aviso = conexion.notifies.pop(0)
+                        try:
+                            evento = json.loads(aviso.payload)
+                        except ValueError:
+                            continue
+                        publicar(_nombres(evento, obtener_catalogos()))
+        except Exception as e:
+            print("Error en el listener de eventos del dashboard:", e)
+            # Mientras no hubo LISTEN se pudieron perder cambios
+            publicar({"tipo": "recargar"})
+            time.sleep(5)
+        finally:
+            for conexion in conexiones:
+                if not conexion.closed:
+                    conexion.close()
+
+
+def _iniciar_listener():
+    global _listener_pid
+    pid = os.getpid()
+    if _listener_pid == pid:
+        return
+    with _lock:
+        if _listener_pid == pid:
+            return
+        _listener_pid = pid
+    hilo = threading.Thread(target=_escuchar_eventos, name="eventos-dashboard", daemon=True)
+    hilo.start()
+
+
+def _formato_sse(evento):
+    return f"event: {evento['tipo']}\ndata: {json.dumps(evento, separators=(',', ':'))}\n\n"
+
+
+def eventos_disponibles():
+    """True si este worker puede atender otro cliente SSE."""
+    return EVENTOS_HABILITADOS and len(_clientes) < EVENTOS_CLIENTES_MAX
+
+
+def flujo_eventos():
+    """Generador del cuerpo text/event-stream para un cliente."""
+    _iniciar_listener()
+    cola = queue.Queue(maxsize=EVENTOS_COLA_MAX)
+    with _lock:
+        _clientes.add(cola)
+    try:
+        yield "retry: 5000\n\n"
+        fin = time.monotonic() + EVENTOS_DURACION_MAX
+        while time.monotonic() < fin:
+            try:
+                evento = cola.get(timeout=EVENTOS_KEEPALIVE)
+            except queue.Empty:
+                yield ": ping\n\n"
+                continue
+            yield _formato_sse(evento)
+    finally:
+        with _lock:
+            _clientes.discard(cola)
+
+
+def estadisticas_eventos():
+    return {
+        **_estadisticas,
+        "habilitados": EVENTOS_HABILITADOS,
+        "clientes": len(_clientes),
+        "clientes_max": EVENTOS_CLIENTES_MAX,
+        "pid": os.getpid(),
+        "listener": _listener_pid == os.getpid(),
+    }
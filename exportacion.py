@@ -0,0 +1,110 @@
+import csv
+import io
+import json
+import zlib
+
+from catalogos import obtener_catalogos
+from conexion import obtener_conexion_reportes_generales
+from consultas_reportes import condiciones_filtros
+
+# -----------------------------------------------------
+# EXPORTACIÓN DE REPORTES (CSV / NDJSON)
+# -----------------------------------------------------
+# Las filas se leen con un cursor con nombre (del lado del servidor) en bloques
+# de EXPORT_BLOQUE y se escriben en trozos de ~EXPORT_TROZO bytes, así la
+# memoria no depende de cuántos reportes se exporten. Los nombres de
+# categoría, falla y sede salen de la caché de catálogos.
+EXPORT_BLOQUE = 2000
+EXPORT_TROZO = 64 * 1024
+
+FORMATOS = {
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+COLUMNAS = (
+    'id', 'cedula', 'categoria', 'tipo_falla', 'fallas_otros', 'sede',
+    'descripcion', 'estado', 'fecha_reporte', 'lat_foto', 'lon_foto',
+)
+
+
+def _filas(filtros):
+    """Genera las filas (tuplas en el orden de COLUMNAS) con los nombres resueltos."""
+    condiciones, parametros = condiciones_filtros(filtros)
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    catalogos = obtener_catalogos()
+    categorias, fallas, sedes = catalogos.categorias, catalogos.fallas, catalogos.sedes
+
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor(name='exportar_reportes')
+        cursor.itersize = EXPORT_BLOQUE
+        cursor.execute(f"""
+            SELECT {', '.join(f'r.{c}' for c in COLUMNAS)}
+            FROM reportes r
+            {where}
+            ORDER BY r.id
+        """, parametros)
+        try:
+            for (id_, cedula, categoria, tipo_falla, fallas_otros, sede,
+                 descripcion, estado, fecha_reporte, lat_foto, lon_foto) in cursor:
+                yield (
+                    id_, cedula, categorias.get(categoria, categoria),
+                    fallas.get(tipo_falla, tipo_falla), fallas_otros,
+                    sedes.get(sede, sede), descripcion, estado,
+                    fecha_reporte.isoformat() if fecha_reporte else None,
+                    float(lat_foto) if lat_foto is not None else None,
+                    float(lon_foto) if lon_foto is not None else None,
+                )
+        finally:
+            cursor.close()
+        # El cursor con nombre abrió una transacción de solo lectura
+        conexion.rollback()
+
+
+def _csv(filas):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(COLUMNAS)
+    # La cabecera sale antes de consultar: la respuesta empieza de inmediato
+    yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    for fila in filas:
+        escritor.writerow(fila)
+        if buffer.tell() >= EXPORT_TROZO:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _ndjson(filas):
+    trozo = []
+    tamano = 0
+    for fila in filas:
+        linea = json.dumps(dict(zip(COLUMNAS, fila)), ensure_ascii=False) + '\n'
+        trozo.append(linea)
+        tamano += len(linea)
+        if tamano >= EXPORT_TROZO:
+            yield ''.join(trozo)
+            trozo, tamano = [], 0
+    if trozo:
+        yield ''.join(trozo)
+
+
+def _gzip(trozos):
+    # wbits=31: formato gzip (cabecera y CRC) en lugar de zlib
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for trozo in trozos:
+        datos = compresor.compress(trozo)
+        if datos:
+            yield datos
+    yield compresor.flush()
+
+
+def exportar_reportes(filtros, formato='csv', comprimir=False):
+    """Generador de bytes con la exportación en el formato pedido."""
+    escribir = _ndjson if formato == 'ndjson' else _csv
+    trozos = (texto.encode('utf-8') for texto in escribir(_filas(filtros)))
+    return _gzip(trozos) if comprimir else trozos
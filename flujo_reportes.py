@@ -0,0 +1,169 @@
+from conexion import obtener_conexion_departamentos_db, obtener_conexion_reportes_generales
+
+# -----------------------------------------------------
+# FLUJO DE ESTADOS DE LOS REPORTES
+# -----------------------------------------------------
+# Cada cambio de estado es un solo viaje a la base, sea de uno o de cientos
+# de reportes: un UPDATE ... RETURNING y el INSERT en historial_reportes van
+# en la misma sentencia (CTEs que modifican datos) y en la misma transacción.
+# reportes_resumen y reportes_resolucion se actualizan con los triggers de la
+# migración 011, y el dashboard en vivo con los de la migración 008.
+PENDIENTE = 'pendiente'
+EN_PROCESO = 'en_proceso'
+RESUELTO = 'resuelto'
+CANCELADO = 'cancelado'
+
+# estado actual -> estados a los que puede pasar
+TRANSICIONES = {
+    PENDIENTE: {EN_PROCESO, RESUELTO, CANCELADO},
+    EN_PROCESO: {PENDIENTE, RESUELTO, CANCELADO},
+    RESUELTO: {EN_PROCESO},
+    CANCELADO: {PENDIENTE},
+}
+ESTADOS = tuple(TRANSICIONES)
+# Estados en los que el reporte sigue necesitando a alguien asignado
+ESTADOS_ABIERTOS = (PENDIENTE, EN_PROCESO)
+TRANSICION_MAXIMA = 1000
+
+# Estados de asignaciones_reportes (departamentos_db, ver asignaciones.py)
+ASIGNACION_ABIERTA = 'asignado'
+ASIGNACION_COMPLETADA = 'completado'
+
+
+class TransicionInvalida(ValueError):
+    pass
+
+
+def estados_origen(destino):
+    """Estados desde los que se puede pasar a `destino`."""
+    return sorted(origen for origen, destinos in TRANSICIONES.items() if destino in destinos)
+
+
+def leer_transicion(datos):
+    """Valida el cuerpo JSON de /api/reportes/estado y devuelve (ids, destino, opciones)."""
+    if not isinstance(datos, dict):
+        raise TransicionInvalida("Se espera un objeto JSON")
+
+    destino = datos.get('estado')
+    if destino not in TRANSICIONES:
+        raise TransicionInvalida(f"estado debe ser uno de: {', '.join(ESTADOS)}")
+
+    ids = datos.get('ids')
+    if not isinstance(ids, list) or not ids:
+        raise TransicionInvalida("ids debe ser una lista no vacía")
+    try:
+        ids = sorted({int(i) for i in ids})
+    except (TypeError, ValueError):
+        raise TransicionInvalida("ids debe contener solo números")
+    if len(ids) > TRANSICION_MAXIMA:
+        raise TransicionInvalida(f"Máximo {TRANSICION_MAXIMA} reportes por transición")
+
+    opciones = {}
+    for campo in ('comentario', 'usuario', 'asignado_a'):
+        valor = datos.get(campo)
+        if valor is not None:
+            valor = str(valor).strip() or None
+        opciones[campo] = valor
+    return ids, destino, opciones
+
+
+def transicionar(ids, destino, comentario=None, usuario=None, asignado_a=None):
+    """Pasa los reportes `ids` a `destino` cuando la transición está permitida.
+
+    Devuelve {"actualizados": [ids], "rechazados": [{id, estado}], "no_encontrados": [ids]}.
+    Los reportes se bloquean en orden de id para que dos transiciones
+    simultáneas sobre ids que se cruzan no se bloqueen entre sí. Al resolver
+    se fija fecha_resolucion (y notas_resolucion con el comentario); al salir
+    de resuelto se borra.
+    """
+    if destino not in TRANSICIONES:
+        raise TransicionInvalida(f"Estado desconocido: {destino}")
+    ids = sorted(set(ids))
+    if not ids:
+        return {"actualizados": [], "rechazados": [], "no_encontrados": []}
+
+    resuelve = destino == RESUELTO
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            WITH objetivo AS (
+                SELECT id, COALESCE(estado, %(pendiente)s) AS estado
+                FROM reportes
+                WHERE id = ANY(%(ids)s)
+                ORDER BY id
+                FOR UPDATE
+            ), actualizados AS (
+                UPDATE reportes r
+                SET estado = %(destino)s,
+                    fecha_actualizacion = NOW(),
+                    fecha_resolucion = CASE WHEN %(resuelve)s THEN NOW() END,
+                    notas_resolucion = CASE WHEN %(resuelve)s
+                                            THEN COALESCE(%(comentario)s, r.notas_resolucion)
+                                            ELSE r.notas_resolucion END,
+                    asignado_a = COALESCE(%(asignado_a)s, r.asignado_a)
+                FROM objetivo o
+                WHERE r.id = o.id AND o.estado = ANY(%(origenes)s)
+                RETURNING r.id, o.estado AS estado_anterior
+            ), historial AS (
+                INSERT INTO historial_reportes (reporte_id, estado_anterior, estado_nuevo, usuario, comentario)
+                SELECT id, estado_anterior, %(destino)s, %(usuario)s, %(comentario)s
+                FROM actualizados
+            )
+            SELECT o.id, o.estado, a.id IS NOT NULL AS actualizado
+            FROM objetivo o
+            LEFT JOIN actualizados a ON a.id = o.id
+            ORDER BY o.id
+        """, {
+            "ids": ids, "destino": destino, "origenes": estados_origen(destino),
+            "resuelve": resuelve, "pendiente": PENDIENTE,
+            "comentario": comentario, "usuario": usuario, "asignado_a": asignado_a,
+        })
+        filas = cursor.fetchall()
+        conexion.commit()
+        cursor.close()
+
+    actualizados = [id_ for id_, _, actualizado in filas if actualizado]
+    encontrados = {id_ for id_, _, _ in filas}
+    resultado = {
+        "actualizados": actualizados,
+        "rechazados": [{"id": id_, "estado": estado} for id_, estado, actualizado in filas if not actualizado],
+        "no_encontrados": [id_ for id_ in ids if id_ not in encontrados],
+    }
+
+    # La solución solo cambia al resolver o al reabrir un reporte resuelto, y
+    # las asignaciones se cierran cuando el reporte deja de estar abierto
+    solucion = actualizados if resuelve else [
+        id_ for id_, estado, actualizado in filas if actualizado and estado == RESUELTO
+    ]
+    cerrados = [] if destino in ESTADOS_ABIERTOS else actualizados
+    if solucion or cerrados:
+        try:
+            sincronizar_departamentos(solucion, resuelve, cerrados)
+        except Exception as e:
+            # El estado del reporte ya quedó guardado aunque falle la otra base
+            print(f"Error al sincronizar correos y asignaciones de {len(actualizados)} reportes: {e}")
+    return resultado
+
+
+def sincronizar_departamentos(solucion_ids, solucionado, cerrados_ids):
+    """Refleja los cambios en departamentos_db en una sola transacción.
+
+    correos_enviados.estatus_solucion de `solucion_ids` pasa a `solucionado`
+    y se completan las asignaciones abiertas de `cerrados_ids`.
+    """
+    with obtener_conexion_departamentos_db() as conexion:
+        cursor = conexion.cursor()
+        if solucion_ids:
+            cursor.execute("""
+                UPDATE correos_enviados
+                SET estatus_solucion = %s
+                WHERE reporte_id = ANY(%s) AND estatus_solucion IS DISTINCT FROM %s
+            """, (solucionado, list(solucion_ids), solucionado))
+        if cerrados_ids:
+            cursor.execute("""
+                UPDATE asignaciones_reportes
+                SET estado = %s, fecha_completado = NOW()
+                WHERE reporte_id = ANY(%s) AND estado = %s
+            """, (ASIGNACION_COMPLETADA, list(cerrados_ids), ASIGNACION_ABIERTA))
+        conexion.commit()
+        cursor.close()
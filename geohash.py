@@ -0,0 +1,86 @@
+# -----------------------------------------------------
+# GEOHASH (celdas para agrupar reportes en el mapa)
+# -----------------------------------------------------
+# Misma codificación que la función geohash_codificar de la migración 010.
+# Con COLLATE "C" los geohash que empiezan con un prefijo forman un rango
+# contiguo del índice: geohash >= prefijo AND geohash < prefijo || '~'.
+ALFABETO = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION_MAXIMA = 12
+# Zoom del mapa (0-20) -> largo del geohash de los clusters
+PRECISION_POR_ZOOM = (1, 1, 1, 2, 2, 3, 3, 3, 4, 4, 5, 5, 5, 6, 6, 7, 7, 7, 8, 8, 8)
+
+
+def codificar(lat, lon, precision=PRECISION_MAXIMA):
+    lat_min, lat_max, lon_min, lon_max = -90.0, 90.0, -180.0, 180.0
+    resultado = []
+    bits = valor = 0
+    par = True
+    while len(resultado) < precision:
+        if par:
+            medio = (lon_min + lon_max) / 2
+            valor = valor * 2 + (lon >= medio)
+            lon_min, lon_max = (medio, lon_max) if lon >= medio else (lon_min, medio)
+        else:
+            medio = (lat_min + lat_max) / 2
+            valor = valor * 2 + (lat >= medio)
+            lat_min, lat_max = (medio, lat_max) if lat >= medio else (lat_min, medio)
+        par = not par
+        bits += 1
+        if bits == 5:
+            resultado.append(ALFABETO[valor])
+            bits = valor = 0
+    return ''.join(resultado)
+
+
+def caja(geohash):
+    """(sur, oeste, norte, este) de la celda."""
+    lat_min, lat_max, lon_min, lon_max = -90.0, 90.0, -180.0, 180.0
+    par = True
+    for caracter in geohash:
+        valor = ALFABETO.index(caracter)
+        for desplazamiento in range(4, -1, -1):
+            bit = (valor >> desplazamiento) & 1
+            if par:
+                medio = (lon_min + lon_max) / 2
+                lon_min, lon_max = (medio, lon_max) if bit else (lon_min, medio)
+            else:
+                medio = (lat_min + lat_max) / 2
+                lat_min, lat_max = (medio, lat_max) if bit else (lat_min, medio)
+            par = not par
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def precision_para_zoom(zoom):
+    return PRECISION_POR_ZOOM[max(0, min(zoom, len(PRECISION_POR_ZOOM) - 1))]
+
+
+def celdas_en_caja(sur, oeste, norte, este, precision, maximo=64):
+    """Celdas de `precision` que cubren la caja, o None si serían más de `maximo`."""
+    sur_celda, oeste_celda, norte_celda, este_celda = caja(codificar(sur, oeste, precision))
+    alto = norte_celda - sur_celda
+    ancho = este_celda - oeste_celda
+    filas = int((norte - sur_celda) // alto) + 1
+    columnas = int((este - oeste_celda) // ancho) + 1
+    if filas * columnas > maximo:
+        return None
+
+    celdas = set()
+    for fila in range(filas):
+        lat = min(sur_celda + (fila + 0.5) * alto, 90.0)
+        for columna in range(columnas):
+            lon = min(oeste_celda + (columna + 0.5) * ancho, 180.0)
+            celdas.add(codificar(lat, lon, precision))
+    return sorted(celdas)
+
+
+def cobertura(sur, oeste, norte, este, precision, maximo=64):
+    """Prefijos (lo más largos posible, hasta `precision`) que cubren la caja.
+
+    Cada prefijo es un rango del índice por geohash; con pocos prefijos la
+    consulta lee solo la zona visible del mapa.
+    """
+    for largo in range(precision, 0, -1):
+        celdas = celdas_en_caja(sur, oeste, norte, este, largo, maximo)
+        if celdas is not None:
+            return celdas
+    return []
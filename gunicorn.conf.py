@@ -0,0 +1,54 @@
+# Configuración de gunicorn: gunicorn -c gunicorn.conf.py app:app
+import os
+import shutil
+import tempfile
+
+bind = os.getenv('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.getenv('GUNICORN_WORKERS', 4))
+
+# -----------------------------------------------------
+# TIPO DE WORKER
+# -----------------------------------------------------
+#   sync    - una petición a la vez por worker; /api/dashboard/eventos se
+#             desactiva porque cada cliente SSE ocuparía un worker completo
+#   gthread - GUNICORN_THREADS hilos por worker (por defecto)
+#   gevent  - hasta GUNICORN_WORKER_CONNECTIONS peticiones por worker; gunicorn
+#             aplica el monkey patch (sockets, smtplib, select, hilos) y
+#             post_worker_init hace que psycopg2 ceda mientras espera a
+#             PostgreSQL (conexion.usar_espera_cooperativa)
+# Con gthread o gevent conviene subir DB_POOL_MAX: las peticiones que no
+# encuentran conexión libre esperan hasta DB_POOL_TIMEOUT.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+# La app lo lee para decidir si acepta conexiones SSE (eventos_dashboard.py)
+os.environ['GUNICORN_WORKER_CLASS'] = worker_class
+# gunicorn cambia sync por gthread si threads > 1, así que solo se fija aquí
+threads = int(os.getenv('GUNICORN_THREADS', 8)) if worker_class == 'gthread' else 1
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# -----------------------------------------------------
+# MÉTRICAS COMPARTIDAS ENTRE WORKERS (metricas.py)
+# -----------------------------------------------------
+# prometheus_client guarda los valores de cada worker en esta carpeta y
+# /metrics los suma. Se define aquí para que los workers la hereden.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'dashboard_unegia_metricas'),
+)
+
+
+def on_starting(server):
+    # Los archivos de una ejecución anterior duplicarían los contadores
+    carpeta = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(carpeta, ignore_errors=True)
+    os.makedirs(carpeta, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    if worker_class == 'gevent':
+        from conexion import usar_espera_cooperativa
+        usar_espera_cooperativa()
@@ -0,0 +1,442 @@
+import hashlib
+import io
+import os
+import shutil
+import uuid
+
+import psycopg2.extras
+from PIL import Image, ImageOps
+from PIL.ExifTags import GPSTAGS
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from conexion import obtener_conexion_reportes_generales
+
+# -----------------------------------------------------
+# PROCESAMIENTO DE FOTOS DE REPORTES
+# -----------------------------------------------------
+# La subida se copia a disco por bloques (uploads/originales) y se guarda en
+# el reporte tal cual, y en la misma transacción se agrega un trabajo a
+# cola_imagenes (migración 015). worker_imagenes.py la procesa después:
+#   - corrige la orientación y la reduce a IMAGEN_LADO_MAX,
+#   - la recomprime en WebP (o JPEG) sin metadatos,
+#   - genera la miniatura para listados,
+#   - copia las coordenadas GPS del EXIF a lat_foto/lon_foto,
+# y al final actualiza foto_path y borra el original.
+#
+# Los archivos se nombran con el sha256 del contenido: la misma foto subida
+# dos veces comparte archivo (y solo se procesa una vez), y un archivo solo
+# se borra cuando ningún reporte lo usa.
+#
+# La cola vive en la base: un reinicio no pierde fotos pendientes y Pillow
+# no ocupa CPU en los workers web.
+IMAGEN_FORMATO = os.getenv('IMAGEN_FORMATO', 'WEBP').upper()
+IMAGEN_LADO_MAX = int(os.getenv('IMAGEN_LADO_MAX', 1600))
+IMAGEN_CALIDAD = int(os.getenv('IMAGEN_CALIDAD', 80))
+MINIATURA_LADO = int(os.getenv('MINIATURA_LADO', 320))
+CANAL_IMAGENES = 'cola_imagenes'
+IMAGENES_LOTE = int(os.getenv('IMAGENES_LOTE', 10))
+IMAGENES_MAX_INTENTOS = int(os.getenv('IMAGENES_MAX_INTENTOS', 3))
+# Espera base (segundos) entre reintentos; se duplica en cada intento
+IMAGENES_BACKOFF = float(os.getenv('IMAGENES_BACKOFF', 30))
+# Tamaño máximo de cada foto subida (bytes)
+FOTO_TAMANO_MAX = int(os.getenv('FOTO_TAMANO_MAX', 15 * 1024 * 1024))
+
+EXTENSION = 'jpg' if IMAGEN_FORMATO == 'JPEG' else 'webp'
+CARPETA_ORIGINALES = 'uploads/originales'
+CARPETA_PROCESADAS = 'uploads/procesadas'
+CARPETA_MINIATURAS = 'uploads/miniaturas'
+
+TAMANO_BLOQUE = 1024 * 1024
+GPS_IFD = 0x8825
+
+# Firmas (magic bytes) de los formatos aceptados -> extensión
+FIRMAS = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+)
+LARGO_CABECERA = 12
+
+
+def _carpeta(static_folder, relativa):
+    carpeta = os.path.join(static_folder, relativa)
+    os.makedirs(carpeta, exist_ok=True)
+    return carpeta
+
+
+def tipo_imagen(cabecera):
+    """Extensión según los primeros bytes del archivo, o None si no es una imagen aceptada."""
+    for firma, extension in FIRMAS:
+        if cabecera.startswith(firma):
+            return extension
+    if cabecera[:4] == b'RIFF' and cabecera[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+class SubidaFoto:
+    """Destino de una foto mientras se recibe.
+
+    Werkzeug escribe aquí cada bloque del multipart (ver subidas.py). El tipo
+    se valida con los primeros bytes y el tamaño en cada bloque, así una
+    subida inválida no se guarda entera. El sha256 se calcula al vuelo para
+    nombrar el archivo sin volver a leerlo.
+
+    Con `estricta` (rutas de una sola foto) el error se lanza en cuanto se
+    detecta y corta la lectura del cuerpo. Sin ella (carga por lotes) el
+    error queda en `error`, el resto de los bytes se descarta y validar()
+    lo lanza después, para rechazar solo el item que usa esta foto.
+    """
+
+    def __init__(self, carpeta, limite=FOTO_TAMANO_MAX, estricta=True):
+        os.makedirs(carpeta, exist_ok=True)
+        self.ruta = os.path.join(carpeta, f".subida-{uuid.uuid4().hex}")
+        self.limite = limite
+        self.estricta = estricta
+        self.error = None
+        self.tamano = 0
+        self.extension = None
+        self.hash = hashlib.sha256()
+        self._cabecera = b''
+        self._archivo = open(self.ruta, 'w+b')
+        self._guardada = False
+
+    def write(self, datos):
+        if self.error is not None:
+            return len(datos)
+        self.tamano += len(datos)
+        if self.tamano > self.limite:
+            self._rechazar(RequestEntityTooLarge(f"La foto supera el máximo de {self.limite // (1024 * 1024)} MB"))
+            return len(datos)
+        if self.extension is None and len(self._cabecera) < LARGO_CABECERA:
+            self._cabecera += datos[:LARGO_CABECERA - len(self._cabecera)]
+            if len(self._cabecera) >= LARGO_CABECERA:
+                self._revisar_tipo()
+                if self.error is not None:
+                    return len(datos)
+        self.hash.update(datos)
+        return self._archivo.write(datos)
+
+    def _revisar_tipo(self):
+        if self.extension is None and self.error is None:
+            self.extension = tipo_imagen(self._cabecera)
+            if self.extension is None:
+                self._rechazar(UnsupportedMediaType("El archivo no es una imagen JPEG, PNG o WebP"))
+
+    def _rechazar(self, error):
+        self.descartar()
+        if self.estricta:
+            raise error
+        # Werkzeug sigue escribiendo y al final hace seek(0): un búfer vacío
+        self.error = error
+        self._archivo = io.BytesIO()
+
+    def validar(self):
+        """Lanza el error de la subida (tipo o tamaño) si lo hubo."""
+        self._revisar_tipo()
+        if self.error is not None:
+            raise self.error
+
+    def guardar_como(self, ruta):
+        self._archivo.close()
+        os.replace(self.ruta, ruta)
+        self._guardada = True
+
+    def descartar(self):
+        self._archivo.close()
+        if not self._guardada and os.path.exists(self.ruta):
+            os.remove(self.ruta)
+
+    def close(self):
+        # Werkzeug cierra los archivos al terminar la petición: si la foto no
+        # se guardó, el temporal se elimina
+        self.descartar()
+
+    def __getattr__(self, nombre):
+        return getattr(self._archivo, nombre)
+
+
+def guardar_original(archivo, static_folder):
+    """Guarda la foto subida con su sha256 como nombre y devuelve su ruta relativa a static/.
+
+    Si la misma foto ya está procesada se devuelve esa ruta directamente; si
+    está pendiente de procesar se reutiliza el mismo original.
+    """
+    subida = archivo.stream
+    if not isinstance(subida, SubidaFoto):
+        # Archivos que no pasaron por PeticionSubidas
+        subida = SubidaFoto(_carpeta(static_folder, CARPETA_ORIGINALES))
+        shutil.copyfileobj(archivo.stream, subida, TAMANO_BLOQUE)
+    subida.validar()
+    huella = subida.hash.hexdigest()
+
+    procesada = f"{CARPETA_PROCESADAS}/{huella}.{EXTENSION}"
+    if os.path.exists(os.path.join(static_folder, procesada)):
+        subida.descartar()
+        return procesada
+
+    nombre = f"{huella}.{subida.extension}"
+    subida.guardar_como(os.path.join(_carpeta(static_folder, CARPETA_ORIGINALES), nombre))
+    return f"{CARPETA_ORIGINALES}/{nombre}"
+
+
+def miniatura(foto_path):
+    """Ruta de la miniatura de una foto procesada (o la misma foto si aún no lo está)."""
+    if foto_path and foto_path.startswith(CARPETA_PROCESADAS + '/'):
+        return CARPETA_MINIATURAS + foto_path[len(CARPETA_PROCESADAS):]
+    return foto_path
+
+
+def foto_en_uso(foto_path):
+    """True si algún reporte apunta a `foto_path` (índice de la migración 009)."""
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM reportes WHERE foto_path = %s)", (foto_path,))
+        en_uso = cursor.fetchone()[0]
+        cursor.close()
+    return en_uso
+
+
+def borrar_imagen(foto_path, static_folder):
+    """Borra la foto y, si tiene, su miniatura, salvo que otro reporte la use."""
+    if not foto_path or foto_en_uso(foto_path):
+        return
+    for relativa in {foto_path, miniatura(foto_path)}:
+        ruta = os.path.join(static_folder, relativa)
+        if os.path.exists(ruta):
+            os.remove(ruta)
+
+
+def _a_grados(valor, referencia):
+    try:
+        grados, minutos, segundos = (float(v) for v in valor)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    decimal = grados + minutos / 60 + segundos / 3600
+    return -decimal if referencia in ('S', 'W') else decimal
+
+
+def coordenadas_gps(imagen):
+    """(lat, lon) del EXIF de la imagen, o (None, None) si no tiene."""
+    try:
+        gps = {GPSTAGS.get(k, k): v for k, v in imagen.getexif().get_ifd(GPS_IFD).items()}
+    except Exception:
+        return None, None
+    if 'GPSLatitude' not in gps or 'GPSLongitude' not in gps:
+        return None, None
+    lat = _a_grados(gps['GPSLatitude'], gps.get('GPSLatitudeRef'))
+    lon = _a_grados(gps['GPSLongitude'], gps.get('GPSLongitudeRef'))
+    if lat is None or lon is None:
+        return None, None
+    return round(lat, 8), round(lon, 8)
+
+
+def _guardar_version(imagen, ruta, lado):
+    copia = imagen.copy()
+    copia.thumbnail((lado, lado), Image.LANCZOS)
+    # Sin exif= ni icc_profile=: el archivo resultante no lleva metadatos.
+    # Se escribe aparte y se renombra para que nunca se vea a medias.
+    temporal = f"{ruta}.{uuid.uuid4().hex}.tmp"
+    copia.save(temporal, IMAGEN_FORMATO, quality=IMAGEN_CALIDAD, optimize=True)
+    os.replace(temporal, ruta)
+
+
+def _ruta_procesada(foto_path):
+    """Ruta de la versión procesada de un original (mismo nombre base)."""
+    return f"{CARPETA_PROCESADAS}/{os.path.splitext(os.path.basename(foto_path))[0]}.{EXTENSION}"
+
+
+def procesar_imagen(foto_path, static_folder):
+    """Procesa una foto de uploads/originales.
+
+    Devuelve (foto_path procesada, lat, lon). Lanza la excepción de Pillow si
+    el archivo no es una imagen válida.
+    """
+    ruta_original = os.path.join(static_folder, foto_path)
+    # Mismo nombre (sha256) que el original: una foto repetida se procesa una vez
+    procesada = _ruta_procesada(foto_path)
+    ruta_procesada = os.path.join(static_folder, procesada)
+    _carpeta(static_folder, CARPETA_PROCESADAS)
+    _carpeta(static_folder, CARPETA_MINIATURAS)
+
+    with Image.open(ruta_original) as imagen:
+        lat, lon = coordenadas_gps(imagen)
+        if os.path.exists(ruta_procesada):
+            return procesada, lat, lon
+
+        # En JPEG decodifica directamente a una escala cercana al tamaño final
+        imagen.draft('RGB', (IMAGEN_LADO_MAX, IMAGEN_LADO_MAX))
+        imagen = ImageOps.exif_transpose(imagen)
+        if imagen.mode not in ('RGB', 'RGBA') or (imagen.mode == 'RGBA' and IMAGEN_FORMATO == 'JPEG'):
+            imagen = imagen.convert('RGB')
+
+        # La miniatura primero: la versión procesada es la que marca que ya existe
+        _guardar_version(imagen, os.path.join(static_folder, miniatura(procesada)), MINIATURA_LADO)
+        _guardar_version(imagen, ruta_procesada, IMAGEN_LADO_MAX)
+
+    return procesada, lat, lon
+
+
+def _copiar_coordenadas(reporte_id, foto_path):
+    """Copia lat_foto/lon_foto de otro reporte con la misma foto ya procesada."""
+    try:
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor()
+            cursor.execute("""
+                UPDATE reportes r
+                SET lat_foto = o.lat_foto, lon_foto = o.lon_foto
+                FROM (
+                    SELECT lat_foto, lon_foto FROM reportes
+                    WHERE foto_path = %s AND id <> %s AND lat_foto IS NOT NULL
+                    LIMIT 1
+                ) o
+                WHERE r.id = %s AND r.lat_foto IS NULL
+            """, (foto_path, reporte_id, reporte_id))
+            conexion.commit()
+            cursor.close()
+    except Exception as e:
+        print(f"Error al copiar las coordenadas de la foto del reporte {reporte_id}: {e}")
+
+
+def _procesar_reporte(reporte_id, foto_path, static_folder):
+    """Procesa la foto de un reporte y le asigna la versión procesada.
+
+    Lanza una excepción si no se pudo; el trabajo se reintenta y mientras
+    tanto se deja el original (la foto se sigue viendo aunque no esté optimizada).
+    """
+    try:
+        nueva_ruta, lat, lon = procesar_imagen(foto_path, static_folder)
+    except FileNotFoundError:
+        # Otro reporte con la misma foto la procesó y ya borró el original
+        nueva_ruta, lat, lon = _ruta_procesada(foto_path), None, None
+        if not os.path.exists(os.path.join(static_folder, nueva_ruta)):
+            if not foto_en_uso(foto_path):
+                # El reporte se editó o se borró: el trabajo ya no aplica
+                return
+            raise
+
+    try:
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor()
+            # Solo si el reporte sigue apuntando a este original (no se editó ni borró)
+            cursor.execute("""
+                UPDATE reportes
+                SET foto_path = %s, lat_foto = COALESCE(%s, lat_foto), lon_foto = COALESCE(%s, lon_foto)
+                WHERE id = %s AND foto_path = %s
+            """, (nueva_ruta, lat, lon, reporte_id, foto_path))
+            actualizado = cursor.rowcount
+            conexion.commit()
+            cursor.close()
+    except Exception:
+        borrar_imagen(nueva_ruta, static_folder)
+        raise
+
+    if actualizado and lat is None:
+        _copiar_coordenadas(reporte_id, nueva_ruta)
+    # borrar_imagen no toca archivos que otro reporte siga usando
+    borrar_imagen(nueva_ruta if not actualizado else foto_path, static_folder)
+
+
+# -----------------------------------------------------
+# COLA DE IMÁGENES (worker_imagenes.py)
+# -----------------------------------------------------
+
+def pendiente_de_proceso(foto_path):
+    """True si la foto necesita un trabajo en cola_imagenes."""
+    return bool(foto_path) and (
+        foto_path.startswith(CARPETA_ORIGINALES + '/') or foto_path.startswith(CARPETA_PROCESADAS + '/')
+    )
+
+
+def encolar_imagenes(cursor, fotos):
+    """Agrega a la cola las fotos (reporte_id, foto_path) usando la transacción del llamador."""
+    fotos = [(reporte_id, foto_path) for reporte_id, foto_path in fotos if pendiente_de_proceso(foto_path)]
+    if not fotos:
+        return
+    psycopg2.extras.execute_values(cursor, """
+        INSERT INTO cola_imagenes (reporte_id, foto_path) VALUES %s
+    """, fotos, page_size=len(fotos))
+    # Se entrega al confirmar la transacción y despierta al worker
+    cursor.execute(f"NOTIFY {CANAL_IMAGENES}")
+
+
+def recuperar_imagenes():
+    """Vuelve a encolar los reportes con foto en uploads/originales sin trabajo pendiente.
+
+    Cubre fotos guardadas sin su trabajo (por ejemplo antes de la migración
+    015). Las que ya fallaron IMAGENES_MAX_INTENTOS veces no se reintentan.
+    Devuelve cuántos trabajos se agregaron.
+    """
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor()
+        cursor.execute("""
+            INSERT INTO cola_imagenes (reporte_id, foto_path)
+            SELECT r.id, r.foto_path
+            FROM reportes r
+            WHERE r.foto_path LIKE %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM cola_imagenes c
+                  WHERE c.reporte_id = r.id AND c.foto_path = r.foto_path
+                    AND c.estado IN ('pendiente', 'fallida')
+              )
+        """, (CARPETA_ORIGINALES + '/%',))
+        agregados = cursor.rowcount
+        conexion.commit()
+        cursor.close()
+    return agregados
+
+
+def procesar_lote_imagenes(static_folder, limite=IMAGENES_LOTE):
+    """Procesa hasta `limite` fotos pendientes.
+
+    Las filas se bloquean con FOR UPDATE SKIP LOCKED, así que se pueden
+    ejecutar varios workers a la vez sin procesar dos veces la misma foto.
+    Si el worker muere a mitad del lote, los trabajos siguen pendientes.
+    Devuelve la cantidad de trabajos procesados.
+    """
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute("""
+            SELECT id, reporte_id, foto_path, intentos
+            FROM cola_imagenes
+            WHERE estado = 'pendiente' AND proximo_intento <= NOW()
+            ORDER BY proximo_intento
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (limite,))
+        trabajos = cursor.fetchall()
+
+        for trabajo in trabajos:
+            error = None
+            try:
+                if trabajo['foto_path'].startswith(CARPETA_ORIGINALES + '/'):
+                    _procesar_reporte(trabajo['reporte_id'], trabajo['foto_path'], static_folder)
+                else:
+                    # Foto repetida que ya estaba procesada: solo faltan las coordenadas
+                    _copiar_coordenadas(trabajo['reporte_id'], trabajo['foto_path'])
+            except Exception as e:
+                print(f"Error al procesar la imagen del reporte {trabajo['reporte_id']}: {e}")
+                error = str(e)
+
+            intentos = trabajo['intentos'] + 1
+            if error is None:
+                estado = 'procesada'
+            elif intentos >= IMAGENES_MAX_INTENTOS:
+                estado = 'fallida'
+            else:
+                estado = 'pendiente'
+            cursor.execute("""
+                UPDATE cola_imagenes
+                SET estado = %s,
+                    intentos = %s,
+                    ultimo_error = %s,
+                    proximo_intento = NOW() + make_interval(secs => %s),
+                    fecha_proceso = CASE WHEN %s = 'procesada' THEN NOW() END
+                WHERE id = %s
+            """, (
+                estado, intentos, error,
+                IMAGENES_BACKOFF * (2 ** (intentos - 1)), estado, trabajo['id'],
+            ))
+
+        conexion.commit()
+        cursor.close()
+    return len(trabajos)
@@ -0,0 +1,176 @@
+import json
+import os
+from datetime import datetime
+
+import psycopg2.extras
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+from catalogos import a_entero, obtener_catalogos
+from cola_correos import TIPO_RESUMEN, encolar_correo
+from conexion import obtener_conexion_reportes_generales
+from imagenes import borrar_imagen, encolar_imagenes, guardar_original
+
+# -----------------------------------------------------
+# CARGA DE REPORTES POR LOTES (/api/reportes/batch)
+# -----------------------------------------------------
+# Para kioscos y clientes que sincronizan reportes tomados sin conexión: todo
+# el lote se valida contra la caché de catálogos, se inserta con un solo
+# execute_values en una transacción y genera un único correo de resumen.
+LOTE_MAXIMO = int(os.getenv('LOTE_MAXIMO', 500))
+EXTENSIONES_FOTO = {'png', 'jpg', 'jpeg', 'webp'}
+
+
+class LoteInvalido(ValueError):
+    """El cuerpo de la petición no se puede interpretar como lote."""
+
+
+def _parsear(texto, ndjson):
+    try:
+        if ndjson:
+            return [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+        items = json.loads(texto)
+    except ValueError as e:
+        raise LoteInvalido(f"JSON inválido: {e}")
+    if isinstance(items, dict):
+        items = items.get('reportes')
+    if not isinstance(items, list):
+        raise LoteInvalido("Se esperaba una lista de reportes")
+    return items
+
+
+def leer_lote(request):
+    """Devuelve (items, archivos) desde JSON, NDJSON o multipart.
+
+    En multipart la lista va en el campo `reportes` (JSON o NDJSON) y cada
+    item puede indicar en `foto` el nombre del campo de archivo con su foto.
+    """
+    if request.mimetype == 'multipart/form-data':
+        texto = request.form.get('reportes', '')
+        items = _parsear(texto, not texto.lstrip().startswith(('[', '{')))
+        archivos = request.files
+    else:
+        items = _parsear(request.get_data(as_text=True), request.mimetype == 'application/x-ndjson')
+        archivos = {}
+    if len(items) > LOTE_MAXIMO:
+        raise LoteInvalido(f"El lote supera el máximo de {LOTE_MAXIMO} reportes")
+    return items, archivos
+
+
+def validar_reporte(item, catalogos):
+    """Devuelve (valores para el INSERT, None) o (None, mensaje de error)."""
+    if not isinstance(item, dict):
+        return None, "El reporte debe ser un objeto"
+
+    cedula = str(item.get('cedula') or '').strip()
+    if not cedula:
+        return None, "Falta la cédula"
+
+    categoria = a_entero(item.get('categoria'))
+    if categoria not in catalogos.categorias:
+        return None, f"Categoría inválida: {item.get('categoria')}"
+
+    falla = a_entero(item.get('falla_id', item.get('tipo_falla')))
+    if falla not in {f['id'] for f in catalogos.fallas_por_categoria.get(categoria, [])}:
+        return None, f"Falla inválida para la categoría {categoria}: {falla}"
+
+    sede = a_entero(item.get('sede'))
+    if sede not in catalogos.sedes:
+        return None, f"Sede inválida: {item.get('sede')}"
+
+    # Los clientes sin conexión envían la fecha en que se tomó el reporte
+    fecha = item.get('fecha_reporte')
+    if fecha:
+        try:
+            fecha = datetime.fromisoformat(fecha)
+        except (TypeError, ValueError):
+            return None, f"Fecha inválida: {fecha}"
+
+    return {
+        "cedula": cedula,
+        "categoria": categoria,
+        "tipo_falla": falla,
+        "fallas_otros": item.get('otra_falla'),
+        "sede": sede,
+        "descripcion": item.get('descripcion'),
+        "fecha_reporte": fecha or None,
+    }, None
+
+
+def _guardar_foto(item, archivos, static_folder, guardadas):
+    """Devuelve (ruta, error) de la foto del item.
+
+    `guardadas` recuerda el resultado por nombre de campo: varios items
+    pueden apuntar al mismo archivo y este solo se puede guardar una vez.
+    """
+    campo = item.get('foto')
+    if not campo:
+        return None, None
+    if campo not in guardadas:
+        guardadas[campo] = _guardar_archivo(campo, archivos.get(campo), static_folder)
+    return guardadas[campo]
+
+
+def _guardar_archivo(campo, archivo, static_folder):
+    if archivo is None:
+        return None, f"No se recibió el archivo '{campo}'"
+    extension = archivo.filename.rsplit('.', 1)[-1].lower() if '.' in archivo.filename else ''
+    if extension not in EXTENSIONES_FOTO:
+        return None, f"Tipo de archivo no permitido: {archivo.filename}"
+    try:
+        # Si la foto no era imagen o superaba FOTO_TAMANO_MAX, la SubidaFoto
+        # guardó el error al recibirla (subidas.py) y aquí se lanza
+        return guardar_original(archivo, static_folder), None
+    except (RequestEntityTooLarge, UnsupportedMediaType) as e:
+        return None, e.description
+
+
+def insertar_lote(items, archivos, static_folder):
+    """Valida e inserta el lote. Devuelve la lista de resultados por item."""
+    catalogos = obtener_catalogos()
+    resultados = [None] * len(items)
+    validos = []
+    guardadas = {}
+
+    try:
+        for indice, item in enumerate(items):
+            valores, error = validar_reporte(item, catalogos)
+            if error is None:
+                valores["foto_path"], error = _guardar_foto(item, archivos, static_folder, guardadas)
+            if error:
+                resultados[indice] = {"indice": indice, "error": error}
+            else:
+                validos.append((indice, valores))
+
+        if not validos:
+            return resultados
+
+        with obtener_conexion_reportes_generales() as conexion:
+            cursor = conexion.cursor()
+            filas = psycopg2.extras.execute_values(cursor, """
+                INSERT INTO reportes
+                (cedula, categoria, tipo_falla, fallas_otros, sede, foto_path, descripcion, fecha_reporte)
+                VALUES %s
+                RETURNING id
+            """, [
+                (v["cedula"], v["categoria"], v["tipo_falla"], v["fallas_otros"], v["sede"],
+                 v["foto_path"], v["descripcion"], v["fecha_reporte"])
+                for _, v in validos
+            ], template="(%s, %s, %s, %s, %s, %s, %s, COALESCE(%s, CURRENT_TIMESTAMP))",
+                page_size=len(validos), fetch=True)
+            ids = [fila[0] for fila in filas]
+
+            # Un solo correo con todo el lote en lugar de uno por reporte
+            encolar_correo(cursor, ids, tipo=TIPO_RESUMEN)
+            encolar_imagenes(cursor, [(reporte_id, v["foto_path"]) for (_, v), reporte_id in zip(validos, ids)])
+
+            conexion.commit()
+            cursor.close()
+    except Exception:
+        # Los originales guardados hasta el fallo no quedan huérfanos
+        for ruta in {ruta for ruta, _ in guardadas.values() if ruta}:
+            borrar_imagen(ruta, static_folder)
+        raise
+
+    for (indice, _), reporte_id in zip(validos, ids):
+        resultados[indice] = {"indice": indice, "id": reporte_id}
+    return resultados
@@ -0,0 +1,91 @@
+import psycopg2.extras
+
+from catalogos import obtener_catalogos
+from conexion import obtener_conexion_reportes_generales
+from consultas_reportes import condiciones_filtros
+from geohash import ALFABETO, cobertura, precision_para_zoom
+
+# -----------------------------------------------------
+# MAPA DE REPORTES (clusters por zona visible y zoom)
+# -----------------------------------------------------
+# El mapa de /dashboard_admin/reportes pide solo la caja visible y recibe un
+# conteo por celda geohash (migración 010) en lugar de todos los reportes.
+# Los reportes sin GPS en la foto se cuentan en el punto de su sede.
+MAPA_CELDAS_MAX = 64
+ZOOM_POR_DEFECTO = 12
+
+
+def leer_caja(valor):
+    """`oeste,sur,este,norte` -> (sur, oeste, norte, este), o None si es inválida."""
+    try:
+        oeste, sur, este, norte = (float(v) for v in (valor or '').split(','))
+    except ValueError:
+        return None
+    if not (-90 <= sur < norte <= 90 and -180 <= oeste < este <= 180):
+        return None
+    return sur, oeste, norte, este
+
+
+def clusters_mapa(caja, zoom, filtros):
+    sur, oeste, norte, este = caja
+    precision = precision_para_zoom(zoom)
+    condiciones, parametros = condiciones_filtros(filtros)
+
+    # Rangos del índice por geohash que cubren la caja visible
+    prefijos = cobertura(sur, oeste, norte, este, precision, MAPA_CELDAS_MAX)
+    condiciones_gps = ["r.geohash IS NOT NULL"] + condiciones + [
+        "r.lat_foto BETWEEN %s AND %s", "r.lon_foto BETWEEN %s AND %s",
+    ]
+    parametros_gps = list(parametros) + [sur, norte, oeste, este]
+    if len(prefijos) < len(ALFABETO):
+        condiciones_gps.append(
+            "(" + " OR ".join("(r.geohash >= %s AND r.geohash < %s)" for _ in prefijos) + ")"
+        )
+        for prefijo in prefijos:
+            parametros_gps.extend([prefijo, prefijo + '~'])
+
+    catalogos = obtener_catalogos()
+    sedes_visibles = [
+        sede_id for sede_id, (lat, lon) in catalogos.sedes_coordenadas.items()
+        if lat is not None and lon is not None and sur <= lat <= norte and oeste <= lon <= este
+    ]
+
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(f"""
+            SELECT left(r.geohash, %s) AS celda, COUNT(*) AS total,
+                   AVG(r.lat_foto)::float AS lat, AVG(r.lon_foto)::float AS lon
+            FROM reportes r
+            WHERE {' AND '.join(condiciones_gps)}
+            GROUP BY 1
+        """, [precision] + parametros_gps)
+        celdas = cursor.fetchall()
+
+        por_sede = []
+        if sedes_visibles:
+            cursor.execute(f"""
+                SELECT r.sede, COUNT(*) AS total
+                FROM reportes r
+                WHERE {' AND '.join(["r.geohash IS NULL", "r.sede = ANY(%s)"] + condiciones)}
+                GROUP BY r.sede
+            """, [sedes_visibles] + list(parametros))
+            por_sede = cursor.fetchall()
+        cursor.close()
+
+    clusters = [
+        {"origen": "gps", "celda": c['celda'], "lat": c['lat'], "lon": c['lon'], "total": c['total']}
+        for c in celdas
+    ]
+    for fila in por_sede:
+        lat, lon = catalogos.sedes_coordenadas[fila['sede']]
+        clusters.append({
+            "origen": "sede", "sede_id": fila['sede'], "sede": catalogos.sedes.get(fila['sede']),
+            "lat": lat, "lon": lon, "total": fila['total'],
+        })
+
+    return {
+        "zoom": zoom,
+        "precision": precision,
+        "total": sum(c['total'] for c in clusters),
+        "clusters": clusters,
+    }
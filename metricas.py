@@ -0,0 +1,167 @@
+import os
+import re
+import time
+
+import psycopg2.extensions
+from flask import Response, g, request
+from flask.signals import before_render_template, template_rendered
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+# -----------------------------------------------------
+# MÉTRICAS (formato Prometheus en /metrics)
+# -----------------------------------------------------
+# Latencia por ruta, tiempo de conexión y de consulta por base de datos,
+# filas leídas y tiempo de renderizado de plantillas. Con gunicorn,
+# gunicorn.conf.py define PROMETHEUS_MULTIPROC_DIR y /metrics suma los valores
+# de todos los workers.
+# Consultas más lentas que esto (segundos) se escriben en el log
+METRICAS_CONSULTA_LENTA = float(os.getenv('METRICAS_CONSULTA_LENTA', 0.5))
+
+LATENCIA_HTTP = Histogram(
+    'unegia_http_duracion_segundos', 'Duración de las peticiones HTTP',
+    ['metodo', 'endpoint', 'estatus'],
+)
+CONEXION_DB = Histogram(
+    'unegia_db_conexion_segundos', 'Tiempo para obtener una conexión del pool',
+    ['db'],
+)
+CONSULTA_DB = Histogram(
+    'unegia_db_consulta_segundos', 'Duración de las consultas SQL',
+    ['db'],
+)
+FILAS_DB = Counter(
+    'unegia_db_filas_total', 'Filas devueltas por las consultas SQL',
+    ['db'],
+)
+CONSULTAS_LENTAS = Counter(
+    'unegia_db_consultas_lentas_total', 'Consultas por encima de METRICAS_CONSULTA_LENTA',
+    ['db'],
+)
+RENDER_PLANTILLA = Histogram(
+    'unegia_plantilla_render_segundos', 'Tiempo de renderizado de plantillas Jinja',
+    ['plantilla'],
+)
+
+
+# -----------------------------------------------------
+# CONEXIONES Y CURSORES INSTRUMENTADOS (psycopg2)
+# -----------------------------------------------------
+
+def _nombre_db(cursor):
+    conexion = cursor.connection
+    return getattr(conexion, 'nombre_db', None) or conexion.info.dbname
+
+
+def _registrar_consulta(cursor, consulta, duracion):
+    db = _nombre_db(cursor)
+    CONSULTA_DB.labels(db).observe(duracion)
+    # En cursores con nombre rowcount solo se conoce al leer
+    if not cursor.name and cursor.description is not None and cursor.rowcount > 0:
+        FILAS_DB.labels(db).inc(cursor.rowcount)
+    if duracion >= METRICAS_CONSULTA_LENTA:
+        CONSULTAS_LENTAS.labels(db).inc()
+        texto = consulta.decode(errors='replace') if isinstance(consulta, bytes) else str(consulta)
+        texto = re.sub(r'\s+', ' ', texto).strip()[:500]
+        print(f"Consulta lenta en {db} ({duracion:.3f}s): {texto}")
+
+
+class _CursorMedido:
+    def execute(self, query, vars=None):
+        inicio = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _registrar_consulta(self, query, time.perf_counter() - inicio)
+
+    def executemany(self, query, vars_list):
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _registrar_consulta(self, query, time.perf_counter() - inicio)
+
+
+_clases_medidas = {}
+
+
+def _clase_medida(clase):
+    """Subclase de `clase` (cursor, RealDictCursor, ...) que mide sus consultas."""
+    medida = _clases_medidas.get(clase)
+    if medida is None:
+        medida = type(f"{clase.__name__}Medido", (_CursorMedido, clase), {})
+        _clases_medidas[clase] = medida
+    return medida
+
+
+class ConexionInstrumentada(psycopg2.extensions.connection):
+    """Conexión cuyos cursores registran duración y filas de cada consulta.
+
+    `nombre_db` lo asigna el pool con el nombre lógico de DATABASES.
+    """
+    nombre_db = None
+
+    def cursor(self, *args, **kwargs):
+        clase = kwargs.get('cursor_factory') or self.cursor_factory or psycopg2.extensions.cursor
+        kwargs['cursor_factory'] = _clase_medida(clase)
+        return super().cursor(*args, **kwargs)
+
+
+def observar_conexion(nombre_db, duracion):
+    CONEXION_DB.labels(nombre_db).observe(duracion)
+
+
+# -----------------------------------------------------
+# FLASK: LATENCIA POR RUTA, PLANTILLAS Y /metrics
+# -----------------------------------------------------
+
+def _inicio_peticion():
+    g._inicio_peticion = time.perf_counter()
+
+
+def _fin_peticion(respuesta):
+    inicio = g.pop('_inicio_peticion', None)
+    if inicio is not None:
+        # En respuestas en streaming mide hasta que empieza el envío
+        LATENCIA_HTTP.labels(
+            request.method, request.endpoint or 'sin_endpoint', respuesta.status_code,
+        ).observe(time.perf_counter() - inicio)
+    return respuesta
+
+
+def _inicio_plantilla(sender, template, context, **extra):
+    g.setdefault('_inicio_plantillas', []).append(time.perf_counter())
+
+
+def _fin_plantilla(sender, template, context, **extra):
+    inicios = g.get('_inicio_plantillas')
+    if inicios:
+        RENDER_PLANTILLA.labels(template.name or 'sin_nombre').observe(time.perf_counter() - inicios.pop())
+
+
+def _registro():
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+        registro = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registro)
+        return registro
+    return REGISTRY
+
+
+def metricas():
+    return Response(generate_latest(_registro()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def instrumentar(app):
+    """Registra los hooks de medición en `app` (cubre también sus blueprints) y /metrics."""
+    app.before_request(_inicio_peticion)
+    app.after_request(_fin_peticion)
+    before_render_template.connect(_inicio_plantilla, app, weak=False)
+    template_rendered.connect(_fin_plantilla, app, weak=False)
+    app.add_url_rule('/metrics', 'metricas', metricas)
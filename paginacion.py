@@ -0,0 +1,110 @@
+import base64
+import json
+from datetime import date, datetime
+
+# -----------------------------------------------------
+# PAGINACIÓN POR CURSORES (KEYSET)
+# -----------------------------------------------------
+# En lugar de OFFSET, cada página continúa desde los valores de orden de la
+# última fila vista, así el costo de una página no depende de su posición.
+LIMITE_POR_DEFECTO = 50
+LIMITE_MAXIMO = 200
+
+SIGUIENTE = 'siguiente'
+ANTERIOR = 'anterior'
+
+
+def _serializar(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+def codificar_cursor(valores):
+    texto = json.dumps([_serializar(v) for v in valores], separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve la lista de valores del cursor, o None si falta o es inválido."""
+    if not cursor:
+        return None
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        return None
+    return valores if isinstance(valores, list) else None
+
+
+def leer_entero(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def leer_fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def leer_limite(valor, por_defecto=LIMITE_POR_DEFECTO):
+    try:
+        limite = int(valor)
+    except (TypeError, ValueError):
+        return por_defecto
+    return max(1, min(limite, LIMITE_MAXIMO))
+
+
+def leer_direccion(valor):
+    return ANTERIOR if valor == ANTERIOR else SIGUIENTE
+
+
+def parametros_filtros(filtros):
+    """Filtros activos como strings, para reconstruir URLs de paginación."""
+    return {k: str(v) for k, v in filtros.items() if v is not None}
+
+
+def condicion_keyset(columnas, valores, direccion):
+    """Condición SQL para continuar después de `valores` en orden descendente.
+
+    Se expande como `a <= x AND (a < x OR b < y)` en lugar de la comparación de
+    filas `(a, b) < (x, y)` para que PostgreSQL pueda usar un índice sobre la
+    primera columna aunque no exista uno compuesto.
+    """
+    estricto, inclusivo = ('<', '<=') if direccion == SIGUIENTE else ('>', '>=')
+    columna, valor = columnas[0], valores[0]
+    if len(columnas) == 1:
+        return f"{columna} {estricto} %s", [valor]
+    resto, parametros = condicion_keyset(columnas[1:], valores[1:], direccion)
+    return (
+        f"{columna} {inclusivo} %s AND ({columna} {estricto} %s OR ({resto}))",
+        [valor, valor] + parametros,
+    )
+
+
+def orden_keyset(columnas, direccion):
+    sentido = 'DESC' if direccion == SIGUIENTE else 'ASC'
+    return ', '.join(f"{c} {sentido}" for c in columnas)
+
+
+def armar_pagina(filas, limite, direccion, hay_cursor, clave):
+    """Recorta la fila extra pedida con LIMIT n + 1 y calcula los cursores vecinos."""
+    hay_mas = len(filas) > limite
+    filas = list(filas[:limite])
+    if direccion == ANTERIOR:
+        filas.reverse()
+
+    siguiente = anterior = None
+    if filas:
+        if direccion == ANTERIOR:
+            anterior = codificar_cursor(clave(filas[0])) if hay_mas else None
+            siguiente = codificar_cursor(clave(filas[-1]))
+        else:
+            siguiente = codificar_cursor(clave(filas[-1])) if hay_mas else None
+            anterior = codificar_cursor(clave(filas[0])) if hay_cursor else None
+
+    return {"items": filas, "siguiente": siguiente, "anterior": anterior, "limite": limite}
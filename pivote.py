@@ -0,0 +1,71 @@
+from typing import List, NamedTuple
+
+# -----------------------------------------------------
+# TABLAS CRUZADAS (sede × categoría y similares)
+# -----------------------------------------------------
+# Arma matrices densas de conteos en una sola pasada sobre las filas agrupadas:
+# cada etiqueta se ubica con un diccionario {id: posición}, así que el costo es
+# O(filas + celdas) en lugar de buscar cada celda entre todas las filas.
+
+
+class Matriz(NamedTuple):
+    filas: List[str]
+    columnas: List[str]
+    valores: List[List[int]]
+
+
+def _indices(etiquetas):
+    """Ordena {id: etiqueta} por etiqueta y devuelve (etiquetas, {id: posición})."""
+    orden = sorted(etiquetas.items(), key=lambda par: (str(par[1]), str(par[0])))
+    return [etiqueta for _, etiqueta in orden], {id_: i for i, (id_, _) in enumerate(orden)}
+
+
+def construir_matriz(conteos, filas, columnas, clave_fila, clave_columna, clave_valor='cantidad'):
+    """Matriz len(filas) × len(columnas) a partir de filas ya agrupadas.
+
+    `filas` y `columnas` son diccionarios {id: etiqueta} (p. ej. los de la caché
+    de catálogos); las celdas sin conteo quedan en 0 y los ids que no están en
+    los diccionarios se ignoran.
+    """
+    etiquetas_filas, pos_filas = _indices(filas)
+    etiquetas_columnas, pos_columnas = _indices(columnas)
+    valores = [[0] * len(etiquetas_columnas) for _ in etiquetas_filas]
+
+    for conteo in conteos:
+        i = pos_filas.get(conteo[clave_fila])
+        j = pos_columnas.get(conteo[clave_columna])
+        if i is not None and j is not None:
+            valores[i][j] += conteo[clave_valor]
+
+    return Matriz(etiquetas_filas, etiquetas_columnas, valores)
+
+
+def como_valores(matriz, nombre_filas='sedes', nombre_columnas='categorias'):
+    """Forma {"sedes": [...], "categorias": [...], "valores": [[...], ...]}."""
+    return {
+        nombre_filas: matriz.filas,
+        nombre_columnas: matriz.columnas,
+        "valores": matriz.valores,
+    }
+
+
+def como_datos_por_sede(matriz):
+    """Forma {"sedes": [...], "categorias": [{"nombre", "datosPorSede"}]} de la gráfica.
+
+    Espera la matriz con sedes como filas y categorías como columnas.
+    """
+    return {
+        "sedes": matriz.filas,
+        "categorias": [
+            {
+                "nombre": categoria,
+                "datosPorSede": {sede: fila[j] for sede, fila in zip(matriz.filas, matriz.valores)},
+            }
+            for j, categoria in enumerate(matriz.columnas)
+        ],
+    }
+
+
+def matriz_sede_categoria(catalogos, conteos):
+    """Matriz sede × categoría con los nombres de la caché de catálogos."""
+    return construir_matriz(conteos, catalogos.sedes, catalogos.categorias, 'sede', 'categoria')
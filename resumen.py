@@ -0,0 +1,168 @@
+import os
+from datetime import date, timedelta
+
+import psycopg2.extras
+
+from conexion import obtener_conexion_reportes_generales
+
+# -----------------------------------------------------
+# RESUMEN DE REPORTES (tabla reportes_resumen)
+# -----------------------------------------------------
+# reportes_resumen guarda la cantidad de reportes por (día, sede, categoría) y
+# la mantienen los triggers de la migración 005. Los reportes sin sede o sin
+# categoría se guardan con id 0; aquí se devuelven como None. Desde la
+# migración 011 también separa por estado ('' si el reporte no tiene) y
+# reportes_resolucion guarda los resueltos por día de resolución.
+SIN_DATO = 0
+
+# Intervalo de /api/tendencias -> unidad de date_trunc
+INTERVALOS = {'dia': 'day', 'semana': 'week', 'mes': 'month'}
+INTERVALO_POR_DEFECTO = 'dia'
+# Rango por defecto de las tendencias: el último año
+DIAS_TENDENCIAS = 365
+# Periodos máximos de una serie (un rango mayor responde 400)
+TENDENCIAS_PERIODOS_MAX = int(os.getenv('TENDENCIAS_PERIODOS_MAX', 1000))
+
+
+def _id(valor):
+    return None if valor == SIN_DATO else valor
+
+
+def _consultar(sql, parametros=()):
+    with obtener_conexion_reportes_generales() as conexion:
+        cursor = conexion.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cursor.execute(sql, parametros)
+        filas = cursor.fetchall()
+        cursor.close()
+    return filas
+
+
+def totales_por_categoria():
+    """{categoria_id: total}; los reportes sin categoría quedan bajo None."""
+    filas = _consultar("""
+        SELECT categoria, SUM(total)::int AS total
+        FROM reportes_resumen
+        GROUP BY categoria
+        HAVING SUM(total) > 0
+    """)
+    return {_id(f['categoria']): f['total'] for f in filas}
+
+
+def total_categoria(categoria_id):
+    filas = _consultar("""
+        SELECT COALESCE(SUM(total), 0)::int AS total
+        FROM reportes_resumen
+        WHERE categoria = %s
+    """, (categoria_id,))
+    return filas[0]['total']
+
+
+def totales_por_sede_categoria():
+    """Filas {sede, categoria, cantidad} solo de reportes con sede y categoría."""
+    return _consultar("""
+        SELECT sede, categoria, SUM(total)::int AS cantidad
+        FROM reportes_resumen
+        WHERE sede <> %s AND categoria <> %s
+        GROUP BY sede, categoria
+        HAVING SUM(total) > 0
+    """, (SIN_DATO, SIN_DATO))
+
+
+def inicio_periodo(dia, intervalo):
+    """Primer día del periodo que contiene `dia` (semanas desde el lunes, como date_trunc)."""
+    if intervalo == 'semana':
+        return dia - timedelta(days=dia.weekday())
+    if intervalo == 'mes':
+        return dia.replace(day=1)
+    return dia
+
+
+def _siguiente_periodo(inicio, intervalo):
+    if intervalo == 'semana':
+        return inicio + timedelta(days=7)
+    if intervalo == 'mes':
+        return (inicio + timedelta(days=32)).replace(day=1)
+    return inicio + timedelta(days=1)
+
+
+def rango_tendencias(filtros):
+    """(desde, hasta) efectivos: sin filtros, el último año hasta hoy."""
+    hasta = filtros.get("hasta") or date.today()
+    desde = filtros.get("desde")
+    if desde is None:
+        desde = max(hasta.toordinal() - (DIAS_TENDENCIAS - 1), 1)
+        desde = date.fromordinal(desde)
+    return desde, hasta
+
+
+def contar_periodos(desde, hasta, intervalo):
+    """Cantidad de periodos de la serie entre `desde` y `hasta` (inclusive)."""
+    if hasta < desde:
+        return 0
+    if intervalo == 'semana':
+        return (inicio_periodo(hasta, intervalo) - inicio_periodo(desde, intervalo)).days // 7 + 1
+    if intervalo == 'mes':
+        return (hasta.year - desde.year) * 12 + hasta.month - desde.month + 1
+    return (hasta - desde).days + 1
+
+
+def _condiciones_resumen(filtros, desde, hasta, con_estado=True):
+    condiciones = ["dia >= %s", "dia <= %s"]
+    parametros = [desde, hasta]
+    for columna in ('sede', 'categoria'):
+        if filtros.get(columna) is not None:
+            condiciones.append(f"{columna} = %s")
+            parametros.append(filtros[columna])
+    if con_estado and filtros.get("estado"):
+        condiciones.append("estado = %s")
+        parametros.append(filtros["estado"])
+    return " AND ".join(condiciones), parametros
+
+
+def tendencias(filtros, intervalo=INTERVALO_POR_DEFECTO):
+    """Serie de reportes y tiempo medio de resolución por periodo.
+
+    Lee solo reportes_resumen y reportes_resolucion (una fila por día y
+    combinación de filtros), así un año completo son unos cientos de filas
+    recorridas por la clave primaria. Los reportes se cuentan por día de
+    registro y los resueltos por día de resolución; el filtro de estado solo
+    aplica a los reportes. Se incluyen los periodos sin datos.
+    """
+    unidad = INTERVALOS[intervalo]
+    desde, hasta = rango_tendencias(filtros)
+
+    where, parametros = _condiciones_resumen(filtros, desde, hasta)
+    reportes = _consultar(f"""
+        SELECT date_trunc('{unidad}', dia)::date AS periodo, SUM(total)::int AS total
+        FROM reportes_resumen
+        WHERE {where}
+        GROUP BY 1
+    """, parametros)
+
+    where, parametros = _condiciones_resumen(filtros, desde, hasta, con_estado=False)
+    resoluciones = _consultar(f"""
+        SELECT date_trunc('{unidad}', dia)::date AS periodo,
+               SUM(resueltos)::int AS resueltos, SUM(segundos) AS segundos
+        FROM reportes_resolucion
+        WHERE {where}
+        GROUP BY 1
+    """, parametros)
+
+    totales = {f['periodo']: f['total'] for f in reportes}
+    resueltos = {f['periodo']: f for f in resoluciones}
+
+    serie = []
+    periodo = inicio_periodo(desde, intervalo)
+    for numero in range(contar_periodos(desde, hasta, intervalo)):
+        if numero:
+            periodo = _siguiente_periodo(periodo, intervalo)
+        resolucion = resueltos.get(periodo)
+        cantidad = resolucion['resueltos'] if resolucion else 0
+        serie.append({
+            "periodo": periodo.isoformat(),
+            "reportes": totales.get(periodo, 0),
+            "resueltos": cantidad,
+            "horas_resolucion": round(resolucion['segundos'] / cantidad / 3600, 2) if cantidad > 0 else None,
+        })
+
+    return {"intervalo": intervalo, "desde": desde.isoformat(), "hasta": hasta.isoformat(), "serie": serie}
@@ -0,0 +1,423 @@
+"""Benchmark de las rutas de la aplicación contra un PostgreSQL desechable.
+
+Uso (desde la raíz del proyecto):
+    python scripts/bench/bench.py correr --filas 10000,100000,1000000 --salida bench.json
+    python scripts/bench/bench.py correr --dsn "host=localhost user=postgres" --filas 10000
+    python scripts/bench/bench.py comparar base.json bench.json --umbral 10
+    python scripts/bench/bench.py servidores --clases sync,gthread,gevent --concurrencia 200
+
+`correr` crea las 4 bases con las migraciones (clúster temporal con initdb o,
+con --dsn, bases bench_* en un servidor existente), carga datos sintéticos de
+cada volumen y llama a las rutas reales con el cliente de pruebas de Flask.
+Por cada ruta guarda p50/p95/p99, peticiones por segundo y errores; por cada
+volumen, el RSS máximo del proceso. `comparar` marca las rutas cuyo p95 empeoró
+más que el umbral y termina con código 1 si hay alguna. `servidores` levanta
+gunicorn con cada tipo de worker (GUNICORN_WORKER_CLASS) sobre los mismos datos
+y mide las rutas de solo lectura por HTTP con muchos clientes a la vez.
+
+Las APIs JSON se miden con la caché HTTP activa, igual que en producción.
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import types
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import datos  # noqa: E402
+from postgres_temporal import RAIZ, cluster_temporal, crear_bases, servidor_existente  # noqa: E402
+
+PREFIJO = '/dashboard_unegia'
+
+RUTAS = (
+    ('dashboard', 'GET', '/dashboard'),
+    ('reportes_por_cedula', 'GET', '/reportes?cedula={cedula}'),
+    ('api_reportes_por_cedula', 'GET', '/api/reportes/por_cedula/{cedula}'),
+    ('admin_reportes', 'GET', '/dashboard_admin/reportes'),
+    ('admin_reportes_filtrado', 'GET', '/dashboard_admin/reportes?sede=1&categoria=2'),
+    ('admin_correos', 'GET', '/dashboard_admin'),
+    ('admin_no_confirmados', 'GET', '/dashboard_admin/no_confirmados'),
+    ('api_fallas_por_categoria', 'GET', '/api/fallas_por_categoria'),
+    ('api_fallas_por_sede_categoria', 'GET', '/api/fallas_por_sede_categoria'),
+    ('api_categorias_totales', 'GET', '/api/categorias/totales'),
+    ('api_categorias', 'GET', '/api/categorias'),
+    ('api_admin_reportes', 'GET', '/api/dashboard_admin/reportes?limite=50'),
+    ('api_reportes_buscar', 'GET', '/api/reportes/buscar?q=aire+acondicionado'),
+    ('api_tendencias_semana', 'GET', '/api/tendencias?intervalo=semana'),
+    ('api_tendencias_mes_sede', 'GET', '/api/tendencias?intervalo=mes&sede=1'),
+    # Al final: escribe datos y encola el procesamiento de la foto
+    ('enviar_reporte', 'POST', '/enviar_reporte'),
+)
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def _rss_max_mb():
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _foto_jpeg():
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new('RGB', (1920, 1080), (120, 160, 200)).save(buffer, 'JPEG', quality=90)
+    return buffer.getvalue()
+
+
+def _preparar_app(databases, carpeta):
+    """Importa app.py apuntando a las bases del benchmark."""
+    config = types.ModuleType('config')
+    config.DATABASES = databases
+    sys.modules['config'] = config
+    os.environ.setdefault('MAIL_SERVER', '127.0.0.1')
+    os.environ.setdefault('MAIL_PORT', '1025')
+    os.environ.setdefault('CATALOGOS_LISTEN', 'False')
+    os.environ['CACHE_HTTP_DIR'] = os.path.join(carpeta, 'cache_http')
+    sys.path.insert(0, RAIZ)
+    os.chdir(RAIZ)
+
+    from app import app
+    app.config['TESTING'] = True
+    # Las fotos subidas no deben quedar dentro del repositorio
+    static = os.path.join(carpeta, 'static')
+    os.makedirs(static, exist_ok=True)
+    app.static_folder = static
+    return app
+
+
+def _limpiar_caches(carpeta):
+    import cache_http
+    import catalogos
+    catalogos.invalidar_catalogos()
+    cache_http.invalidar_cache_http()
+    shutil.rmtree(os.path.join(carpeta, 'cache_http'), ignore_errors=True)
+
+
+def _peticion(cliente, metodo, ruta, foto):
+    if metodo == 'POST':
+        return cliente.post(PREFIJO + ruta, data={
+            'cedula': datos.cedula(1), 'categoria': '1', 'falla_id': '1', 'sede': '1',
+            'descripcion': 'Reporte de benchmark', 'foto_path': (io.BytesIO(foto), 'foto.jpg'),
+        }, content_type='multipart/form-data')
+    return cliente.get(PREFIJO + ruta)
+
+
+def medir_ruta(app, metodo, ruta, peticiones, concurrencia, foto, calentamiento=5):
+    clientes = [app.test_client() for _ in range(concurrencia)]
+    for _ in range(calentamiento):
+        _peticion(clientes[0], metodo, ruta, foto)
+
+    def una(i):
+        inicio = time.perf_counter()
+        respuesta = _peticion(clientes[i % concurrencia], metodo, ruta, foto)
+        respuesta.get_data()
+        return time.perf_counter() - inicio, respuesta.status_code
+
+    return _medir(una, peticiones, concurrencia)
+
+
+def _medir(una, peticiones, concurrencia):
+    """Ejecuta `una(i)` -> (segundos, estatus) `peticiones` veces en paralelo."""
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+        resultados = list(executor.map(una, range(peticiones)))
+    total = time.perf_counter() - inicio
+
+    latencias = [t for t, _ in resultados]
+    return {
+        "peticiones": peticiones,
+        "errores": sum(1 for _, estatus in resultados if estatus >= 400),
+        "p50_ms": round(_percentil(latencias, 50) * 1000, 2),
+        "p95_ms": round(_percentil(latencias, 95) * 1000, 2),
+        "p99_ms": round(_percentil(latencias, 99) * 1000, 2),
+        "media_ms": round(sum(latencias) / len(latencias) * 1000, 2),
+        "rps": round(peticiones / total, 1),
+    }
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def correr(args):
+    volumenes = [int(v) for v in args.filas.split(',')]
+    carpeta = tempfile.mkdtemp(prefix='bench_unegia_')
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "parametros": {
+            "filas": volumenes, "peticiones": args.peticiones, "concurrencia": args.concurrencia,
+            "correos_por_reporte": args.correos_por_reporte, "sedes": args.sedes,
+        },
+        "volumenes": {},
+    }
+
+    if args.dsn:
+        servidor, prefijo, contexto = servidor_existente(args.dsn), 'bench_', None
+    else:
+        contexto = cluster_temporal()
+        servidor, prefijo = contexto.__enter__(), ''
+
+    try:
+        databases = crear_bases(servidor, prefijo)
+        catalogos = datos.cargar_catalogos(databases, sedes=args.sedes)
+        app = _preparar_app(databases, carpeta)
+        foto = _foto_jpeg()
+
+        for filas in volumenes:
+            print(f"Cargando {filas} reportes...")
+            inicio = time.perf_counter()
+            datos.cargar_reportes(databases, filas, catalogos)
+            datos.cargar_correos(databases, int(filas * args.correos_por_reporte), filas)
+            carga = time.perf_counter() - inicio
+            _limpiar_caches(carpeta)
+
+            rutas = {}
+            for nombre, metodo, ruta in RUTAS:
+                ruta = ruta.format(cedula=datos.cedula(1))
+                rutas[nombre] = medir_ruta(app, metodo, ruta, args.peticiones, args.concurrencia, foto)
+                r = rutas[nombre]
+                print(f"  {nombre:<32} p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                      f"p99 {r['p99_ms']:>8} ms  {r['rps']:>8} req/s  errores {r['errores']}")
+
+            resultado["volumenes"][str(filas)] = {
+                "carga_segundos": round(carga, 1),
+                "rss_max_mb": _rss_max_mb(),
+                "rutas": rutas,
+            }
+    finally:
+        if contexto is not None:
+            contexto.__exit__(None, None, None)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}")
+
+
+def comparar(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.nuevo, encoding='utf-8') as f:
+        nuevo = json.load(f)
+
+    regresiones = 0
+    for volumen, datos_nuevo in nuevo["volumenes"].items():
+        datos_base = base["volumenes"].get(volumen)
+        if not datos_base:
+            continue
+        print(f"\n{volumen} filas (RSS {datos_base['rss_max_mb']} -> {datos_nuevo['rss_max_mb']} MB)")
+        for ruta, medida in datos_nuevo["rutas"].items():
+            anterior = datos_base["rutas"].get(ruta)
+            if not anterior or not anterior["p95_ms"]:
+                continue
+            cambio = (medida["p95_ms"] - anterior["p95_ms"]) / anterior["p95_ms"] * 100
+            marca = ''
+            if cambio > args.umbral:
+                marca = '  <-- REGRESIÓN'
+                regresiones += 1
+            print(f"  {ruta:<32} p95 {anterior['p95_ms']:>8} -> {medida['p95_ms']:>8} ms ({cambio:+.1f}%){marca}")
+
+    print(f"\n{regresiones} regresiones por encima de {args.umbral}%")
+    return 1 if regresiones else 0
+
+
+# -----------------------------------------------------
+# COMPARACIÓN DE TIPOS DE WORKER DE GUNICORN
+# -----------------------------------------------------
+
+def medir_http(url, peticiones, concurrencia):
+    def una(_):
+        inicio = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, timeout=60) as respuesta:
+                respuesta.read()
+                estatus = respuesta.status
+        except urllib.error.HTTPError as e:
+            estatus = e.code
+        except OSError:
+            estatus = 599
+        return time.perf_counter() - inicio, estatus
+
+    for _ in range(5):
+        una(0)
+    return _medir(una, peticiones, concurrencia)
+
+
+def _esperar_servidor(url, proceso, limite=60):
+    fin = time.monotonic() + limite
+    while time.monotonic() < fin:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"gunicorn terminó al iniciar (código {proceso.returncode})")
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn no respondió a tiempo")
+
+
+@contextmanager
+def _gunicorn(clase, databases, carpeta, workers):
+    """Levanta `gunicorn -c gunicorn.conf.py app:app` con el tipo de worker `clase`."""
+    # config.py no está en el repositorio: se genera uno con las bases del benchmark
+    carpeta_config = os.path.join(carpeta, 'config')
+    os.makedirs(carpeta_config, exist_ok=True)
+    with open(os.path.join(carpeta_config, 'config.py'), 'w', encoding='utf-8') as f:
+        f.write(f"DATABASES = {databases!r}\n")
+
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        puerto = s.getsockname()[1]
+
+    entorno = dict(
+        os.environ,
+        PYTHONPATH=os.pathsep.join([carpeta_config, RAIZ]),
+        GUNICORN_BIND=f'127.0.0.1:{puerto}',
+        GUNICORN_WORKERS=str(workers),
+        GUNICORN_WORKER_CLASS=clase,
+        CATALOGOS_LISTEN='False',
+        CACHE_HTTP_DIR=os.path.join(carpeta, f'cache_http_{clase}'),
+        PROMETHEUS_MULTIPROC_DIR=os.path.join(carpeta, f'metricas_{clase}'),
+        MAIL_SERVER=os.getenv('MAIL_SERVER', '127.0.0.1'),
+        MAIL_PORT=os.getenv('MAIL_PORT', '1025'),
+    )
+    log = open(os.path.join(carpeta, f'gunicorn_{clase}.log'), 'wb')
+    proceso = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=RAIZ, env=entorno, stdout=log, stderr=subprocess.STDOUT,
+    )
+    try:
+        url = f'http://127.0.0.1:{puerto}{PREFIJO}'
+        _esperar_servidor(url + '/api/categorias', proceso)
+        yield url
+    finally:
+        proceso.terminate()
+        try:
+            proceso.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proceso.kill()
+        log.close()
+
+
+def servidores(args):
+    clases = args.clases.split(',')
+    carpeta = tempfile.mkdtemp(prefix='bench_unegia_')
+    resultado = {
+        "fecha": datetime.now().isoformat(timespec='seconds'),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "parametros": {
+            "filas": args.filas, "workers": args.workers, "clases": clases,
+            "peticiones": args.peticiones, "concurrencia": args.concurrencia,
+        },
+        "clases": {},
+    }
+
+    if args.dsn:
+        servidor, prefijo, contexto = servidor_existente(args.dsn), 'bench_', None
+    else:
+        contexto = cluster_temporal()
+        servidor, prefijo = contexto.__enter__(), ''
+
+    try:
+        databases = crear_bases(servidor, prefijo)
+        catalogos = datos.cargar_catalogos(databases, sedes=args.sedes)
+        print(f"Cargando {args.filas} reportes...")
+        datos.cargar_reportes(databases, args.filas, catalogos)
+        datos.cargar_correos(databases, args.filas // 2, args.filas)
+
+        for clase in clases:
+            print(f"\nworker_class={clase} ({args.workers} workers, {args.concurrencia} clientes)")
+            rutas = {}
+            with _gunicorn(clase, databases, carpeta, args.workers) as url:
+                for nombre, metodo, ruta in RUTAS:
+                    if metodo != 'GET':
+                        continue
+                    r = medir_http(url + ruta.format(cedula=datos.cedula(1)), args.peticiones, args.concurrencia)
+                    rutas[nombre] = r
+                    print(f"  {nombre:<32} p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  "
+                          f"{r['rps']:>8} req/s  errores {r['errores']}")
+            resultado["clases"][clase] = {"rutas": rutas}
+    finally:
+        if contexto is not None:
+            contexto.__exit__(None, None, None)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    print("\nreq/s por ruta: " + " / ".join(clases))
+    for nombre in resultado["clases"][clases[0]]["rutas"]:
+        valores = [str(resultado["clases"][c]["rutas"][nombre]["rps"]) for c in clases]
+        print(f"  {nombre:<32} {' / '.join(valores)}")
+
+    with open(args.salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_correr = sub.add_parser('correr', help='Carga datos y mide las rutas')
+    p_correr.add_argument('--dsn', help='Servidor PostgreSQL existente (por defecto se usa initdb)')
+    p_correr.add_argument('--filas', default='10000,100000,1000000', help='Volúmenes de reportes separados por coma')
+    p_correr.add_argument('--correos-por-reporte', type=float, default=0.5)
+    p_correr.add_argument('--sedes', type=int, default=12)
+    p_correr.add_argument('--peticiones', type=int, default=200, help='Peticiones por ruta')
+    p_correr.add_argument('--concurrencia', type=int, default=4)
+    p_correr.add_argument('--salida', default='bench.json')
+
+    p_comparar = sub.add_parser('comparar', help='Compara dos resultados')
+    p_comparar.add_argument('base')
+    p_comparar.add_argument('nuevo')
+    p_comparar.add_argument('--umbral', type=float, default=10, help='Porcentaje de empeoramiento del p95')
+
+    p_servidores = sub.add_parser('servidores', help='Compara tipos de worker de gunicorn')
+    p_servidores.add_argument('--dsn', help='Servidor PostgreSQL existente (por defecto se usa initdb)')
+    p_servidores.add_argument('--filas', type=int, default=100000)
+    p_servidores.add_argument('--sedes', type=int, default=12)
+    p_servidores.add_argument('--clases', default='sync,gthread,gevent')
+    p_servidores.add_argument('--workers', type=int, default=4)
+    p_servidores.add_argument('--peticiones', type=int, default=2000, help='Peticiones por ruta')
+    p_servidores.add_argument('--concurrencia', type=int, default=200)
+    p_servidores.add_argument('--salida', default='bench_servidores.json')
+
+    args = parser.parse_args()
+    if args.comando == 'correr':
+        correr(args)
+        return 0
+    if args.comando == 'servidores':
+        servidores(args)
+        return 0
+    return comparar(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,73 @@
+"""Micro-benchmark de la tabla cruzada sede × categoría.
+
+Uso (desde la raíz del proyecto):
+    python scripts/bench/bench_pivote.py
+
+Compara la búsqueda con next(...) por celda que usaba la ruta de app.py con
+pivote.construir_matriz para conteos crecientes. No necesita base de datos.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from pivote import construir_matriz  # noqa: E402
+
+
+def _datos(sedes, categorias):
+    nombres_sedes = {i: f"Sede {i:04d}" for i in range(1, sedes + 1)}
+    nombres_categorias = {i: f"Categoría {i:04d}" for i in range(1, categorias + 1)}
+    conteos = [
+        {"sede": s, "categoria": c, "cantidad": random.randint(1, 50)}
+        for s in nombres_sedes for c in nombres_categorias
+        if random.random() < 0.7
+    ]
+    return nombres_sedes, nombres_categorias, conteos
+
+
+def pivote_anterior(conteos, sedes, categorias):
+    filas = [
+        {"sede": sedes[f["sede"]], "categoria": categorias[f["categoria"]], "cantidad": f["cantidad"]}
+        for f in conteos
+    ]
+    nombres_sedes = sorted({f['sede'] for f in filas})
+    nombres_categorias = sorted({f['categoria'] for f in filas})
+    valores = []
+    for sede in nombres_sedes:
+        fila = []
+        for categoria in nombres_categorias:
+            coincidencia = next((f for f in filas if f['sede'] == sede and f['categoria'] == categoria), None)
+            fila.append(coincidencia['cantidad'] if coincidencia else 0)
+        valores.append(fila)
+    return valores
+
+
+def _medir(funcion, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    random.seed(7)
+    print(f"{'sedes×cat':>10} {'celdas':>8} {'anterior (ms)':>14} {'matriz (ms)':>12} {'ms/celda':>10}")
+    for lado in (5, 10, 20, 40, 80, 160):
+        sedes, categorias, conteos = _datos(lado, lado)
+        celdas = lado * lado
+        nuevo = _medir(lambda: construir_matriz(conteos, sedes, categorias, 'sede', 'categoria'))
+        # La versión anterior es O(celdas × filas); se omite cuando tarda demasiado
+        anterior = _medir(lambda: pivote_anterior(conteos, sedes, categorias), 1) if lado <= 40 else None
+        print(
+            f"{lado:>4}×{lado:<5} {celdas:>8} "
+            f"{(f'{anterior * 1000:.2f}' if anterior is not None else '-'):>14} "
+            f"{nuevo * 1000:>12.3f} {nuevo * 1000 / celdas:>10.5f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Generador de datos sintéticos para los benchmarks.
+
+Los volúmenes se controlan por parámetro y la semilla fija hace que dos
+ejecuciones con los mismos argumentos carguen exactamente los mismos datos.
+Las filas grandes se cargan con COPY en bloques para no tenerlas en memoria.
+"""
+import io
+import random
+from datetime import datetime, timedelta
+
+import psycopg2
+
+BLOQUE = 50000
+ESTADOS = ('pendiente', 'en_proceso', 'resuelto')
+# Textos para que /api/reportes/buscar tenga coincidencias variadas
+FRASES = (
+    'El aire acondicionado no enfría', 'Filtración de agua en el techo', 'No hay conexión a internet',
+    'Bombillos quemados en el pasillo', 'La puerta del aula no cierra', 'Falla eléctrica en el edificio',
+)
+
+
+def _copiar(cursor, tabla, columnas, filas):
+    """COPY de un iterable de tuplas en bloques de BLOQUE filas."""
+    buffer = io.StringIO()
+    pendientes = 0
+
+    def enviar():
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for fila in filas:
+        buffer.write(','.join('' if v is None else f'"{str(v).replace(chr(34), chr(34) * 2)}"' for v in fila))
+        buffer.write('\n')
+        pendientes += 1
+        if pendientes >= BLOQUE:
+            enviar()
+            pendientes = 0
+    if pendientes:
+        enviar()
+
+
+def cargar_catalogos(databases, sedes=12, categorias=8, fallas_por_categoria=10, semilla=1):
+    azar = random.Random(semilla)
+    conexion = psycopg2.connect(**databases['sedes_uneg'])
+    with conexion, conexion.cursor() as cursor:
+        cursor.execute("TRUNCATE sedes RESTART IDENTITY CASCADE")
+        _copiar(cursor, 'sedes', ('nombre', 'latitud', 'longitud'), (
+            (f"Sede {i:02d}", round(8.0 + azar.random(), 6), round(-63.0 + azar.random(), 6))
+            for i in range(1, sedes + 1)
+        ))
+    conexion.close()
+
+    conexion = psycopg2.connect(**databases['categorias_fallas'])
+    with conexion, conexion.cursor() as cursor:
+        cursor.execute("TRUNCATE categorias, fallas RESTART IDENTITY CASCADE")
+        _copiar(cursor, 'categorias', ('nombre', 'inf'), (
+            (f"Categoría {i}", f"Descripción de la categoría {i}") for i in range(1, categorias + 1)
+        ))
+        _copiar(cursor, 'fallas', ('categoria_id', 'descripcion', 'inf'), (
+            (c, f"Falla {c}.{f}", None)
+            for c in range(1, categorias + 1) for f in range(1, fallas_por_categoria + 1)
+        ))
+    conexion.close()
+    return {"sedes": sedes, "categorias": categorias, "fallas_por_categoria": fallas_por_categoria}
+
+
+def cedula(i):
+    return str(10000000 + i)
+
+
+def cargar_reportes(databases, cantidad, catalogos, cedulas=5000, dias=730, semilla=2):
+    """Carga `cantidad` reportes y recalcula reportes_resumen una sola vez al final."""
+    azar = random.Random(semilla)
+    inicio = datetime(2024, 1, 1)
+    sedes, categorias, fallas = catalogos['sedes'], catalogos['categorias'], catalogos['fallas_por_categoria']
+
+    def filas():
+        for _ in range(cantidad):
+            categoria = azar.randint(1, categorias)
+            falla = (categoria - 1) * fallas + azar.randint(1, fallas)
+            fecha = inicio + timedelta(seconds=azar.randint(0, dias * 86400))
+            yield (
+                cedula(azar.randint(1, cedulas)), categoria, falla, azar.randint(1, sedes),
+                f"{azar.choice(FRASES)} (falla {falla})", azar.choice(ESTADOS), fecha, fecha,
+            )
+
+    conexion = psycopg2.connect(**databases['reportes_generales'])
+    with conexion, conexion.cursor() as cursor:
+        cursor.execute("TRUNCATE reportes, cola_correos RESTART IDENTITY CASCADE")
+        # Los triggers por fila harían la carga varias veces más lenta
+        cursor.execute("ALTER TABLE reportes DISABLE TRIGGER USER")
+        _copiar(cursor, 'reportes', (
+            'cedula', 'categoria', 'tipo_falla', 'sede', 'descripcion', 'estado',
+            'fecha_reporte', 'fecha_actualizacion',
+        ), filas())
+        cursor.execute("ALTER TABLE reportes ENABLE TRIGGER USER")
+        cursor.execute("SELECT recalcular_reportes_resumen()")
+        cursor.execute("UPDATE reportes SET busqueda = reportes_vector_busqueda(descripcion, fallas_otros)")
+    conexion.autocommit = True
+    with conexion.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE reportes")
+        cursor.execute("VACUUM ANALYZE reportes_resumen")
+    conexion.close()
+
+
+def cargar_correos(databases, cantidad, reportes, semilla=3):
+    azar = random.Random(semilla)
+    inicio = datetime(2024, 1, 1)
+
+    def filas():
+        for i in range(cantidad):
+            reporte_id = azar.randint(1, max(reportes, 1))
+            confirmado = azar.random() < 0.6
+            yield (
+                reporte_id, cedula(azar.randint(1, 5000)), 'bench@example.com', 'Nuevo Reporte Registrado',
+                'Mensaje sintético', None, confirmado, confirmado and azar.random() < 0.5,
+                inicio + timedelta(minutes=i), 'enviado',
+            )
+
+    conexion = psycopg2.connect(**databases['departamentos_db'])
+    with conexion, conexion.cursor() as cursor:
+        cursor.execute("TRUNCATE correos_enviados RESTART IDENTITY")
+        _copiar(cursor, 'correos_enviados', (
+            'reporte_id', 'cedula', 'destinatario', 'asunto', 'mensaje', 'foto_path',
+            'estatus_confirmacion', 'estatus_solucion', 'fecha_envio', 'estatus_envio',
+        ), filas())
+    conexion.autocommit = True
+    with conexion.cursor() as cursor:
+        cursor.execute("VACUUM ANALYZE correos_enviados")
+    conexion.close()
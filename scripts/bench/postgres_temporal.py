@@ -0,0 +1,92 @@
+"""PostgreSQL desechable para los benchmarks.
+
+Crea un clúster temporal con initdb/pg_ctl (deben estar en el PATH), o usa un
+servidor existente si se pasa --dsn, y crea en él las 4 bases de la aplicación
+con las migraciones de scripts/db/migrations.
+"""
+import glob
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+MIGRACIONES = os.path.join(RAIZ, 'scripts', 'db', 'migrations')
+BASES = ('sedes_uneg', 'categorias_fallas', 'reportes_generales', 'departamentos_db')
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@contextmanager
+def cluster_temporal():
+    """Levanta un clúster en una carpeta temporal y lo elimina al salir."""
+    carpeta = tempfile.mkdtemp(prefix='bench_pg_')
+    datos = os.path.join(carpeta, 'datos')
+    puerto = _puerto_libre()
+    usuario = 'bench'
+    subprocess.run(
+        ['initdb', '-D', datos, '-U', usuario, '-A', 'trust', '--no-sync', '-E', 'UTF8'],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    # Sin fsync: el clúster es desechable y así la carga de datos es mucho más rápida
+    opciones = f"-p {puerto} -k {carpeta} -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+    subprocess.run(
+        ['pg_ctl', '-D', datos, '-o', opciones, '-l', os.path.join(carpeta, 'postgres.log'), '-w', 'start'],
+        check=True, stdout=subprocess.DEVNULL,
+    )
+    try:
+        yield {"host": "127.0.0.1", "port": puerto, "user": usuario, "password": ""}
+    finally:
+        subprocess.run(['pg_ctl', '-D', datos, '-m', 'immediate', 'stop'], stdout=subprocess.DEVNULL)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+
+def servidor_existente(dsn):
+    """Parámetros de conexión a partir de un DSN (las bases se crean con prefijo bench_)."""
+    parametros = psycopg2.extensions.parse_dsn(dsn)
+    parametros.pop('dbname', None)
+    return parametros
+
+
+def migraciones(nombre_db):
+    return sorted(glob.glob(os.path.join(MIGRACIONES, f"*_{nombre_db}.sql")))
+
+
+def crear_bases(servidor, prefijo=''):
+    """(Re)crea las 4 bases con sus migraciones y devuelve el dict DATABASES."""
+    databases = {}
+    admin = psycopg2.connect(dbname='postgres', **servidor)
+    admin.autocommit = True
+    try:
+        for nombre in BASES:
+            real = f"{prefijo}{nombre}"
+            cursor = admin.cursor()
+            cursor.execute(f'DROP DATABASE IF EXISTS "{real}"')
+            cursor.execute(f'CREATE DATABASE "{real}"')
+            cursor.close()
+            databases[nombre] = dict(servidor, database=real)
+    finally:
+        admin.close()
+
+    for nombre, parametros in databases.items():
+        conexion = psycopg2.connect(**parametros)
+        # autocommit: algunas migraciones traen su propio BEGIN/COMMIT
+        conexion.autocommit = True
+        try:
+            for archivo in migraciones(nombre):
+                with open(archivo, encoding='utf-8') as f:
+                    cursor = conexion.cursor()
+                    cursor.execute(f.read())
+                    cursor.close()
+        finally:
+            conexion.close()
+    return databases
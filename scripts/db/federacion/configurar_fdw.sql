@@ -0,0 +1,73 @@
+-- =============================================================================
+-- FEDERACIÓN CON postgres_fdw
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: Alternativa a consolidar_esquemas.sh que deja las 4 bases donde
+--              están. Importa las tablas de las otras bases como tablas
+--              foráneas en esquemas con su nombre (sedes_uneg.sedes,
+--              categorias_fallas.categorias, ...), para usar DB_MODO=fdw.
+--              No está en migrations/ porque depende del servidor y de las
+--              credenciales de cada instalación.
+--
+-- Uso (requiere permiso para CREATE EXTENSION):
+--   psql -d reportes_generales \
+--        -v host=localhost -v puerto=5432 -v usuario=postgres -v clave=... \
+--        -f configurar_fdw.sql
+-- =============================================================================
+
+CREATE EXTENSION IF NOT EXISTS postgres_fdw;
+
+-- -----------------------------------------------------------------------------
+-- Servidores remotos (uno por base)
+-- -----------------------------------------------------------------------------
+DROP SERVER IF EXISTS srv_sedes_uneg CASCADE;
+CREATE SERVER srv_sedes_uneg FOREIGN DATA WRAPPER postgres_fdw
+    OPTIONS (host :'host', port :'puerto', dbname 'sedes_uneg', fetch_size '1000');
+
+DROP SERVER IF EXISTS srv_categorias_fallas CASCADE;
+CREATE SERVER srv_categorias_fallas FOREIGN DATA WRAPPER postgres_fdw
+    OPTIONS (host :'host', port :'puerto', dbname 'categorias_fallas', fetch_size '1000');
+
+DROP SERVER IF EXISTS srv_departamentos_db CASCADE;
+CREATE SERVER srv_departamentos_db FOREIGN DATA WRAPPER postgres_fdw
+    OPTIONS (host :'host', port :'puerto', dbname 'departamentos_db', fetch_size '1000');
+
+CREATE USER MAPPING FOR CURRENT_USER SERVER srv_sedes_uneg
+    OPTIONS (user :'usuario', password :'clave');
+CREATE USER MAPPING FOR CURRENT_USER SERVER srv_categorias_fallas
+    OPTIONS (user :'usuario', password :'clave');
+CREATE USER MAPPING FOR CURRENT_USER SERVER srv_departamentos_db
+    OPTIONS (user :'usuario', password :'clave');
+
+-- -----------------------------------------------------------------------------
+-- Tablas foráneas
+-- -----------------------------------------------------------------------------
+CREATE SCHEMA IF NOT EXISTS sedes_uneg;
+IMPORT FOREIGN SCHEMA public LIMIT TO (sedes)
+    FROM SERVER srv_sedes_uneg INTO sedes_uneg;
+
+CREATE SCHEMA IF NOT EXISTS categorias_fallas;
+IMPORT FOREIGN SCHEMA public LIMIT TO (categorias, fallas)
+    FROM SERVER srv_categorias_fallas INTO categorias_fallas;
+
+CREATE SCHEMA IF NOT EXISTS departamentos_db;
+IMPORT FOREIGN SCHEMA public LIMIT TO (correos_enviados)
+    FROM SERVER srv_departamentos_db INTO departamentos_db;
+
+-- Con estadísticas locales el planificador decide bien si trae los catálogos
+-- completos (son pequeños) o filtra en el servidor remoto
+ANALYZE sedes_uneg.sedes;
+ANALYZE categorias_fallas.categorias;
+ANALYZE categorias_fallas.fallas;
+
+-- Rollback:
+-- DROP SCHEMA IF EXISTS sedes_uneg CASCADE;
+-- DROP SCHEMA IF EXISTS categorias_fallas CASCADE;
+-- DROP SCHEMA IF EXISTS departamentos_db CASCADE;
+-- DROP SERVER IF EXISTS srv_sedes_uneg CASCADE;
+-- DROP SERVER IF EXISTS srv_categorias_fallas CASCADE;
+-- DROP SERVER IF EXISTS srv_departamentos_db CASCADE;
+
+-- =============================================================================
+-- FIN
+-- =============================================================================
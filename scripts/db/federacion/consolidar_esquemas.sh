@@ -0,0 +1,187 @@
+#!/bin/bash
+# =============================================================================
+# Script: consolidar_esquemas.sh
+# Descripción: Copia las 4 bases del proyecto a una sola base de datos, con un
+#              esquema por base lógica, para usar DB_MODO=esquemas
+# Uso: ./consolidar_esquemas.sh [opciones]
+# =============================================================================
+
+set -e  # Terminar en caso de error
+set -o pipefail
+
+# Colores para output
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m' # Sin color
+
+# Variables por defecto
+DB_HOST="${DB_HOST:-localhost}"
+DB_PORT="${DB_PORT:-5432}"
+DB_USER="${DB_USER:-postgres}"
+DB_PASSWORD="${DB_PASSWORD}"
+TARGET_DB="unegia"
+MIGRATION_DIR="$(dirname "$0")/../migrations"
+SIN_DATOS=false
+DATABASES=("sedes_uneg" "categorias_fallas" "reportes_generales" "departamentos_db")
+
+# =============================================================================
+# Funciones auxiliares
+# =============================================================================
+
+print_info() {
+    echo -e "${BLUE}ℹ ${NC}$1"
+}
+
+print_success() {
+    echo -e "${GREEN}✓${NC} $1"
+}
+
+print_error() {
+    echo -e "${RED}✗${NC} $1"
+}
+
+show_help() {
+    cat << EOF
+${GREEN}consolidar_esquemas.sh${NC} - Consolida las 4 bases en una sola (un esquema por base)
+
+${YELLOW}USO:${NC}
+    ./consolidar_esquemas.sh [opciones]
+
+${YELLOW}OPCIONES:${NC}
+    -h, --help              Mostrar esta ayuda
+    -H, --host HOST         Host de PostgreSQL (default: localhost)
+    -p, --port PORT         Puerto de PostgreSQL (default: 5432)
+    -u, --user USER         Usuario de PostgreSQL (default: postgres)
+    -P, --password PASS     Contraseña de PostgreSQL
+    -t, --target DB         Base de datos destino (default: unegia)
+    --sin-datos             Solo crear los esquemas, sin copiar datos
+
+${YELLOW}PASOS:${NC}
+    1. Crea la base destino si no existe
+    2. Crea un esquema por base (sedes_uneg, categorias_fallas, ...) y aplica
+       en él las migraciones de esa base
+    3. Copia los datos con pg_dump --data-only (los triggers se desactivan
+       durante la copia, por lo que se requiere un superusuario)
+    4. Recalcula reportes_resumen
+
+    Las bases originales no se modifican. Luego configure en config.py la
+    entrada "unegia" y en el .env DB_MODO=esquemas.
+
+${YELLOW}EJEMPLOS:${NC}
+    ./consolidar_esquemas.sh -u postgres -P your_secure_password
+    ./consolidar_esquemas.sh -t unegia_pruebas --sin-datos
+
+EOF
+}
+
+psql_destino() {
+    psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$TARGET_DB" -v ON_ERROR_STOP=1 -q "$@"
+}
+
+crear_destino() {
+    local existe=$(psql -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d postgres -tAc \
+        "SELECT 1 FROM pg_database WHERE datname = '$TARGET_DB'")
+    if [ "$existe" != "1" ]; then
+        print_info "Creando base de datos $TARGET_DB..."
+        createdb -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" "$TARGET_DB"
+    fi
+}
+
+crear_esquema() {
+    local db=$1
+    print_info "Esquema ${GREEN}$db${NC}: aplicando migraciones..."
+    psql_destino -c "CREATE SCHEMA IF NOT EXISTS $db"
+
+    # Con search_path apuntando al esquema, las migraciones (sin esquema
+    # explícito) crean sus tablas, funciones y triggers dentro de él
+    for archivo in $(find "$MIGRATION_DIR" -name "*_${db}.sql" -type f | sort); do
+        PGOPTIONS="-c search_path=$db,public" psql_destino -f "$archivo" > /dev/null
+    done
+    print_success "Esquema $db listo"
+}
+
+copiar_datos() {
+    local db=$1
+    print_info "Copiando datos de $db..."
+    # pg_dump califica todo con public.: se reescribe hacia el esquema destino
+    pg_dump -h "$DB_HOST" -p "$DB_PORT" -U "$DB_USER" -d "$db" \
+        --data-only --disable-triggers --schema=public --no-owner \
+        | sed -e "s/^COPY public\./COPY $db./" \
+              -e "s/TABLE public\./TABLE $db./g" \
+              -e "s/setval('public\./setval('$db./g" \
+        | psql_destino > /dev/null
+    print_success "Datos de $db copiados"
+}
+
+# =============================================================================
+# Parseo de argumentos
+# =============================================================================
+
+while [[ $# -gt 0 ]]; do
+    case $1 in
+        -h|--help)
+            show_help
+            exit 0
+            ;;
+        -H|--host)
+            DB_HOST="$2"
+            shift 2
+            ;;
+        -p|--port)
+            DB_PORT="$2"
+            shift 2
+            ;;
+        -u|--user)
+            DB_USER="$2"
+            shift 2
+            ;;
+        -P|--password)
+            DB_PASSWORD="$2"
+            shift 2
+            ;;
+        -t|--target)
+            TARGET_DB="$2"
+            shift 2
+            ;;
+        --sin-datos)
+            SIN_DATOS=true
+            shift
+            ;;
+        *)
+            print_error "Opción desconocida: $1"
+            show_help
+            exit 1
+            ;;
+    esac
+done
+
+# =============================================================================
+# Ejecución
+# =============================================================================
+
+export PGPASSWORD="$DB_PASSWORD"
+
+for comando in psql pg_dump createdb; do
+    if ! command -v $comando &> /dev/null; then
+        print_error "$comando no está instalado"
+        print_info "Instalar con: sudo apt install postgresql-client"
+        exit 1
+    fi
+done
+
+crear_destino
+for db in "${DATABASES[@]}"; do
+    crear_esquema "$db"
+done
+
+if [ "$SIN_DATOS" = false ]; then
+    for db in "${DATABASES[@]}"; do
+        copiar_datos "$db"
+    done
+    print_info "Recalculando reportes_resumen..."
+    PGOPTIONS="-c search_path=reportes_generales,public" psql_destino -c "SELECT recalcular_reportes_resumen()" > /dev/null
+fi
+
+print_success "Consolidación completa en $TARGET_DB"
@@ -0,0 +1,53 @@
+-- =============================================================================
+-- MIGRACIÓN 002: Columnas usadas por la aplicación y aviso de cambios
+-- Base de datos: categorias_fallas
+-- Fecha de creación: 2026
+-- Descripción: Alinea el esquema con las consultas de la aplicación (columna
+--              inf y tabla fallas) y agrega triggers que emiten NOTIFY en el
+--              canal catalogos_cambio para invalidar la caché de catálogos
+--              (catalogos.py) en todos los workers.
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Columnas y tablas que la aplicación ya consulta
+-- -----------------------------------------------------------------------------
+ALTER TABLE categorias ADD COLUMN IF NOT EXISTS inf TEXT;
+
+CREATE TABLE IF NOT EXISTS fallas (
+    id SERIAL PRIMARY KEY,
+    categoria_id INTEGER REFERENCES categorias(id) ON DELETE CASCADE,
+    descripcion VARCHAR(255) NOT NULL,
+    inf TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_fallas_categoria ON fallas(categoria_id);
+
+-- -----------------------------------------------------------------------------
+-- Función: notificar_cambio_catalogos
+-- Descripción: Avisa a los workers que deben recargar los catálogos
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notificar_cambio_catalogos() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalogos_cambio', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_categorias_notificar ON categorias;
+CREATE TRIGGER trg_categorias_notificar
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON categorias
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambio_catalogos();
+
+DROP TRIGGER IF EXISTS trg_fallas_notificar ON fallas;
+CREATE TRIGGER trg_fallas_notificar
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON fallas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambio_catalogos();
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_categorias_notificar ON categorias;
+-- DROP TRIGGER IF EXISTS trg_fallas_notificar ON fallas;
+-- DROP FUNCTION IF EXISTS notificar_cambio_catalogos();
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 002
+-- =============================================================================
@@ -0,0 +1,35 @@
+-- =============================================================================
+-- MIGRACIÓN 002: Coordenadas de sedes y aviso de cambios
+-- Base de datos: sedes_uneg
+-- Fecha de creación: 2026
+-- Descripción: Agrega las columnas latitud/longitud que usa la aplicación y un
+--              trigger que emite NOTIFY en el canal catalogos_cambio para
+--              invalidar la caché de catálogos (catalogos.py).
+-- =============================================================================
+
+ALTER TABLE sedes ADD COLUMN IF NOT EXISTS latitud DECIMAL(10, 8);
+ALTER TABLE sedes ADD COLUMN IF NOT EXISTS longitud DECIMAL(11, 8);
+
+-- -----------------------------------------------------------------------------
+-- Función: notificar_cambio_catalogos
+-- Descripción: Avisa a los workers que deben recargar los catálogos
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notificar_cambio_catalogos() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalogos_cambio', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sedes_notificar ON sedes;
+CREATE TRIGGER trg_sedes_notificar
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON sedes
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambio_catalogos();
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_sedes_notificar ON sedes;
+-- DROP FUNCTION IF EXISTS notificar_cambio_catalogos();
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 002
+-- =============================================================================
@@ -0,0 +1,54 @@
+-- =============================================================================
+-- MIGRACIÓN 003: Tabla correos_enviados e índices parciales por estatus
+-- Base de datos: departamentos_db
+-- Fecha de creación: 2026
+-- Descripción: Documenta la tabla correos_enviados que usa la aplicación y
+--              agrega índices parciales para los listados paginados de
+--              /dashboard_admin (consultas_correos.py). Los predicados de los
+--              índices coinciden con CONDICIONES_ESTATUS, de modo que cada
+--              página se resuelve con un recorrido corto del índice sin
+--              importar el tamaño de la tabla.
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabla: correos_enviados
+-- Descripción: Correos de notificación enviados por cada reporte
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS correos_enviados (
+    id SERIAL PRIMARY KEY,
+    reporte_id INTEGER,
+    cedula VARCHAR(20),
+    destinatario VARCHAR(255),
+    asunto VARCHAR(500),
+    mensaje TEXT,
+    foto_path VARCHAR(255),
+    estatus_confirmacion BOOLEAN DEFAULT FALSE,
+    estatus_solucion BOOLEAN DEFAULT FALSE,
+    fecha_envio TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- -----------------------------------------------------------------------------
+-- Índices parciales por estatus (orden id DESC, igual que los listados)
+-- -----------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_correos_confirmados
+    ON correos_enviados(id DESC) WHERE estatus_confirmacion = TRUE;
+CREATE INDEX IF NOT EXISTS idx_correos_no_confirmados
+    ON correos_enviados(id DESC) WHERE estatus_confirmacion = FALSE;
+CREATE INDEX IF NOT EXISTS idx_correos_solucionados
+    ON correos_enviados(id DESC) WHERE estatus_solucion = TRUE;
+CREATE INDEX IF NOT EXISTS idx_correos_no_solucionados
+    ON correos_enviados(id DESC) WHERE estatus_solucion IS NOT TRUE;
+
+-- Filtros por rango de fechas
+CREATE INDEX IF NOT EXISTS idx_correos_fecha_envio ON correos_enviados(fecha_envio DESC);
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_correos_confirmados;
+-- DROP INDEX IF EXISTS idx_correos_no_confirmados;
+-- DROP INDEX IF EXISTS idx_correos_solucionados;
+-- DROP INDEX IF EXISTS idx_correos_no_solucionados;
+-- DROP INDEX IF EXISTS idx_correos_fecha_envio;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 003
+-- =============================================================================
@@ -0,0 +1,38 @@
+-- =============================================================================
+-- MIGRACIÓN 004: Cola de correos salientes
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: Tabla que usa cola_correos.py. enviar_reporte inserta el
+--              trabajo en la misma transacción que el reporte y
+--              worker_correos.py lo envía después por SMTP, con reintentos
+--              y espera exponencial.
+-- =============================================================================
+
+-- -----------------------------------------------------------------------------
+-- Tabla: cola_correos
+-- Descripción: Correos pendientes de envío
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS cola_correos (
+    id SERIAL PRIMARY KEY,
+    tipo VARCHAR(50) NOT NULL DEFAULT 'nuevo_reporte',
+    reporte_ids INTEGER[] NOT NULL,
+    destinatario VARCHAR(255),
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',  -- pendiente | enviado | fallido
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    correo_id INTEGER,          -- id en correos_enviados (departamentos_db)
+    ultimo_error TEXT,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_envio TIMESTAMP
+);
+
+-- Solo los pendientes, en el orden en que los toma el worker
+CREATE INDEX IF NOT EXISTS idx_cola_correos_pendientes
+    ON cola_correos(proximo_intento) WHERE estado = 'pendiente';
+
+-- Rollback:
+-- DROP TABLE IF EXISTS cola_correos;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 004
+-- =============================================================================
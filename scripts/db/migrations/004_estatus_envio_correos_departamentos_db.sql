@@ -0,0 +1,26 @@
+-- =============================================================================
+-- MIGRACIÓN 004: Estatus de envío en correos_enviados
+-- Base de datos: departamentos_db
+-- Fecha de creación: 2026
+-- Descripción: Con el envío en segundo plano un correo puede estar registrado
+--              y aún no entregado. worker_correos.py guarda aquí el resultado
+--              de cada intento.
+-- =============================================================================
+
+-- Los correos registrados antes de esta migración ya se habían enviado: la
+-- columna se crea con DEFAULT 'enviado' (solo llena esas filas al agregarse)
+-- y después el valor por defecto pasa a 'pendiente'. Así volver a ejecutar
+-- el archivo no marca como enviados los correos que siguen en la cola.
+ALTER TABLE correos_enviados
+    ADD COLUMN IF NOT EXISTS estatus_envio VARCHAR(20) DEFAULT 'enviado',  -- pendiente | reintentando | enviado | fallido
+    ADD COLUMN IF NOT EXISTS error_envio TEXT;
+
+ALTER TABLE correos_enviados ALTER COLUMN estatus_envio SET DEFAULT 'pendiente';
+
+-- Rollback:
+-- ALTER TABLE correos_enviados DROP COLUMN IF EXISTS estatus_envio;
+-- ALTER TABLE correos_enviados DROP COLUMN IF EXISTS error_envio;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 004
+-- =============================================================================
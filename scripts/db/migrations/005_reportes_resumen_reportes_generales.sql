@@ -0,0 +1,107 @@
+-- =============================================================================
+-- MIGRACIÓN 005: Tabla resumen de reportes por día, sede y categoría
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: Las gráficas de /dashboard leen de reportes_resumen (resumen.py)
+--              en lugar de agrupar toda la tabla reportes en cada visita. Los
+--              triggers mantienen el resumen al día con cada INSERT, UPDATE y
+--              DELETE, así el costo del dashboard depende del número de sedes
+--              y categorías y no del número de reportes.
+-- =============================================================================
+
+BEGIN;
+
+-- Evita que entren reportes entre la creación de los triggers y el llenado
+LOCK TABLE reportes IN SHARE ROW EXCLUSIVE MODE;
+
+-- -----------------------------------------------------------------------------
+-- Tabla: reportes_resumen
+-- Descripción: Cantidad de reportes por (día, sede, categoría). Los reportes
+--              sin sede o sin categoría se cuentan con id 0.
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS reportes_resumen (
+    dia DATE NOT NULL,
+    sede INTEGER NOT NULL DEFAULT 0,
+    categoria INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, sede, categoria)
+);
+
+CREATE INDEX IF NOT EXISTS idx_resumen_categoria ON reportes_resumen(categoria);
+
+-- -----------------------------------------------------------------------------
+-- Funciones de mantenimiento
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION ajustar_reportes_resumen(
+    p_fecha TIMESTAMP, p_sede INTEGER, p_categoria INTEGER, p_delta INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO reportes_resumen AS r (dia, sede, categoria, total)
+    VALUES (COALESCE(p_fecha::date, DATE '1970-01-01'), COALESCE(p_sede, 0), COALESCE(p_categoria, 0), p_delta)
+    ON CONFLICT (dia, sede, categoria)
+    DO UPDATE SET total = r.total + EXCLUDED.total;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION actualizar_reportes_resumen()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM ajustar_reportes_resumen(OLD.fecha_reporte, OLD.sede, OLD.categoria, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM ajustar_reportes_resumen(NEW.fecha_reporte, NEW.sede, NEW.categoria, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Recalcula todo el resumen desde reportes (para reconciliar a mano)
+CREATE OR REPLACE FUNCTION recalcular_reportes_resumen()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE reportes IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM reportes_resumen;
+    INSERT INTO reportes_resumen (dia, sede, categoria, total)
+    SELECT COALESCE(fecha_reporte::date, DATE '1970-01-01'), COALESCE(sede, 0), COALESCE(categoria, 0), COUNT(*)
+    FROM reportes
+    GROUP BY 1, 2, 3;
+END;
+$$ LANGUAGE plpgsql;
+
+-- -----------------------------------------------------------------------------
+-- Triggers
+-- -----------------------------------------------------------------------------
+DROP TRIGGER IF EXISTS trg_reportes_resumen_insert_delete ON reportes;
+CREATE TRIGGER trg_reportes_resumen_insert_delete
+    AFTER INSERT OR DELETE ON reportes
+    FOR EACH ROW EXECUTE FUNCTION actualizar_reportes_resumen();
+
+-- Solo cuando cambia alguna de las columnas agrupadas
+DROP TRIGGER IF EXISTS trg_reportes_resumen_update ON reportes;
+CREATE TRIGGER trg_reportes_resumen_update
+    AFTER UPDATE OF fecha_reporte, sede, categoria ON reportes
+    FOR EACH ROW
+    WHEN (OLD.fecha_reporte::date IS DISTINCT FROM NEW.fecha_reporte::date
+          OR OLD.sede IS DISTINCT FROM NEW.sede
+          OR OLD.categoria IS DISTINCT FROM NEW.categoria)
+    EXECUTE FUNCTION actualizar_reportes_resumen();
+
+-- -----------------------------------------------------------------------------
+-- Llenado inicial
+-- -----------------------------------------------------------------------------
+SELECT recalcular_reportes_resumen();
+
+COMMIT;
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_reportes_resumen_insert_delete ON reportes;
+-- DROP TRIGGER IF EXISTS trg_reportes_resumen_update ON reportes;
+-- DROP FUNCTION IF EXISTS actualizar_reportes_resumen();
+-- DROP FUNCTION IF EXISTS ajustar_reportes_resumen(TIMESTAMP, INTEGER, INTEGER, INTEGER);
+-- DROP FUNCTION IF EXISTS recalcular_reportes_resumen();
+-- DROP TABLE IF EXISTS reportes_resumen;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 005
+-- =============================================================================
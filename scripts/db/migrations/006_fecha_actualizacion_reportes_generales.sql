@@ -0,0 +1,34 @@
+-- =============================================================================
+-- MIGRACIÓN 006: fecha_actualizacion automática en reportes
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: cache_http.py usa max(id) y max(fecha_actualizacion) de
+--              reportes como versión de las APIs del dashboard. El trigger
+--              mantiene fecha_actualizacion en cada UPDATE sin depender de
+--              que cada consulta de la aplicación la asigne, y el índice
+--              resuelve el max() sin recorrer la tabla.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION tocar_fecha_actualizacion()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.fecha_actualizacion = CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reportes_fecha_actualizacion ON reportes;
+CREATE TRIGGER trg_reportes_fecha_actualizacion
+    BEFORE UPDATE ON reportes
+    FOR EACH ROW EXECUTE FUNCTION tocar_fecha_actualizacion();
+
+CREATE INDEX IF NOT EXISTS idx_reportes_fecha_actualizacion ON reportes(fecha_actualizacion DESC);
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_reportes_fecha_actualizacion ON reportes;
+-- DROP FUNCTION IF EXISTS tocar_fecha_actualizacion();
+-- DROP INDEX IF EXISTS idx_reportes_fecha_actualizacion;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 006
+-- =============================================================================
@@ -0,0 +1,24 @@
+-- =============================================================================
+-- MIGRACIÓN 007: Índice compuesto para la consulta de reportes por cédula
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: /reportes?cedula= y /api/reportes/por_cedula/<cedula> se
+--              paginan por cursores sobre (fecha_reporte, id) con la cédula
+--              fija (consultas_reportes.reportes_por_cedula). Con este índice
+--              cada página es un recorrido corto en el orden ya guardado,
+--              sin ordenar todo el historial de la cédula. Reemplaza a
+--              idx_reportes_cedula, que queda cubierto por su prefijo.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_reportes_cedula_fecha
+    ON reportes(cedula, fecha_reporte DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_reportes_cedula;
+
+-- Rollback:
+-- CREATE INDEX IF NOT EXISTS idx_reportes_cedula ON reportes(cedula);
+-- DROP INDEX IF EXISTS idx_reportes_cedula_fecha;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 007
+-- =============================================================================
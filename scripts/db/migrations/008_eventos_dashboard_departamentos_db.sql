@@ -0,0 +1,41 @@
+-- =============================================================================
+-- MIGRACIÓN 008: Avisos de confirmaciones y soluciones para el dashboard
+-- Base de datos: departamentos_db
+-- Fecha de creación: 2026
+-- Descripción: Emite NOTIFY dashboard_eventos cuando un correo pasa a
+--              confirmado o a solucionado. eventos_dashboard.py lo reparte
+--              por SSE a los dashboards abiertos.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION notificar_eventos_correos()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.estatus_confirmacion IS TRUE AND OLD.estatus_confirmacion IS NOT TRUE THEN
+        PERFORM pg_notify('dashboard_eventos', json_build_object(
+            'tipo', 'confirmacion', 'correo_id', NEW.id, 'reporte_id', NEW.reporte_id
+        )::text);
+    END IF;
+    IF NEW.estatus_solucion IS TRUE AND OLD.estatus_solucion IS NOT TRUE THEN
+        PERFORM pg_notify('dashboard_eventos', json_build_object(
+            'tipo', 'solucion', 'correo_id', NEW.id, 'reporte_id', NEW.reporte_id
+        )::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_correos_eventos ON correos_enviados;
+CREATE TRIGGER trg_correos_eventos
+    AFTER UPDATE OF estatus_confirmacion, estatus_solucion ON correos_enviados
+    FOR EACH ROW
+    WHEN (OLD.estatus_confirmacion IS DISTINCT FROM NEW.estatus_confirmacion
+          OR OLD.estatus_solucion IS DISTINCT FROM NEW.estatus_solucion)
+    EXECUTE FUNCTION notificar_eventos_correos();
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_correos_eventos ON correos_enviados;
+-- DROP FUNCTION IF EXISTS notificar_eventos_correos();
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 008
+-- =============================================================================
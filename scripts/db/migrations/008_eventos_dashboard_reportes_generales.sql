@@ -0,0 +1,87 @@
+-- =============================================================================
+-- MIGRACIÓN 008: Avisos de cambios en reportes para el dashboard en vivo
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: Emite NOTIFY dashboard_eventos con el cambio neto de reportes
+--              por (sede, categoría) de cada sentencia. eventos_dashboard.py
+--              lo reparte por SSE a los dashboards abiertos, que suman el
+--              delta a sus gráficas sin volver a pedir los totales. Los
+--              triggers son por sentencia con tablas de transición, así una
+--              carga por lotes produce un solo aviso. Los reportes sin sede o
+--              sin categoría usan id 0, igual que reportes_resumen.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION notificar_eventos_reportes()
+RETURNS TRIGGER AS $$
+DECLARE
+    cambios JSON;
+    aviso TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT COALESCE(sede, 0) AS sede, COALESCE(categoria, 0) AS categoria, COUNT(*) AS delta
+            FROM nuevas
+            GROUP BY 1, 2
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT COALESCE(sede, 0) AS sede, COALESCE(categoria, 0) AS categoria, -COUNT(*) AS delta
+            FROM viejas
+            GROUP BY 1, 2
+        ) d;
+    ELSE
+        -- Solo cuentan los UPDATE que mueven reportes de sede o categoría
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT sede, categoria, SUM(delta) AS delta
+            FROM (
+                SELECT COALESCE(sede, 0) AS sede, COALESCE(categoria, 0) AS categoria, 1 AS delta FROM nuevas
+                UNION ALL
+                SELECT COALESCE(sede, 0), COALESCE(categoria, 0), -1 FROM viejas
+            ) t
+            GROUP BY 1, 2
+            HAVING SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    IF cambios IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    aviso := json_build_object('tipo', 'reportes', 'cambios', cambios)::text;
+    -- NOTIFY admite hasta 8000 bytes; si no cabe el cliente recarga los totales
+    IF octet_length(aviso) > 7900 THEN
+        aviso := json_build_object('tipo', 'recargar')::text;
+    END IF;
+    PERFORM pg_notify('dashboard_eventos', aviso);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las tablas de transición solo se permiten en triggers de un solo evento
+DROP TRIGGER IF EXISTS trg_reportes_eventos_insert ON reportes;
+CREATE TRIGGER trg_reportes_eventos_insert
+    AFTER INSERT ON reportes
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_eventos_reportes();
+
+DROP TRIGGER IF EXISTS trg_reportes_eventos_update ON reportes;
+CREATE TRIGGER trg_reportes_eventos_update
+    AFTER UPDATE ON reportes
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_eventos_reportes();
+
+DROP TRIGGER IF EXISTS trg_reportes_eventos_delete ON reportes;
+CREATE TRIGGER trg_reportes_eventos_delete
+    AFTER DELETE ON reportes
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_eventos_reportes();
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_reportes_eventos_insert ON reportes;
+-- DROP TRIGGER IF EXISTS trg_reportes_eventos_update ON reportes;
+-- DROP TRIGGER IF EXISTS trg_reportes_eventos_delete ON reportes;
+-- DROP FUNCTION IF EXISTS notificar_eventos_reportes();
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 008
+-- =============================================================================
@@ -0,0 +1,19 @@
+-- =============================================================================
+-- MIGRACIÓN 009: Índice por foto_path
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: Las fotos se guardan con el sha256 del contenido y varios
+--              reportes pueden compartir el mismo archivo (imagenes.py). Antes
+--              de borrar un archivo se verifica que ningún reporte lo use;
+--              este índice resuelve esa consulta y la copia de coordenadas
+--              entre reportes con la misma foto.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_reportes_foto_path ON reportes(foto_path);
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_reportes_foto_path;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 009
+-- =============================================================================
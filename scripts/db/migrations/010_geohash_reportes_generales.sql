@@ -0,0 +1,106 @@
+-- =============================================================================
+-- MIGRACIÓN 010: Geohash de las coordenadas de la foto de cada reporte
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: /api/reportes/mapa agrupa los reportes en celdas geohash según
+--              el zoom (mapa_reportes.py). Sin depender de PostGIS, la columna
+--              geohash (COLLATE "C") con un índice B-tree permite leer solo la
+--              zona visible del mapa como rangos de prefijos. El trigger la
+--              mantiene desde lat_foto/lon_foto, que imagenes.py llena con el
+--              GPS del EXIF. Los reportes sin GPS se ubican en su sede.
+-- =============================================================================
+
+ALTER TABLE reportes ADD COLUMN IF NOT EXISTS geohash VARCHAR(12) COLLATE "C";
+
+-- -----------------------------------------------------------------------------
+-- Función: geohash_codificar (misma codificación que geohash.py)
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION geohash_codificar(
+    p_lat DOUBLE PRECISION, p_lon DOUBLE PRECISION, p_precision INTEGER DEFAULT 12
+) RETURNS TEXT AS $$
+DECLARE
+    alfabeto CONSTANT TEXT := '0123456789bcdefghjkmnpqrstuvwxyz';
+    lat_min DOUBLE PRECISION := -90;
+    lat_max DOUBLE PRECISION := 90;
+    lon_min DOUBLE PRECISION := -180;
+    lon_max DOUBLE PRECISION := 180;
+    medio DOUBLE PRECISION;
+    resultado TEXT := '';
+    bits INTEGER := 0;
+    valor INTEGER := 0;
+    par BOOLEAN := TRUE;
+BEGIN
+    IF p_lat IS NULL OR p_lon IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    WHILE length(resultado) < p_precision LOOP
+        IF par THEN
+            medio := (lon_min + lon_max) / 2;
+            IF p_lon >= medio THEN
+                valor := valor * 2 + 1;
+                lon_min := medio;
+            ELSE
+                valor := valor * 2;
+                lon_max := medio;
+            END IF;
+        ELSE
+            medio := (lat_min + lat_max) / 2;
+            IF p_lat >= medio THEN
+                valor := valor * 2 + 1;
+                lat_min := medio;
+            ELSE
+                valor := valor * 2;
+                lat_max := medio;
+            END IF;
+        END IF;
+        par := NOT par;
+        bits := bits + 1;
+        IF bits = 5 THEN
+            resultado := resultado || substr(alfabeto, valor + 1, 1);
+            bits := 0;
+            valor := 0;
+        END IF;
+    END LOOP;
+    RETURN resultado;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION actualizar_geohash_reporte()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.geohash := geohash_codificar(NEW.lat_foto, NEW.lon_foto);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reportes_geohash ON reportes;
+CREATE TRIGGER trg_reportes_geohash
+    BEFORE INSERT OR UPDATE OF lat_foto, lon_foto ON reportes
+    FOR EACH ROW EXECUTE FUNCTION actualizar_geohash_reporte();
+
+-- Llenado de los reportes que ya tienen coordenadas
+UPDATE reportes
+SET geohash = geohash_codificar(lat_foto, lon_foto)
+WHERE lat_foto IS NOT NULL AND lon_foto IS NOT NULL AND geohash IS NULL;
+
+-- -----------------------------------------------------------------------------
+-- Índices
+-- -----------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_reportes_geohash
+    ON reportes(geohash) WHERE geohash IS NOT NULL;
+-- Conteo por sede de los reportes sin GPS
+CREATE INDEX IF NOT EXISTS idx_reportes_sin_gps_sede
+    ON reportes(sede) WHERE geohash IS NULL;
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_reportes_sin_gps_sede;
+-- DROP INDEX IF EXISTS idx_reportes_geohash;
+-- DROP TRIGGER IF EXISTS trg_reportes_geohash ON reportes;
+-- DROP FUNCTION IF EXISTS actualizar_geohash_reporte();
+-- DROP FUNCTION IF EXISTS geohash_codificar(DOUBLE PRECISION, DOUBLE PRECISION, INTEGER);
+-- ALTER TABLE reportes DROP COLUMN IF EXISTS geohash;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 010
+-- =============================================================================
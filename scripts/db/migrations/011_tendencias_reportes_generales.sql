@@ -0,0 +1,144 @@
+-- =============================================================================
+-- MIGRACIÓN 011: Estado en el resumen y resumen de tiempos de resolución
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: /api/tendencias (resumen.py) agrupa por día, semana o mes y
+--              filtra por sede, categoría y estado leyendo solo tablas
+--              resumen. Se agrega el estado a reportes_resumen y la tabla
+--              reportes_resolucion con los reportes resueltos y la suma de
+--              sus tiempos de resolución por día de resolución, de donde sale
+--              el tiempo medio de resolución. Los mismos triggers de la
+--              migración 005 mantienen ambas tablas.
+-- =============================================================================
+
+BEGIN;
+
+LOCK TABLE reportes IN SHARE ROW EXCLUSIVE MODE;
+
+-- -----------------------------------------------------------------------------
+-- reportes_resumen: nueva dimensión estado ('' si el reporte no tiene)
+-- -----------------------------------------------------------------------------
+ALTER TABLE reportes_resumen ADD COLUMN IF NOT EXISTS estado VARCHAR(50) NOT NULL DEFAULT '';
+ALTER TABLE reportes_resumen DROP CONSTRAINT IF EXISTS reportes_resumen_pkey;
+ALTER TABLE reportes_resumen ADD PRIMARY KEY (dia, sede, categoria, estado);
+
+-- -----------------------------------------------------------------------------
+-- Tabla: reportes_resolucion
+-- Descripción: Reportes resueltos por (día de resolución, sede, categoría) y
+--              la suma de sus tiempos de resolución en segundos.
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS reportes_resolucion (
+    dia DATE NOT NULL,
+    sede INTEGER NOT NULL DEFAULT 0,
+    categoria INTEGER NOT NULL DEFAULT 0,
+    resueltos INTEGER NOT NULL DEFAULT 0,
+    segundos DOUBLE PRECISION NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, sede, categoria)
+);
+
+-- -----------------------------------------------------------------------------
+-- Funciones de mantenimiento
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION ajustar_reportes_resumen(
+    p_fecha TIMESTAMP, p_sede INTEGER, p_categoria INTEGER, p_estado VARCHAR, p_delta INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    INSERT INTO reportes_resumen AS r (dia, sede, categoria, estado, total)
+    VALUES (
+        COALESCE(p_fecha::date, DATE '1970-01-01'), COALESCE(p_sede, 0), COALESCE(p_categoria, 0),
+        COALESCE(p_estado, ''), p_delta
+    )
+    ON CONFLICT (dia, sede, categoria, estado)
+    DO UPDATE SET total = r.total + EXCLUDED.total;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ajustar_reportes_resolucion(
+    p_fecha_reporte TIMESTAMP, p_fecha_resolucion TIMESTAMP, p_sede INTEGER, p_categoria INTEGER, p_signo INTEGER
+) RETURNS VOID AS $$
+BEGIN
+    IF p_fecha_resolucion IS NULL OR p_fecha_reporte IS NULL THEN
+        RETURN;
+    END IF;
+    INSERT INTO reportes_resolucion AS r (dia, sede, categoria, resueltos, segundos)
+    VALUES (
+        p_fecha_resolucion::date, COALESCE(p_sede, 0), COALESCE(p_categoria, 0), p_signo,
+        p_signo * GREATEST(EXTRACT(EPOCH FROM (p_fecha_resolucion - p_fecha_reporte)), 0)
+    )
+    ON CONFLICT (dia, sede, categoria)
+    DO UPDATE SET resueltos = r.resueltos + EXCLUDED.resueltos,
+                  segundos = r.segundos + EXCLUDED.segundos;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION actualizar_reportes_resumen()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM ajustar_reportes_resumen(OLD.fecha_reporte, OLD.sede, OLD.categoria, OLD.estado, -1);
+        PERFORM ajustar_reportes_resolucion(OLD.fecha_reporte, OLD.fecha_resolucion, OLD.sede, OLD.categoria, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM ajustar_reportes_resumen(NEW.fecha_reporte, NEW.sede, NEW.categoria, NEW.estado, 1);
+        PERFORM ajustar_reportes_resolucion(NEW.fecha_reporte, NEW.fecha_resolucion, NEW.sede, NEW.categoria, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- La versión de la migración 005 (sin estado) ya no se usa
+DROP FUNCTION IF EXISTS ajustar_reportes_resumen(TIMESTAMP, INTEGER, INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION recalcular_reportes_resumen()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE reportes IN SHARE ROW EXCLUSIVE MODE;
+    DELETE FROM reportes_resumen;
+    INSERT INTO reportes_resumen (dia, sede, categoria, estado, total)
+    SELECT COALESCE(fecha_reporte::date, DATE '1970-01-01'), COALESCE(sede, 0), COALESCE(categoria, 0),
+           COALESCE(estado, ''), COUNT(*)
+    FROM reportes
+    GROUP BY 1, 2, 3, 4;
+
+    DELETE FROM reportes_resolucion;
+    INSERT INTO reportes_resolucion (dia, sede, categoria, resueltos, segundos)
+    SELECT fecha_resolucion::date, COALESCE(sede, 0), COALESCE(categoria, 0), COUNT(*),
+           SUM(GREATEST(EXTRACT(EPOCH FROM (fecha_resolucion - fecha_reporte)), 0))
+    FROM reportes
+    WHERE fecha_resolucion IS NOT NULL AND fecha_reporte IS NOT NULL
+    GROUP BY 1, 2, 3;
+END;
+$$ LANGUAGE plpgsql;
+
+-- -----------------------------------------------------------------------------
+-- Trigger de UPDATE: también cuando cambian estado o fecha_resolucion
+-- -----------------------------------------------------------------------------
+DROP TRIGGER IF EXISTS trg_reportes_resumen_update ON reportes;
+CREATE TRIGGER trg_reportes_resumen_update
+    AFTER UPDATE OF fecha_reporte, sede, categoria, estado, fecha_resolucion ON reportes
+    FOR EACH ROW
+    WHEN (OLD.fecha_reporte IS DISTINCT FROM NEW.fecha_reporte
+          OR OLD.sede IS DISTINCT FROM NEW.sede
+          OR OLD.categoria IS DISTINCT FROM NEW.categoria
+          OR OLD.estado IS DISTINCT FROM NEW.estado
+          OR OLD.fecha_resolucion IS DISTINCT FROM NEW.fecha_resolucion)
+    EXECUTE FUNCTION actualizar_reportes_resumen();
+
+-- -----------------------------------------------------------------------------
+-- Llenado inicial
+-- -----------------------------------------------------------------------------
+SELECT recalcular_reportes_resumen();
+
+COMMIT;
+
+-- Rollback (vuelve al resumen de la migración 005):
+-- DROP TABLE IF EXISTS reportes_resolucion;
+-- DROP FUNCTION IF EXISTS ajustar_reportes_resolucion(TIMESTAMP, TIMESTAMP, INTEGER, INTEGER, INTEGER);
+-- DROP FUNCTION IF EXISTS ajustar_reportes_resumen(TIMESTAMP, INTEGER, INTEGER, VARCHAR, INTEGER);
+-- ALTER TABLE reportes_resumen DROP CONSTRAINT reportes_resumen_pkey;
+-- ALTER TABLE reportes_resumen DROP COLUMN estado;
+-- y volver a ejecutar la migración 005
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 011
+-- =============================================================================
@@ -0,0 +1,57 @@
+-- =============================================================================
+-- MIGRACIÓN 012: Búsqueda de texto completo en los reportes
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: /api/reportes/buscar (busqueda_reportes.py) busca en
+--              descripcion y fallas_otros con la configuración 'spanish'
+--              (raíces y palabras vacías del español). La columna busqueda
+--              guarda el tsvector ya calculado, la mantiene un trigger y un
+--              índice GIN resuelve la búsqueda sin recorrer la tabla como un
+--              ILIKE '%texto%'. La descripción pesa más que fallas_otros en el
+--              ranking.
+-- =============================================================================
+
+ALTER TABLE reportes ADD COLUMN IF NOT EXISTS busqueda TSVECTOR;
+
+-- -----------------------------------------------------------------------------
+-- Función: vector de búsqueda de un reporte
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION reportes_vector_busqueda(p_descripcion TEXT, p_fallas_otros TEXT)
+RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('spanish', COALESCE(p_descripcion, '')), 'A')
+        || setweight(to_tsvector('spanish', COALESCE(p_fallas_otros, '')), 'B');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION actualizar_busqueda_reporte()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.busqueda := reportes_vector_busqueda(NEW.descripcion, NEW.fallas_otros);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_reportes_busqueda ON reportes;
+CREATE TRIGGER trg_reportes_busqueda
+    BEFORE INSERT OR UPDATE OF descripcion, fallas_otros ON reportes
+    FOR EACH ROW EXECUTE FUNCTION actualizar_busqueda_reporte();
+
+-- Llenado de los reportes existentes
+UPDATE reportes
+SET busqueda = reportes_vector_busqueda(descripcion, fallas_otros)
+WHERE busqueda IS NULL;
+
+-- -----------------------------------------------------------------------------
+-- Índices
+-- -----------------------------------------------------------------------------
+CREATE INDEX IF NOT EXISTS idx_reportes_busqueda ON reportes USING GIN (busqueda);
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_reportes_busqueda;
+-- DROP TRIGGER IF EXISTS trg_reportes_busqueda ON reportes;
+-- DROP FUNCTION IF EXISTS actualizar_busqueda_reporte();
+-- DROP FUNCTION IF EXISTS reportes_vector_busqueda(TEXT, TEXT);
+-- ALTER TABLE reportes DROP COLUMN IF EXISTS busqueda;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 012
+-- =============================================================================
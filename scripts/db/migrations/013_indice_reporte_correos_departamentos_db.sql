@@ -0,0 +1,18 @@
+-- =============================================================================
+-- MIGRACIÓN 013: Índice por reporte_id en correos_enviados
+-- Base de datos: departamentos_db
+-- Fecha de creación: 2026
+-- Descripción: Al resolver o reabrir reportes (flujo_reportes.py) se
+--              actualiza estatus_solucion de sus correos con
+--              WHERE reporte_id = ANY(...); sin este índice cada cambio de
+--              estado recorre toda la tabla.
+-- =============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_correos_reporte ON correos_enviados(reporte_id);
+
+-- Rollback:
+-- DROP INDEX IF EXISTS idx_correos_reporte;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 013
+-- =============================================================================
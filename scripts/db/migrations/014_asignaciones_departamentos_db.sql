@@ -0,0 +1,146 @@
+-- =============================================================================
+-- MIGRACIÓN 014: Cobertura y capacidad del personal para asignar reportes
+-- Base de datos: departamentos_db
+-- Fecha de creación: 2026
+-- Descripción: asignaciones.py asigna cada reporte a la persona activa que
+--              cubre su categoría y sede con menos carga abierta en
+--              proporción a su capacidad. La carga por persona se guarda en
+--              memoria y los triggers de esta migración la mantienen al día
+--              con NOTIFY asignaciones (delta de asignaciones abiertas por
+--              persona en cada sentencia, o 'recargar' si cambia el personal
+--              o su cobertura).
+-- =============================================================================
+
+-- Asignaciones abiertas simultáneas que admite cada persona
+ALTER TABLE personal ADD COLUMN IF NOT EXISTS capacidad INTEGER NOT NULL DEFAULT 10 CHECK (capacidad > 0);
+
+-- -----------------------------------------------------------------------------
+-- Tabla: personal_cobertura
+-- Descripción: Categorías y sedes que atiende cada persona. 0 significa
+--              todas (las categorías o las sedes), igual que reportes_resumen.
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS personal_cobertura (
+    personal_id INTEGER NOT NULL REFERENCES personal(id) ON DELETE CASCADE,
+    categoria INTEGER NOT NULL DEFAULT 0,
+    sede INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (personal_id, categoria, sede)
+);
+
+CREATE INDEX IF NOT EXISTS idx_cobertura_categoria_sede ON personal_cobertura(categoria, sede);
+
+-- -----------------------------------------------------------------------------
+-- asignaciones_reportes: una sola asignación abierta por reporte. Un reporte
+-- puede volver a la misma persona después de una reasignación, así que la
+-- restricción (personal_id, reporte_id) se reemplaza por el índice parcial.
+-- -----------------------------------------------------------------------------
+ALTER TABLE asignaciones_reportes DROP CONSTRAINT IF EXISTS unique_asignacion;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_asignaciones_reporte_abierta
+    ON asignaciones_reportes(reporte_id) WHERE estado = 'asignado';
+CREATE INDEX IF NOT EXISTS idx_asignaciones_personal_abiertas
+    ON asignaciones_reportes(personal_id, fecha_asignacion DESC) WHERE estado = 'asignado';
+
+-- -----------------------------------------------------------------------------
+-- Avisos de cambios de carga
+-- -----------------------------------------------------------------------------
+CREATE OR REPLACE FUNCTION notificar_carga_asignaciones()
+RETURNS TRIGGER AS $$
+DECLARE
+    cambios JSON;
+    aviso TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT personal_id, COUNT(*) AS delta
+            FROM nuevas
+            WHERE estado = 'asignado' AND personal_id IS NOT NULL
+            GROUP BY 1
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT personal_id, -COUNT(*) AS delta
+            FROM viejas
+            WHERE estado = 'asignado' AND personal_id IS NOT NULL
+            GROUP BY 1
+        ) d;
+    ELSE
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT personal_id, SUM(delta) AS delta
+            FROM (
+                SELECT personal_id, 1 AS delta FROM nuevas WHERE estado = 'asignado'
+                UNION ALL
+                SELECT personal_id, -1 FROM viejas WHERE estado = 'asignado'
+            ) t
+            WHERE personal_id IS NOT NULL
+            GROUP BY 1
+            HAVING SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    IF cambios IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    aviso := json_build_object('tipo', 'carga', 'cambios', cambios)::text;
+    -- NOTIFY admite hasta 8000 bytes; si no cabe se recarga la carga completa
+    IF octet_length(aviso) > 7900 THEN
+        aviso := json_build_object('tipo', 'recargar')::text;
+    END IF;
+    PERFORM pg_notify('asignaciones', aviso);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION notificar_recarga_asignaciones()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('asignaciones', json_build_object('tipo', 'recargar')::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Las tablas de transición solo se permiten en triggers de un solo evento
+DROP TRIGGER IF EXISTS trg_asignaciones_carga_insert ON asignaciones_reportes;
+CREATE TRIGGER trg_asignaciones_carga_insert
+    AFTER INSERT ON asignaciones_reportes
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_carga_asignaciones();
+
+DROP TRIGGER IF EXISTS trg_asignaciones_carga_update ON asignaciones_reportes;
+CREATE TRIGGER trg_asignaciones_carga_update
+    AFTER UPDATE ON asignaciones_reportes
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_carga_asignaciones();
+
+DROP TRIGGER IF EXISTS trg_asignaciones_carga_delete ON asignaciones_reportes;
+CREATE TRIGGER trg_asignaciones_carga_delete
+    AFTER DELETE ON asignaciones_reportes
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_carga_asignaciones();
+
+DROP TRIGGER IF EXISTS trg_personal_asignaciones ON personal;
+CREATE TRIGGER trg_personal_asignaciones
+    AFTER INSERT OR UPDATE OR DELETE ON personal
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_recarga_asignaciones();
+
+DROP TRIGGER IF EXISTS trg_cobertura_asignaciones ON personal_cobertura;
+CREATE TRIGGER trg_cobertura_asignaciones
+    AFTER INSERT OR UPDATE OR DELETE ON personal_cobertura
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_recarga_asignaciones();
+
+-- Rollback:
+-- DROP TRIGGER IF EXISTS trg_cobertura_asignaciones ON personal_cobertura;
+-- DROP TRIGGER IF EXISTS trg_personal_asignaciones ON personal;
+-- DROP TRIGGER IF EXISTS trg_asignaciones_carga_delete ON asignaciones_reportes;
+-- DROP TRIGGER IF EXISTS trg_asignaciones_carga_update ON asignaciones_reportes;
+-- DROP TRIGGER IF EXISTS trg_asignaciones_carga_insert ON asignaciones_reportes;
+-- DROP FUNCTION IF EXISTS notificar_recarga_asignaciones();
+-- DROP FUNCTION IF EXISTS notificar_carga_asignaciones();
+-- DROP INDEX IF EXISTS idx_asignaciones_personal_abiertas;
+-- DROP INDEX IF EXISTS idx_asignaciones_reporte_abierta;
+-- ALTER TABLE asignaciones_reportes ADD CONSTRAINT unique_asignacion UNIQUE (personal_id, reporte_id);
+-- DROP TABLE IF EXISTS personal_cobertura;
+-- ALTER TABLE personal DROP COLUMN IF EXISTS capacidad;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 014
+-- =============================================================================
@@ -0,0 +1,58 @@
+-- =============================================================================
+-- MIGRACIÓN 015: Cola de procesamiento de fotos
+-- Base de datos: reportes_generales
+-- Fecha de creación: 2026
+-- Descripción: Tabla que usa imagenes.py. enviar_reporte, editar_reporte y la
+--              carga por lotes insertan el trabajo en la misma transacción
+--              que el reporte y worker_imagenes.py lo procesa después, con
+--              reintentos y espera exponencial. Un reinicio ya no pierde
+--              fotos pendientes y Pillow no corre en los workers web.
+-- =============================================================================
+
+BEGIN;
+
+-- -----------------------------------------------------------------------------
+-- Tabla: cola_imagenes
+-- Descripción: Fotos pendientes de procesar (foto_path en uploads/originales)
+--              o de copiar coordenadas (foto repetida ya procesada)
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS cola_imagenes (
+    id SERIAL PRIMARY KEY,
+    reporte_id INTEGER NOT NULL REFERENCES reportes(id) ON DELETE CASCADE,
+    foto_path VARCHAR(255) NOT NULL,
+    estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',  -- pendiente | procesada | fallida
+    intentos INTEGER NOT NULL DEFAULT 0,
+    proximo_intento TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    ultimo_error TEXT,
+    fecha_creacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    fecha_proceso TIMESTAMP
+);
+
+-- Solo los pendientes, en el orden en que los toma el worker
+CREATE INDEX IF NOT EXISTS idx_cola_imagenes_pendientes
+    ON cola_imagenes(proximo_intento) WHERE estado = 'pendiente';
+
+CREATE INDEX IF NOT EXISTS idx_cola_imagenes_reporte
+    ON cola_imagenes(reporte_id);
+
+-- -----------------------------------------------------------------------------
+-- Fotos que quedaron sin procesar con el pool en memoria anterior
+-- (se puede volver a ejecutar: no duplica trabajos)
+-- -----------------------------------------------------------------------------
+INSERT INTO cola_imagenes (reporte_id, foto_path)
+SELECT r.id, r.foto_path
+FROM reportes r
+WHERE r.foto_path LIKE 'uploads/originales/%'
+  AND NOT EXISTS (
+      SELECT 1 FROM cola_imagenes c
+      WHERE c.reporte_id = r.id AND c.foto_path = r.foto_path AND c.estado = 'pendiente'
+  );
+
+COMMIT;
+
+-- Rollback:
+-- DROP TABLE IF EXISTS cola_imagenes;
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 015
+-- =============================================================================
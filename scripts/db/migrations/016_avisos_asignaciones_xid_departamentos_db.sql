@@ -0,0 +1,67 @@
+-- =============================================================================
+-- MIGRACIÓN 016: Id de transacción en los avisos de carga de asignaciones
+-- Base de datos: departamentos_db
+-- Fecha de creación: 2026
+-- Descripción: Los avisos de NOTIFY asignaciones llevan el id de la
+--              transacción (txid_current) que cambió la carga. asignaciones.py
+--              guarda la instantánea (txid_current_snapshot) con la que hizo
+--              la última carga completa y descarta los deltas que ya estaban
+--              incluidos en ella, así una recarga que coincide con avisos en
+--              vuelo no cuenta dos veces la misma asignación.
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION notificar_carga_asignaciones()
+RETURNS TRIGGER AS $$
+DECLARE
+    cambios JSON;
+    aviso TEXT;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT personal_id, COUNT(*) AS delta
+            FROM nuevas
+            WHERE estado = 'asignado' AND personal_id IS NOT NULL
+            GROUP BY 1
+        ) d;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT personal_id, -COUNT(*) AS delta
+            FROM viejas
+            WHERE estado = 'asignado' AND personal_id IS NOT NULL
+            GROUP BY 1
+        ) d;
+    ELSE
+        SELECT json_agg(d) INTO cambios FROM (
+            SELECT personal_id, SUM(delta) AS delta
+            FROM (
+                SELECT personal_id, 1 AS delta FROM nuevas WHERE estado = 'asignado'
+                UNION ALL
+                SELECT personal_id, -1 FROM viejas WHERE estado = 'asignado'
+            ) t
+            WHERE personal_id IS NOT NULL
+            GROUP BY 1
+            HAVING SUM(delta) <> 0
+        ) d;
+    END IF;
+
+    IF cambios IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    aviso := json_build_object('tipo', 'carga', 'xid', txid_current(), 'cambios', cambios)::text;
+    -- NOTIFY admite hasta 8000 bytes; si no cabe se recarga la carga completa
+    IF octet_length(aviso) > 7900 THEN
+        aviso := json_build_object('tipo', 'recargar')::text;
+    END IF;
+    PERFORM pg_notify('asignaciones', aviso);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Rollback:
+-- Volver a ejecutar la función notificar_carga_asignaciones de la migración 014
+-- (sin 'xid'); asignaciones.py aplica los avisos sin xid como antes.
+
+-- =============================================================================
+-- FIN DE MIGRACIÓN 016
+-- =============================================================================
@@ -0,0 +1,46 @@
+import os
+
+from flask import Request, current_app
+
+from imagenes import CARPETA_ORIGINALES, FOTO_TAMANO_MAX, SubidaFoto
+
+# -----------------------------------------------------
+# RECEPCIÓN DE FOTOS POR BLOQUES
+# -----------------------------------------------------
+# Werkzeug guarda cada archivo del multipart en el objeto que devuelve
+# _get_file_stream. Aquí ese objeto es una SubidaFoto (imagenes.py), que
+# valida el tipo con los primeros bytes y el tamaño en cada bloque, y escribe
+# directo en uploads/originales para después solo renombrar el archivo. En
+# las rutas de una sola foto una subida inválida o enorme se corta con
+# 415/413 sin leer el resto del cuerpo. En las demás (la carga por lotes) el
+# error queda en la SubidaFoto y solo se rechaza el item que usa esa foto.
+#
+# Los campos de texto tienen su propio límite (CAMPO_TEXTO_MAX) y las rutas
+# de un solo reporte rechazan por Content-Length antes de leer nada.
+CAMPO_TEXTO_MAX = int(os.getenv('CAMPO_TEXTO_MAX', 1024 * 1024))
+# Rutas con una sola foto: foto + campos del formulario
+RUTAS_UNA_FOTO = {'enviar_reporte', 'editar_reporte'}
+
+
+class PeticionSubidas(Request):
+    max_form_memory_size = CAMPO_TEXTO_MAX
+
+    @property
+    def max_content_length(self):
+        if self.endpoint in RUTAS_UNA_FOTO:
+            return FOTO_TAMANO_MAX + CAMPO_TEXTO_MAX
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        subida = SubidaFoto(
+            os.path.join(current_app.static_folder, CARPETA_ORIGINALES),
+            estricta=self.endpoint in RUTAS_UNA_FOTO,
+        )
+        self.__dict__.setdefault('_subidas', []).append(subida)
+        return subida
+
+    def close(self):
+        super().close()
+        # Temporales de una petición que falló antes de llegar a request.files
+        for subida in self.__dict__.get('_subidas', ()):
+            subida.close()
@@ -0,0 +1,18 @@
+import os
+import sys
+import types
+
+# Los módulos de la aplicación están en la raíz del repositorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# conexion.py importa config.py (credenciales, fuera del repositorio). Las
+# pruebas no abren conexiones reales: si no existe se usa uno de prueba.
+try:
+    import config  # noqa: F401
+except ImportError:
+    config = types.ModuleType('config')
+    config.DATABASES = {
+        nombre: {"host": "localhost", "dbname": nombre, "user": "pruebas", "password": "pruebas"}
+        for nombre in ('sedes_uneg', 'categorias_fallas', 'reportes_generales', 'departamentos_db')
+    }
+    sys.modules['config'] = config
@@ -0,0 +1,122 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("flask")
+
+from asignaciones import TODAS, _leer_instantanea, elegir_personal, planificar, visible_en  # noqa: E402
+
+
+def _indice(personal, cobertura, carga=None):
+    return {
+        "personal": {pid: {"id": pid, "nombre": f"Persona {pid}", "email": None, "capacidad": capacidad}
+                     for pid, capacidad in personal.items()},
+        "cobertura": cobertura,
+        "carga": carga or {},
+        "instantanea": (0, 0, frozenset()),
+        "cargado": 0,
+    }
+
+
+def _reporte(id_, categoria=1, sede=1):
+    return {"id": id_, "categoria": categoria, "sede": sede}
+
+
+def test_prefiere_la_cobertura_mas_especifica():
+    indice = _indice({1: 10, 2: 10}, {(1, 1): [1], (TODAS, TODAS): [2]}, carga={1: 9})
+
+    assert elegir_personal(_reporte(100), indice, indice["carga"]) == 1
+    assert elegir_personal(_reporte(101, categoria=2), indice, indice["carga"]) == 2
+
+
+def test_reparte_por_ocupacion_relativa_a_la_capacidad():
+    indice = _indice({1: 2, 2: 6}, {(1, TODAS): [1, 2]})
+
+    plan, sin_personal = planificar([_reporte(i) for i in range(1, 9)], indice)
+
+    asignados = [pid for _, pid in plan]
+    assert sin_personal == []
+    assert asignados.count(1) == 2
+    assert asignados.count(2) == 6
+
+
+def test_sin_cupo_quedan_sin_personal():
+    indice = _indice({1: 1}, {(TODAS, 1): [1]}, carga={1: 1})
+
+    plan, sin_personal = planificar([_reporte(1), _reporte(2, sede=2)], indice)
+
+    assert plan == []
+    assert sin_personal == [1, 2]
+
+
+def test_planificar_no_modifica_la_carga_del_indice():
+    indice = _indice({1: 5}, {(TODAS, TODAS): [1]}, carga={1: 2})
+    carga = {1: 0}
+
+    plan, _ = planificar([_reporte(1), _reporte(2)], indice, carga)
+
+    assert plan == [(1, 1), (2, 1)]
+    assert indice["carga"] == {1: 2}
+    assert carga == {1: 0}
+
+
+def test_reporte_sin_categoria_ni_sede_usa_cobertura_general():
+    indice = _indice({1: 5}, {(TODAS, TODAS): [1]})
+
+    assert planificar([{"id": 7, "categoria": None, "sede": None}], indice)[0] == [(7, 1)]
+
+
+def test_visibilidad_de_avisos_en_la_instantanea():
+    instantanea = _leer_instantanea('100:105:101,103')
+
+    assert instantanea == (100, 105, frozenset({101, 103}))
+    assert visible_en(99, instantanea)
+    assert visible_en(102, instantanea)
+    assert not visible_en(101, instantanea)
+    assert not visible_en(105, instantanea)
+    assert _leer_instantanea('7:7:') == (7, 7, frozenset())
+
+
+@pytest.fixture
+def recargas(monkeypatch):
+    """obtener_indice con cargas completas preparadas en lugar de la base."""
+    import asignaciones
+
+    pendientes = []
+    monkeypatch.setattr(asignaciones, '_indice', None)
+    monkeypatch.setattr(asignaciones, '_avisos', type(asignaciones._avisos)(maxlen=asignaciones.AVISOS_RECIENTES))
+    monkeypatch.setattr(asignaciones, '_iniciar_listener', lambda: None)
+    monkeypatch.setattr(asignaciones, '_cargar_indice', lambda: pendientes.pop(0))
+
+    def preparar(instantanea, carga):
+        indice = _indice({1: 50}, {(TODAS, TODAS): [1]}, carga={1: carga})
+        indice["instantanea"] = _leer_instantanea(instantanea)
+        pendientes.append(indice)
+
+    return asignaciones, preparar
+
+
+def test_avisos_ya_incluidos_en_la_carga_no_se_cuentan_dos_veces(recargas):
+    asignaciones, preparar = recargas
+    preparar('100:105:101', 3)
+    indice = asignaciones.obtener_indice(recargar=True)
+
+    asignaciones._aplicar_cambios([{"personal_id": 1, "delta": 1}], 99)    # ya estaba en la carga
+    asignaciones._aplicar_cambios([{"personal_id": 1, "delta": 1}], 101)   # en curso al cargar
+    asignaciones._aplicar_cambios([{"personal_id": 1, "delta": 1}], None)  # sin xid (antes de 016)
+    assert indice["carga"] == {1: 5}
+
+    # La recarga ve 101 confirmada: solo cuenta lo que trae la instantánea
+    preparar('110:110:', 6)
+    assert asignaciones.obtener_indice(recargar=True)["carga"] == {1: 6}
+
+
+def test_avisos_posteriores_a_la_instantanea_se_reaplican(recargas):
+    asignaciones, preparar = recargas
+    preparar('100:100:', 0)
+    asignaciones.obtener_indice(recargar=True)
+    asignaciones._aplicar_cambios([{"personal_id": 1, "delta": 2}], 104)
+    asignaciones._aplicar_cambios([{"personal_id": 1, "delta": 1}], None)
+
+    # La nueva carga se leyó antes de que 104 se confirmara
+    preparar('103:105:104', 7)
+    assert asignaciones.obtener_indice(recargar=True)["carga"] == {1: 9}
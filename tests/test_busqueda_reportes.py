@@ -0,0 +1,113 @@
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+import busqueda_reportes  # noqa: E402
+from busqueda_reportes import (  # noqa: E402
+    BUSQUEDA_LARGO_MAX,
+    OPCIONES_FRAGMENTO,
+    buscar_reportes,
+    fragmento_html,
+    leer_busqueda,
+)
+from paginacion import codificar_cursor, decodificar_cursor  # noqa: E402
+
+# Marcas con las que ts_headline delimita las coincidencias (OPCIONES_FRAGMENTO)
+INICIO, FIN = '\ue000', '\ue001'
+
+
+def test_leer_busqueda_limpia_espacios():
+    assert leer_busqueda('  luz   en\n el  pasillo ') == 'luz en el pasillo'
+
+
+@pytest.mark.parametrize('valor', [None, '', '   \t\n'])
+def test_leer_busqueda_vacia(valor):
+    assert leer_busqueda(valor) is None
+
+
+def test_leer_busqueda_recorta_al_largo_maximo():
+    assert len(leer_busqueda('a' * (BUSQUEDA_LARGO_MAX + 50))) == BUSQUEDA_LARGO_MAX
+
+
+def test_fragmento_escapa_antes_de_marcar():
+    fragmento = 'falla <script>alert(1)</script> en bombillo & luz'
+
+    assert fragmento_html(fragmento) == (
+        'falla &lt;script&gt;alert(1)&lt;/script&gt; en '
+        '<mark>bombillo</mark> &amp; <mark>luz</mark>'
+    )
+
+
+def test_fragmento_no_deja_pasar_mark_del_usuario():
+    assert fragmento_html('<mark>x</mark>') == '&lt;mark&gt;x&lt;/mark&gt;'
+
+
+def test_fragmento_vacio():
+    assert fragmento_html(None) == ''
+
+
+class CursorFalso:
+    def __init__(self, filas):
+        self.filas = filas
+        self.consultas = []
+
+    def execute(self, sql, parametros):
+        self.consultas.append((sql, parametros))
+
+    def fetchall(self):
+        return self.filas
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def consulta(monkeypatch):
+    """Reemplaza la conexión; devuelve el cursor para fijar filas y ver el SQL."""
+    cursor = CursorFalso([])
+
+    @contextmanager
+    def conexion():
+        yield type('Conexion', (), {'cursor': lambda self, cursor_factory=None: cursor})()
+
+    monkeypatch.setattr(busqueda_reportes, 'consulta_con_nombres', lambda: ("", "", conexion))
+    return cursor
+
+
+def test_buscar_reportes_pagina_y_resalta(consulta):
+    consulta.filas = [
+        {'id': 9, 'rango': 0.5, 'fragmento': 'sin luz <b>'},
+        {'id': 4, 'rango': 0.25, 'fragmento': 'luz'},
+        {'id': 2, 'rango': 0.25, 'fragmento': 'otra'},
+    ]
+
+    pagina = buscar_reportes('luz', {'sede': 3}, limite=2)
+
+    sql, parametros = consulta.consultas[0]
+    assert "websearch_to_tsquery('spanish', %s)" in sql
+    assert "r.busqueda @@ b.q" in sql
+    assert parametros == ['luz', OPCIONES_FRAGMENTO, 3, 3]  # sede y LIMIT 2 + 1
+    assert [r['id'] for r in pagina['items']] == [9, 4]
+    assert pagina['items'][0]['fragmento'] == 'sin <mark>luz</mark> &lt;b&gt;'
+    assert decodificar_cursor(pagina['siguiente']) == [0.25, 4]
+    assert pagina['anterior'] is None
+
+
+def test_buscar_reportes_continua_desde_el_cursor(consulta):
+    buscar_reportes('luz', {}, cursor=codificar_cursor([0.25, 4]), limite=2)
+
+    sql, parametros = consulta.consultas[0]
+    assert "WHERE p.rango <= %s AND (p.rango < %s OR (p.id < %s))" in sql
+    assert parametros == ['luz', OPCIONES_FRAGMENTO, 0.25, 0.25, 4, 3]
+
+
+@pytest.mark.parametrize('cursor', ['###', codificar_cursor([7]), codificar_cursor([0.5, 7, 1])])
+def test_buscar_reportes_ignora_cursor_invalido(consulta, cursor):
+    # Sin un par (rango, id) válido se empieza desde la primera página
+    buscar_reportes('luz', {}, cursor=cursor, limite=2)
+
+    sql, parametros = consulta.consultas[0]
+    assert "p.rango <=" not in sql
+    assert parametros == ['luz', OPCIONES_FRAGMENTO, 3]
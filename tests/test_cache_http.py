@@ -0,0 +1,125 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("psycopg2")
+
+from flask import Flask, jsonify, request  # noqa: E402
+
+import cache_http  # noqa: E402
+from cache_http import respuesta_cacheada  # noqa: E402
+
+MODIFICADO = datetime(2026, 3, 1, 10, 0, 0)
+
+
+@pytest.fixture
+def entorno(monkeypatch, tmp_path):
+    """App mínima con endpoints cacheados; la versión de los datos se fija a mano."""
+    estado = SimpleNamespace(version='7:2026-03-01T10:00:00:40', clave='2026-03-01', llamadas=0)
+    monkeypatch.setattr(cache_http, 'CACHE_HTTP_DIR', str(tmp_path))
+    monkeypatch.setattr(cache_http, 'version_reportes', lambda: (estado.version, MODIFICADO))
+    monkeypatch.setattr(cache_http, 'huella_catalogos', lambda: 'catalogos')
+
+    app = Flask(__name__)
+
+    @app.route('/totales')
+    @respuesta_cacheada(max_age=30, clave=lambda: estado.clave)
+    def totales():
+        estado.llamadas += 1
+        if request.args.get('error'):
+            return jsonify({"error": "falló la consulta"}), 500
+        return jsonify({"total": estado.llamadas})
+
+    return app.test_client(), estado, tmp_path
+
+
+def test_if_none_match_responde_304_sin_ejecutar_la_vista(entorno):
+    cliente, estado, _ = entorno
+
+    primera = cliente.get('/totales')
+    etag = primera.headers['ETag']
+    assert primera.status_code == 200
+    assert primera.get_json() == {"total": 1}
+    assert primera.headers['Cache-Control'] == 'private, max-age=30, must-revalidate'
+    assert primera.headers['Last-Modified'] == 'Sun, 01 Mar 2026 10:00:00 GMT'
+
+    segunda = cliente.get('/totales', headers={'If-None-Match': etag})
+    assert segunda.status_code == 304
+    assert segunda.headers['ETag'] == etag
+    assert segunda.get_data() == b''
+    assert estado.llamadas == 1
+
+
+def test_cuerpo_en_disco_se_reutiliza(entorno):
+    cliente, estado, carpeta = entorno
+
+    etag = cliente.get('/totales').headers['ETag']
+    assert (carpeta / f"{etag.strip(chr(34))}.json").exists()
+
+    # Otro cliente (u otro worker) sin If-None-Match recibe el mismo cuerpo
+    repetida = cliente.get('/totales')
+    assert repetida.status_code == 200
+    assert repetida.get_json() == {"total": 1}
+    assert repetida.headers['ETag'] == etag
+    assert estado.llamadas == 1
+
+
+def test_cambio_de_version_o_clave_da_otro_etag(entorno):
+    cliente, estado, _ = entorno
+    etag = cliente.get('/totales').headers['ETag']
+
+    estado.version = '8:2026-03-01T10:05:00:41'
+    nueva = cliente.get('/totales', headers={'If-None-Match': etag})
+    assert nueva.status_code == 200
+    assert nueva.get_json() == {"total": 2}
+    assert nueva.headers['ETag'] != etag
+
+    estado.clave = '2026-03-02'
+    otro_dia = cliente.get('/totales', headers={'If-None-Match': nueva.headers['ETag']})
+    assert otro_dia.status_code == 200
+    assert otro_dia.headers['ETag'] not in (etag, nueva.headers['ETag'])
+
+
+def test_query_string_forma_parte_del_etag(entorno):
+    cliente, _, _ = entorno
+    assert cliente.get('/totales?sede=1').headers['ETag'] != cliente.get('/totales?sede=2').headers['ETag']
+
+
+def test_errores_no_se_guardan(entorno):
+    cliente, estado, carpeta = entorno
+
+    for _ in range(2):
+        respuesta = cliente.get('/totales?error=1')
+        assert respuesta.status_code == 500
+        assert 'ETag' not in respuesta.headers
+    assert estado.llamadas == 2
+    assert not list(carpeta.glob('*.json'))
+
+
+def test_sin_version_responde_sin_cache(entorno, monkeypatch):
+    cliente, _, carpeta = entorno
+
+    def sin_base():
+        raise RuntimeError("sin conexión")
+
+    monkeypatch.setattr(cache_http, 'version_reportes', sin_base)
+    respuesta = cliente.get('/totales')
+    assert respuesta.status_code == 200
+    assert 'ETag' not in respuesta.headers
+    assert not list(carpeta.glob('*.json'))
+
+
+def test_huella_catalogos_igual_en_todos_los_procesos(monkeypatch):
+    # La versión es un contador por proceso; la huella depende solo del contenido
+    def catalogos(version):
+        return SimpleNamespace(version=version, cargado=version, categorias={1: 'Electricos'},
+                               fallas={2: 'Sin luz'}, sedes={3: 'Villa Asia'})
+
+    huellas = []
+    for version in (1, 5):
+        monkeypatch.setattr(cache_http, '_huella_catalogos', None)
+        monkeypatch.setattr(cache_http, 'obtener_catalogos', lambda v=version: catalogos(v))
+        huellas.append(cache_http.huella_catalogos())
+    assert huellas[0] == huellas[1]
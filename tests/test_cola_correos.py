@@ -0,0 +1,269 @@
+import email
+import socket
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("flask_mail")
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller  # noqa: E402
+from flask import Flask, current_app  # noqa: E402
+from flask_mail import Mail  # noqa: E402
+
+import cola_correos  # noqa: E402
+from cola_correos import CORREOS_BACKOFF, CORREOS_MAX_INTENTOS, TIPO_RESUMEN, procesar_lote  # noqa: E402
+
+RECHAZADO = 'rechazado@uneg.edu.ve'
+
+
+# -----------------------------------------------------
+# SMTP de prueba (aiosmtpd)
+# -----------------------------------------------------
+
+class BuzonPrueba:
+    """Guarda los correos recibidos y rechaza los dirigidos a RECHAZADO."""
+
+    def __init__(self):
+        self.recibidos = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address == RECHAZADO:
+            return '550 Buzón no disponible'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        self.recibidos.append((envelope.rcpt_tos, email.message_from_bytes(envelope.content)))
+        return '250 Message accepted for delivery'
+
+
+def _html(mensaje):
+    parte = next(p for p in mensaje.walk() if p.get_content_type() == 'text/html')
+    return parte.get_payload(decode=True).decode(parte.get_content_charset() or 'utf-8')
+
+
+def _puerto_libre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    buzon = BuzonPrueba()
+    controlador = Controller(buzon, hostname='127.0.0.1', port=_puerto_libre())
+    controlador.start()
+    try:
+        yield controlador, buzon
+    finally:
+        controlador.stop()
+
+
+@pytest.fixture
+def app_correo(smtp):
+    controlador, _ = smtp
+    app = Flask(__name__)
+    app.config.update(
+        MAIL_SERVER=controlador.hostname,
+        MAIL_PORT=controlador.port,
+        MAIL_USE_TLS=False,
+        MAIL_USE_SSL=False,
+        MAIL_DEFAULT_SENDER='dashboard@uneg.edu.ve',
+    )
+    mail = Mail(app)
+    with app.app_context():
+        yield mail
+
+
+# -----------------------------------------------------
+# Base de datos falsa
+# -----------------------------------------------------
+
+class BaseFalsa:
+    """Lo justo de reportes_generales para procesar_lote: la cola y los reportes."""
+
+    def __init__(self, trabajos, reportes):
+        self.trabajos = trabajos
+        self.reportes = {r['id']: r for r in reportes}
+        self.actualizaciones = {}
+        self.confirmada = False
+
+    @contextmanager
+    def conexion(self):
+        yield ConexionFalsa(self)
+
+
+class ConexionFalsa:
+    def __init__(self, base):
+        self.base = base
+
+    def cursor(self, cursor_factory=None):
+        return CursorFalso(self.base)
+
+    def commit(self):
+        self.base.confirmada = True
+
+
+class CursorFalso:
+    def __init__(self, base):
+        self.base = base
+        self.resultado = []
+
+    def execute(self, sql, parametros=None):
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT') and 'FROM cola_correos' in sql:
+            self.resultado = [dict(t) for t in self.base.trabajos]
+        elif sql.startswith('SELECT') and 'FROM reportes' in sql:
+            self.resultado = [dict(self.base.reportes[i]) for i in parametros[0] if i in self.base.reportes]
+        elif sql.startswith('UPDATE cola_correos'):
+            estado, intentos, correo_id, error, espera, _, cola_id = parametros
+            self.base.actualizaciones[cola_id] = {
+                "estado": estado, "intentos": intentos, "correo_id": correo_id,
+                "error": error, "espera": espera,
+            }
+        else:
+            raise AssertionError(f"consulta inesperada: {sql}")
+
+    def fetchall(self):
+        return self.resultado
+
+    def close(self):
+        pass
+
+
+def _trabajo(id_, reporte_ids, intentos=0, destinatario=None, tipo='nuevo_reporte', correo_id=None):
+    return {
+        "id": id_, "tipo": tipo, "reporte_ids": reporte_ids, "destinatario": destinatario,
+        "intentos": intentos, "correo_id": correo_id,
+    }
+
+
+def _reporte(id_):
+    return {
+        "id": id_, "cedula": f"V-{id_}", "categoria": 1, "tipo_falla": 2, "sede": 3,
+        "descripcion": f"Falla del reporte {id_}", "foto_path": None, "estado": 'pendiente',
+    }
+
+
+@pytest.fixture
+def entorno(monkeypatch):
+    """Conecta procesar_lote a una base falsa y registra lo que guarda en departamentos_db."""
+    registro = {"correos": [], "envios": []}
+
+    def preparar(trabajos, reportes, asignados=None):
+        base = BaseFalsa(trabajos, reportes)
+        monkeypatch.setattr(cola_correos, 'obtener_conexion_reportes_generales', base.conexion)
+        monkeypatch.setattr(cola_correos, 'obtener_catalogos', lambda: SimpleNamespace(
+            categorias={1: 'Electricidad'}, fallas={2: 'Sin luz'}, sedes={3: 'Villa Asia'},
+        ))
+        monkeypatch.setattr(cola_correos, 'asignar_reportes', lambda reportes: asignados or {})
+
+        def registrar_correo(datos, destinatario, asunto, estatus_envio='pendiente'):
+            registro["correos"].append((datos["reporte_id"], destinatario, asunto))
+            return 1000 + len(registro["correos"])
+
+        monkeypatch.setattr(cola_correos, 'registrar_correo', registrar_correo)
+        monkeypatch.setattr(cola_correos, 'marcar_envio', lambda estados: registro["envios"].extend(estados))
+        return base
+
+    return preparar, registro
+
+
+# -----------------------------------------------------
+# Pruebas
+# -----------------------------------------------------
+
+def test_envia_y_marca_enviado(smtp, app_correo, entorno):
+    _, buzon = smtp
+    preparar, registro = entorno
+    base = preparar(
+        [_trabajo(1, [10]), _trabajo(2, [10, 11], tipo=TIPO_RESUMEN, destinatario='jefe@uneg.edu.ve')],
+        [_reporte(10), _reporte(11)],
+        asignados={10: {"id": 5, "nombre": "Ana", "email": 'tecnico@uneg.edu.ve'}},
+    )
+
+    assert procesar_lote(app_correo) == 2
+
+    assert base.confirmada
+    assert [r[0] for r in buzon.recibidos] == [['tecnico@uneg.edu.ve'], ['jefe@uneg.edu.ve']]
+    assert 'Sin luz' in _html(buzon.recibidos[0][1])
+    assert 'Villa Asia' in _html(buzon.recibidos[0][1])
+    assert base.actualizaciones[1]["estado"] == 'enviado'
+    assert base.actualizaciones[1]["intentos"] == 1
+    assert base.actualizaciones[2]["estado"] == 'enviado'
+    assert {(c, e) for c, e, _ in registro["envios"]} == {(1001, 'enviado'), (1002, 'enviado')}
+
+
+def test_fallo_reintenta_con_espera_exponencial(smtp, app_correo, entorno):
+    _, buzon = smtp
+    preparar, registro = entorno
+    base = preparar(
+        [_trabajo(1, [10], destinatario=RECHAZADO, intentos=2, correo_id=77), _trabajo(2, [11])],
+        [_reporte(10), _reporte(11)],
+    )
+
+    assert procesar_lote(app_correo) == 2
+
+    fallido = base.actualizaciones[1]
+    assert fallido["estado"] == 'pendiente'
+    assert fallido["intentos"] == 3
+    assert fallido["espera"] == CORREOS_BACKOFF * 4
+    assert fallido["error"]
+    # El reintento reutiliza el registro de correos_enviados
+    assert fallido["correo_id"] == 77
+    assert (77, 'reintentando', fallido["error"]) in registro["envios"]
+    # Un rechazo no detiene el resto del lote
+    assert base.actualizaciones[2]["estado"] == 'enviado'
+    assert len(buzon.recibidos) == 1
+
+
+def test_ultimo_intento_queda_fallido(smtp, app_correo, entorno):
+    preparar, registro = entorno
+    base = preparar(
+        [_trabajo(1, [10], destinatario=RECHAZADO, intentos=CORREOS_MAX_INTENTOS - 1)],
+        [_reporte(10)],
+    )
+
+    procesar_lote(app_correo)
+
+    assert base.actualizaciones[1]["estado"] == 'fallido'
+    assert base.actualizaciones[1]["intentos"] == CORREOS_MAX_INTENTOS
+    # Se registró en correos_enviados y su estatus final es fallido
+    assert registro["correos"] == [(10, RECHAZADO, cola_correos.ASUNTO_NUEVO_REPORTE)]
+    assert [(c, e) for c, e, _ in registro["envios"]] == [(1001, 'fallido')]
+
+
+def test_reporte_inexistente_no_envia(smtp, app_correo, entorno):
+    _, buzon = smtp
+    preparar, registro = entorno
+    base = preparar([_trabajo(1, [99])], [])
+
+    procesar_lote(app_correo)
+
+    assert buzon.recibidos == []
+    assert base.actualizaciones[1]["estado"] == 'pendiente'
+    assert 'no existe' in base.actualizaciones[1]["error"]
+    assert registro["correos"] == []
+
+
+def test_servidor_caido_reintenta_todo_el_lote(app_correo, entorno):
+    preparar, _ = entorno
+    base = preparar([_trabajo(1, [10]), _trabajo(2, [11])], [_reporte(10), _reporte(11)])
+    # Nadie escucha en ese puerto: falla la conexión SMTP
+    current_app.extensions['mail'].port = _puerto_libre()
+
+    assert procesar_lote(app_correo) == 2
+
+    assert {a["estado"] for a in base.actualizaciones.values()} == {'pendiente'}
+    assert all(a["intentos"] == 1 and a["espera"] == CORREOS_BACKOFF for a in base.actualizaciones.values())
+
+
+def test_cola_vacia(app_correo, entorno):
+    preparar, _ = entorno
+    base = preparar([], [])
+
+    assert procesar_lote(app_correo) == 0
+    assert base.confirmada
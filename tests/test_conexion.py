@@ -0,0 +1,100 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+psycopg2 = pytest.importorskip("psycopg2")
+pytest.importorskip("flask")
+
+import psycopg2.extensions  # noqa: E402
+
+import conexion  # noqa: E402
+from conexion import PoolConexiones  # noqa: E402
+
+
+class ConexionFalsa:
+    def __init__(self):
+        self.closed = 0
+        self.rollbacks = 0
+        self.info = SimpleNamespace(transaction_status=psycopg2.extensions.TRANSACTION_STATUS_IDLE)
+
+    def close(self):
+        self.closed = 1
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    abiertas = []
+
+    def conectar(*args, **kwargs):
+        abiertas.append(ConexionFalsa())
+        return abiertas[-1]
+
+    monkeypatch.setattr(psycopg2, 'connect', conectar)
+    return PoolConexiones(1, 5, nombre_db='reportes_generales'), abiertas
+
+
+def test_reutiliza_conexiones_por_encima_de_minconn(pool):
+    pool, abiertas = pool
+    tomadas = [pool.obtener() for _ in range(3)]
+    for c in tomadas:
+        pool.devolver(c)
+
+    assert len(abiertas) == 3
+    assert not any(c.closed for c in abiertas)
+
+    otra_vez = [pool.obtener() for _ in range(3)]
+    assert len(abiertas) == 3
+    assert set(map(id, otra_vez)) == set(map(id, tomadas))
+
+
+def test_transaccion_abierta_se_revierte_al_devolver(pool):
+    pool, _ = pool
+    c = pool.obtener()
+    c.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+    pool.devolver(c)
+
+    assert c.rollbacks == 1
+    assert c in pool._pool
+
+
+def test_conexion_perdida_se_cierra_y_se_olvida(pool):
+    pool, _ = pool
+    c = pool.obtener()
+    c.info.transaction_status = psycopg2.extensions.TRANSACTION_STATUS_UNKNOWN
+    pool.devolver(c)
+
+    assert c.closed
+    assert c not in pool._pool
+    assert id(c) not in pool._ultimo_uso
+
+
+def test_ociosas_se_cierran_hasta_minconn(pool, monkeypatch):
+    pool, abiertas = pool
+    tomadas = [pool.obtener() for _ in range(4)]
+    for c in tomadas:
+        pool.devolver(c)
+    viejo = time.monotonic() - conexion.POOL_IDLE_TIMEOUT - 1
+    for c in pool._pool:
+        pool._ultimo_uso[id(c)] = viejo
+
+    pool._cerrar_ociosas()
+
+    assert len(pool._pool) == 1
+    cerradas = [c for c in abiertas if c.closed]
+    assert len(cerradas) == len(abiertas) - 1
+    assert all(id(c) not in pool._ultimo_uso for c in cerradas)
+
+
+def test_descartar_olvida_la_conexion(pool):
+    pool, _ = pool
+    c = pool.obtener()
+    pool._descartar(c)
+    pool._cupos.release()
+
+    assert c.closed
+    assert id(c) not in pool._ultimo_uso
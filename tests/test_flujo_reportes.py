@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("flask")
+
+from flujo_reportes import (  # noqa: E402
+    CANCELADO,
+    EN_PROCESO,
+    ESTADOS,
+    ESTADOS_ABIERTOS,
+    PENDIENTE,
+    RESUELTO,
+    TRANSICION_MAXIMA,
+    TRANSICIONES,
+    TransicionInvalida,
+    estados_origen,
+    leer_transicion,
+    transicionar,
+)
+
+
+def test_transiciones_solo_entre_estados_conocidos():
+    assert set(ESTADOS) == {PENDIENTE, EN_PROCESO, RESUELTO, CANCELADO}
+    for origen, destinos in TRANSICIONES.items():
+        assert destinos <= set(ESTADOS)
+        assert origen not in destinos
+
+
+def test_todo_estado_es_alcanzable_y_tiene_salida():
+    for estado in ESTADOS:
+        assert TRANSICIONES[estado]
+        assert estados_origen(estado)
+
+
+def test_cerrados_solo_se_reabren():
+    assert TRANSICIONES[RESUELTO] <= set(ESTADOS_ABIERTOS)
+    assert TRANSICIONES[CANCELADO] <= set(ESTADOS_ABIERTOS)
+    assert RESUELTO not in ESTADOS_ABIERTOS and CANCELADO not in ESTADOS_ABIERTOS
+
+
+def test_estados_origen():
+    assert estados_origen(RESUELTO) == sorted([PENDIENTE, EN_PROCESO])
+    assert estados_origen(PENDIENTE) == sorted([EN_PROCESO, CANCELADO])
+
+
+def test_leer_transicion_normaliza_ids_y_opciones():
+    ids, destino, opciones = leer_transicion({
+        "ids": [3, "1", 3], "estado": RESUELTO, "comentario": "  listo  ", "usuario": "",
+    })
+
+    assert ids == [1, 3]
+    assert destino == RESUELTO
+    assert opciones == {"comentario": "listo", "usuario": None, "asignado_a": None}
+
+
+@pytest.mark.parametrize('datos', [
+    None,
+    [],
+    {"ids": [1], "estado": "archivado"},
+    {"ids": [], "estado": RESUELTO},
+    {"ids": "1,2", "estado": RESUELTO},
+    {"ids": ["uno"], "estado": RESUELTO},
+    {"ids": list(range(TRANSICION_MAXIMA + 1)), "estado": RESUELTO},
+])
+def test_leer_transicion_rechaza_datos_invalidos(datos):
+    with pytest.raises(TransicionInvalida):
+        leer_transicion(datos)
+
+
+def test_transicionar_sin_ids_no_consulta(monkeypatch):
+    import flujo_reportes
+
+    def sin_conexion():
+        raise AssertionError("no debería abrir conexión")
+
+    monkeypatch.setattr(flujo_reportes, 'obtener_conexion_reportes_generales', sin_conexion)
+    assert transicionar([], RESUELTO) == {"actualizados": [], "rechazados": [], "no_encontrados": []}
+    with pytest.raises(TransicionInvalida):
+        transicionar([1], "archivado")
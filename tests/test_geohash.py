@@ -0,0 +1,51 @@
+import pytest
+
+from geohash import ALFABETO, caja, celdas_en_caja, cobertura, codificar, precision_para_zoom
+
+
+def test_codificar_valor_conocido():
+    assert codificar(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert codificar(0.0, 0.0, 5) == 's0000'
+
+
+def test_codificar_prefijos_de_la_misma_posicion():
+    completo = codificar(8.2966, -62.7116)
+
+    assert len(completo) == 12
+    assert set(completo) <= set(ALFABETO)
+    for precision in range(1, 12):
+        assert codificar(8.2966, -62.7116, precision) == completo[:precision]
+
+
+@pytest.mark.parametrize('lat, lon', [(8.2966, -62.7116), (-33.45, -70.66), (89.9, 179.9)])
+def test_caja_contiene_el_punto(lat, lon):
+    sur, oeste, norte, este = caja(codificar(lat, lon, 7))
+
+    assert sur <= lat <= norte
+    assert oeste <= lon <= este
+
+
+def test_precision_para_zoom_acota_el_zoom():
+    assert precision_para_zoom(-5) == precision_para_zoom(0)
+    assert precision_para_zoom(99) == precision_para_zoom(20)
+    assert precision_para_zoom(3) <= precision_para_zoom(15)
+
+
+def test_celdas_en_caja_cubren_la_caja():
+    celdas = celdas_en_caja(8.20, -62.90, 8.40, -62.60, 4)
+
+    assert celdas
+    assert celdas == sorted(set(celdas))
+    for lat, lon in [(8.20, -62.90), (8.40, -62.60), (8.30, -62.75)]:
+        assert codificar(lat, lon, 4) in celdas
+
+
+def test_celdas_en_caja_devuelve_none_si_son_demasiadas():
+    assert celdas_en_caja(-10, -10, 10, 10, 6, maximo=64) is None
+
+
+def test_cobertura_usa_prefijos_de_las_celdas():
+    prefijos = cobertura(8.20, -62.90, 8.40, -62.60, 6)
+
+    assert prefijos
+    assert codificar(8.30, -62.75, 6).startswith(tuple(prefijos))
@@ -0,0 +1,120 @@
+import functools
+import io
+import json
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("flask_mail")
+pytest.importorskip("PIL")
+pytest.importorskip("dotenv")
+
+os.environ.setdefault('MAIL_PORT', '1025')
+
+import lotes_reportes  # noqa: E402
+import subidas  # noqa: E402
+from app import app  # noqa: E402
+from imagenes import CARPETA_ORIGINALES, SubidaFoto  # noqa: E402
+
+RUTA = '/dashboard_unegia/api/reportes/batch'
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+
+
+class ConexionFalsa:
+    def cursor(self):
+        return SimpleNamespace(close=lambda: None)
+
+    def commit(self):
+        pass
+
+
+@pytest.fixture
+def cliente(monkeypatch, tmp_path):
+    """Cliente de la app real con la base y las colas reemplazadas."""
+    insertados = []
+
+    @contextmanager
+    def conexion():
+        yield ConexionFalsa()
+
+    def execute_values(cursor, sql, valores, **opciones):
+        inicio = len(insertados)
+        insertados.extend(valores)
+        return [(100 + inicio + i,) for i in range(len(valores))]
+
+    monkeypatch.setattr(lotes_reportes, 'obtener_conexion_reportes_generales', conexion)
+    monkeypatch.setattr(lotes_reportes.psycopg2.extras, 'execute_values', execute_values)
+    monkeypatch.setattr(lotes_reportes, 'encolar_correo', lambda cursor, ids, tipo=None: 1)
+    monkeypatch.setattr(lotes_reportes, 'encolar_imagenes', lambda cursor, fotos: None)
+    monkeypatch.setattr(lotes_reportes, 'obtener_catalogos', lambda: SimpleNamespace(
+        categorias={1: 'Electricos'},
+        fallas_por_categoria={1: [{'id': 2, 'nombre': 'Sin luz'}]},
+        sedes={3: 'Villa Asia'},
+    ))
+    monkeypatch.setattr(app, 'static_folder', str(tmp_path))
+    return app.test_client(), insertados, tmp_path
+
+
+def _item(foto=None, **extra):
+    item = {"cedula": "V-1", "categoria": 1, "falla_id": 2, "sede": 3}
+    if foto:
+        item["foto"] = foto
+    item.update(extra)
+    return item
+
+
+def test_foto_invalida_solo_rechaza_su_item(cliente):
+    cliente, insertados, carpeta = cliente
+    respuesta = cliente.post(RUTA, data={
+        'reportes': json.dumps([_item('buena'), _item('mala'), _item()]),
+        'buena': (io.BytesIO(PNG), 'buena.png'),
+        'mala': (io.BytesIO(b'un texto renombrado'), 'mala.jpg'),
+    })
+
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos["insertados"] == 2 and datos["errores"] == 1
+    assert [r.get("id") for r in datos["resultados"]] == [100, None, 101]
+    assert datos["resultados"][1] == {"indice": 1, "error": "El archivo no es una imagen JPEG, PNG o WebP"}
+
+    # Solo la foto válida quedó guardada, con su sha256 como nombre
+    fotos = [v[5] for v in insertados]
+    assert fotos[0].startswith(CARPETA_ORIGINALES + '/') and fotos[0].endswith('.png')
+    assert fotos[1] is None
+    assert sorted(os.listdir(carpeta / CARPETA_ORIGINALES)) == [os.path.basename(fotos[0])]
+
+
+def test_foto_demasiado_grande_solo_rechaza_su_item(cliente, monkeypatch):
+    cliente, _, _ = cliente
+    monkeypatch.setattr(subidas, 'SubidaFoto', functools.partial(SubidaFoto, limite=100))
+    respuesta = cliente.post(RUTA, data={
+        'reportes': json.dumps([_item('grande'), _item()]),
+        'grande': (io.BytesIO(PNG + b'\x00' * 200), 'grande.png'),
+    })
+
+    assert respuesta.status_code == 200
+    resultados = respuesta.get_json()["resultados"]
+    assert "MB" in resultados[0]["error"]
+    assert resultados[1] == {"indice": 1, "id": 100}
+
+
+def test_errores_de_validacion_y_archivo_faltante(cliente):
+    cliente, _, _ = cliente
+    respuesta = cliente.post(RUTA, data={
+        'reportes': json.dumps([_item(sede=99), _item('no_enviado'), _item()]),
+    }, content_type='multipart/form-data')
+
+    resultados = respuesta.get_json()["resultados"]
+    assert resultados[0]["error"] == "Sede inválida: 99"
+    assert resultados[1]["error"] == "No se recibió el archivo 'no_enviado'"
+    assert resultados[2]["id"] == 100
+
+
+def test_lote_invalido_responde_400(cliente):
+    cliente, _, _ = cliente
+    respuesta = cliente.post(RUTA, data='{"no": "es una lista"}', content_type='application/json')
+
+    assert respuesta.status_code == 400
@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+import pytest
+
+from paginacion import (
+    ANTERIOR,
+    LIMITE_MAXIMO,
+    LIMITE_POR_DEFECTO,
+    SIGUIENTE,
+    armar_pagina,
+    codificar_cursor,
+    condicion_keyset,
+    decodificar_cursor,
+    leer_direccion,
+    leer_limite,
+    orden_keyset,
+)
+
+
+def test_cursor_ida_y_vuelta():
+    valores = [datetime(2026, 3, 1, 14, 30, 5), 42, 'texto con ñ', None]
+    cursor = codificar_cursor(valores)
+
+    assert '=' not in cursor
+    assert decodificar_cursor(cursor) == ['2026-03-01T14:30:05', 42, 'texto con ñ', None]
+
+
+def test_cursor_con_fecha():
+    assert decodificar_cursor(codificar_cursor([date(2026, 1, 31), 7])) == ['2026-01-31', 7]
+
+
+@pytest.mark.parametrize('cursor', [None, '', '###', 'e30', codificar_cursor([1])[:-1] + '*'])
+def test_cursor_invalido_devuelve_none(cursor):
+    # 'e30' es {} en base64: JSON válido pero no una lista
+    assert decodificar_cursor(cursor) is None
+
+
+def test_leer_limite_y_direccion():
+    assert leer_limite(None) == LIMITE_POR_DEFECTO
+    assert leer_limite('abc') == LIMITE_POR_DEFECTO
+    assert leer_limite('0') == 1
+    assert leer_limite(str(LIMITE_MAXIMO + 1)) == LIMITE_MAXIMO
+    assert leer_direccion(ANTERIOR) == ANTERIOR
+    assert leer_direccion('otra') == SIGUIENTE
+
+
+def test_condicion_keyset_expande_columnas():
+    sql, parametros = condicion_keyset(['r.fecha', 'r.id'], ['2026-01-01', 10], SIGUIENTE)
+
+    assert sql == "r.fecha <= %s AND (r.fecha < %s OR (r.id < %s))"
+    assert parametros == ['2026-01-01', '2026-01-01', 10]
+    assert condicion_keyset(['r.id'], [10], ANTERIOR) == ("r.id > %s", [10])
+    assert orden_keyset(['r.fecha', 'r.id'], ANTERIOR) == "r.fecha ASC, r.id ASC"
+
+
+def test_armar_pagina_siguiente():
+    filas = [{'id': i} for i in (5, 4, 3)]
+    pagina = armar_pagina(filas, 2, SIGUIENTE, hay_cursor=True, clave=lambda f: [f['id']])
+
+    assert pagina["items"] == [{'id': 5}, {'id': 4}]
+    assert decodificar_cursor(pagina["siguiente"]) == [4]
+    assert decodificar_cursor(pagina["anterior"]) == [5]
+
+
+def test_armar_pagina_anterior_invierte_el_orden():
+    # Hacia atrás la consulta viene en orden ascendente
+    filas = [{'id': i} for i in (6, 7, 8)]
+    pagina = armar_pagina(filas, 2, ANTERIOR, hay_cursor=True, clave=lambda f: [f['id']])
+
+    assert pagina["items"] == [{'id': 7}, {'id': 6}]
+    assert decodificar_cursor(pagina["anterior"]) == [7]
+    assert decodificar_cursor(pagina["siguiente"]) == [6]
+
+
+def test_primera_y_ultima_pagina_sin_cursores_de_mas():
+    pagina = armar_pagina([{'id': 1}], 2, SIGUIENTE, hay_cursor=False, clave=lambda f: [f['id']])
+
+    assert pagina["siguiente"] is None
+    assert pagina["anterior"] is None
+    assert armar_pagina([], 2, SIGUIENTE, hay_cursor=True, clave=lambda f: [f['id']])["items"] == []
@@ -0,0 +1,65 @@
+from types import SimpleNamespace
+
+from pivote import como_datos_por_sede, como_valores, construir_matriz, matriz_sede_categoria
+
+
+def _catalogos():
+    return SimpleNamespace(
+        sedes={1: 'Puerto Ordaz', 2: 'Ciudad Bolívar'},
+        categorias={10: 'Electricidad', 20: 'Agua', 30: 'Internet'},
+    )
+
+
+def test_matriz_sede_categoria_ordena_por_nombre_y_suma_conteos():
+    conteos = [
+        {'sede': 1, 'categoria': 10, 'cantidad': 3},
+        {'sede': 2, 'categoria': 20, 'cantidad': 5},
+        {'sede': 1, 'categoria': 10, 'cantidad': 2},
+    ]
+    matriz = matriz_sede_categoria(_catalogos(), conteos)
+
+    assert matriz.filas == ['Ciudad Bolívar', 'Puerto Ordaz']
+    assert matriz.columnas == ['Agua', 'Electricidad', 'Internet']
+    assert matriz.valores == [
+        [5, 0, 0],
+        [0, 5, 0],
+    ]
+
+
+def test_matriz_sede_categoria_ignora_ids_fuera_del_catalogo():
+    conteos = [
+        {'sede': 99, 'categoria': 10, 'cantidad': 7},
+        {'sede': 1, 'categoria': None, 'cantidad': 4},
+        {'sede': 1, 'categoria': 30, 'cantidad': 1},
+    ]
+    matriz = matriz_sede_categoria(_catalogos(), conteos)
+
+    assert sum(map(sum, matriz.valores)) == 1
+    assert matriz.valores[1][2] == 1
+
+
+def test_matriz_sin_conteos_queda_en_cero():
+    matriz = matriz_sede_categoria(_catalogos(), [])
+
+    assert matriz.valores == [[0, 0, 0], [0, 0, 0]]
+
+
+def test_construir_matriz_con_otras_claves():
+    matriz = construir_matriz(
+        [{'mes': 1, 'estado': 'a', 'total': 2}],
+        {1: 'enero'}, {'a': 'abierto'}, 'mes', 'estado', clave_valor='total',
+    )
+
+    assert matriz.valores == [[2]]
+
+
+def test_formas_de_salida():
+    matriz = matriz_sede_categoria(_catalogos(), [{'sede': 1, 'categoria': 20, 'cantidad': 4}])
+
+    assert como_valores(matriz) == {
+        "sedes": ['Ciudad Bolívar', 'Puerto Ordaz'],
+        "categorias": ['Agua', 'Electricidad', 'Internet'],
+        "valores": [[0, 0, 0], [4, 0, 0]],
+    }
+    agua = como_datos_por_sede(matriz)["categorias"][0]
+    assert agua == {"nombre": 'Agua', "datosPorSede": {'Ciudad Bolívar': 0, 'Puerto Ordaz': 4}}
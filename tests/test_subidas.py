@@ -0,0 +1,132 @@
+import io
+import os
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("flask")
+
+from flask import Flask, jsonify, request  # noqa: E402
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType  # noqa: E402
+
+from imagenes import CARPETA_ORIGINALES, SubidaFoto, guardar_original, tipo_imagen  # noqa: E402
+from subidas import PeticionSubidas  # noqa: E402
+
+PNG = b'\x89PNG\r\n\x1a\n' + b'\x00' * 64
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 64
+
+
+def _archivos(carpeta):
+    return sorted(os.listdir(carpeta)) if os.path.isdir(carpeta) else []
+
+
+def test_tipo_imagen_por_firma():
+    assert tipo_imagen(PNG[:12]) == 'png'
+    assert tipo_imagen(JPEG[:12]) == 'jpg'
+    assert tipo_imagen(b'RIFF\x00\x00\x00\x00WEBP') == 'webp'
+    assert tipo_imagen(b'hola mundo!!') is None
+
+
+def test_estricta_corta_en_el_primer_bloque_invalido(tmp_path):
+    subida = SubidaFoto(str(tmp_path))
+
+    with pytest.raises(UnsupportedMediaType):
+        subida.write(b'esto no es una imagen')
+    assert _archivos(tmp_path) == []
+
+
+def test_estricta_corta_al_superar_el_limite(tmp_path):
+    subida = SubidaFoto(str(tmp_path), limite=100)
+    subida.write(PNG)
+
+    with pytest.raises(RequestEntityTooLarge):
+        subida.write(b'\x00' * 100)
+    assert _archivos(tmp_path) == []
+
+
+def test_no_estricta_guarda_el_error_y_descarta_los_bytes(tmp_path):
+    subida = SubidaFoto(str(tmp_path), estricta=False)
+
+    assert subida.write(b'esto no es una imagen') == len(b'esto no es una imagen')
+    subida.write(b'mas datos')
+    subida.seek(0)
+
+    assert isinstance(subida.error, UnsupportedMediaType)
+    assert subida.read() == b''
+    assert _archivos(tmp_path) == []
+    with pytest.raises(UnsupportedMediaType):
+        subida.validar()
+    subida.close()
+
+
+def test_no_estricta_por_tamano(tmp_path):
+    subida = SubidaFoto(str(tmp_path), limite=100, estricta=False)
+    subida.write(PNG)
+    subida.write(b'\x00' * 100)
+
+    assert isinstance(subida.error, RequestEntityTooLarge)
+    with pytest.raises(RequestEntityTooLarge):
+        subida.validar()
+    assert _archivos(tmp_path) == []
+
+
+def test_archivo_corto_se_valida_al_final(tmp_path):
+    subida = SubidaFoto(str(tmp_path), estricta=False)
+    subida.write(b'\xff\xd8')
+
+    assert subida.error is None
+    with pytest.raises(UnsupportedMediaType):
+        subida.validar()
+
+
+def test_foto_valida_se_nombra_por_contenido(tmp_path):
+    subida = SubidaFoto(str(tmp_path / CARPETA_ORIGINALES))
+    subida.write(PNG)
+    subida.seek(0)
+
+    ruta = guardar_original(type('Archivo', (), {'stream': subida})(), str(tmp_path))
+
+    assert ruta.startswith(CARPETA_ORIGINALES + '/') and ruta.endswith('.png')
+    with open(tmp_path / ruta, 'rb') as archivo:
+        assert archivo.read() == PNG
+    assert [n for n in _archivos(tmp_path / CARPETA_ORIGINALES) if n.startswith('.subida-')] == []
+
+
+# -----------------------------------------------------
+# PeticionSubidas: estricta solo en las rutas de una foto
+# -----------------------------------------------------
+
+@pytest.fixture
+def cliente(tmp_path):
+    app = Flask(__name__, static_folder=str(tmp_path))
+    app.request_class = PeticionSubidas
+
+    def recibir():
+        errores = {
+            nombre: archivo.stream.error.description if archivo.stream.error else None
+            for nombre, archivo in request.files.items()
+        }
+        return jsonify(errores)
+
+    app.add_url_rule('/enviar_reporte', 'enviar_reporte', recibir, methods=['POST'])
+    app.add_url_rule('/api/reportes/batch', 'api_reportes_batch', recibir, methods=['POST'])
+    return app.test_client()
+
+
+def test_ruta_de_una_foto_responde_415(cliente, tmp_path):
+    respuesta = cliente.post('/enviar_reporte', data={
+        'foto_path': (io.BytesIO(b'texto renombrado'), 'foto.jpg'),
+    })
+
+    assert respuesta.status_code == 415
+    assert [n for n in _archivos(tmp_path / CARPETA_ORIGINALES) if n.startswith('.subida-')] == []
+
+
+def test_carga_por_lotes_marca_solo_el_archivo_invalido(cliente):
+    respuesta = cliente.post('/api/reportes/batch', data={
+        'buena': (io.BytesIO(PNG), 'buena.png'),
+        'mala': (io.BytesIO(b'texto renombrado'), 'mala.jpg'),
+    })
+
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == {'buena': None, 'mala': 'El archivo no es una imagen JPEG, PNG o WebP'}
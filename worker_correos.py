@@ -0,0 +1,62 @@
+"""Worker de la cola de correos.
+
+Uso:
+    python worker_correos.py
+
+Envía en lotes los correos de cola_correos por una conexión SMTP persistente.
+Se despierta con NOTIFY cola_correos al confirmarse un reporte y, por si se
+pierde alguna notificación, revisa la cola cada CORREOS_POLL segundos.
+"""
+import os
+import select
+import time
+
+import psycopg2.extensions
+
+from app import app, mail
+from cola_correos import CANAL_COLA, CORREOS_LOTE, procesar_lote
+from conexion import conexion_dedicada
+
+CORREOS_POLL = float(os.getenv('CORREOS_POLL', 15))
+
+
+def _escuchar():
+    conexion = conexion_dedicada("reportes_generales")
+    conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    cursor = conexion.cursor()
+    cursor.execute(f"LISTEN {CANAL_COLA}")
+    cursor.close()
+    return conexion
+
+
+def _esperar(conexion):
+    if select.select([conexion], [], [], CORREOS_POLL)[0]:
+        conexion.poll()
+        conexion.notifies.clear()
+
+
+def main():
+    print("Worker de correos iniciado")
+    conexion = None
+    while True:
+        try:
+            if conexion is None or conexion.closed:
+                conexion = _escuchar()
+
+            with app.app_context():
+                procesados = procesar_lote(mail)
+
+            # Si el lote vino lleno probablemente quedan más pendientes
+            if procesados < CORREOS_LOTE:
+                _esperar(conexion)
+
+        except Exception as e:
+            print(f"Error en el worker de correos: {e}")
+            if conexion is not None and not conexion.closed:
+                conexion.close()
+            conexion = None
+            time.sleep(5)
+
+
+if __name__ == '__main__':
+    main()
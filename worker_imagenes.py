@@ -0,0 +1,68 @@
+"""Worker de la cola de fotos.
+
+Uso:
+    python worker_imagenes.py
+
+Procesa en lotes las fotos de cola_imagenes (ver imagenes.py). Al iniciar
+vuelve a encolar las fotos que quedaron en uploads/originales sin trabajo.
+Se despierta con NOTIFY cola_imagenes al confirmarse un reporte y, por si se
+pierde alguna notificación, revisa la cola cada IMAGENES_POLL segundos.
+Se pueden ejecutar varias instancias a la vez.
+"""
+import os
+import select
+import time
+
+import psycopg2.extensions
+
+from app import app
+from conexion import conexion_dedicada
+from imagenes import CANAL_IMAGENES, IMAGENES_LOTE, procesar_lote_imagenes, recuperar_imagenes
+
+IMAGENES_POLL = float(os.getenv('IMAGENES_POLL', 15))
+
+
+def _escuchar():
+    conexion = conexion_dedicada("reportes_generales")
+    conexion.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    cursor = conexion.cursor()
+    cursor.execute(f"LISTEN {CANAL_IMAGENES}")
+    cursor.close()
+    return conexion
+
+
+def _esperar(conexion):
+    if select.select([conexion], [], [], IMAGENES_POLL)[0]:
+        conexion.poll()
+        conexion.notifies.clear()
+
+
+def main():
+    print("Worker de imágenes iniciado")
+    conexion = None
+    recuperadas = False
+    while True:
+        try:
+            if conexion is None or conexion.closed:
+                conexion = _escuchar()
+
+            if not recuperadas:
+                print(f"Fotos sin procesar recuperadas: {recuperar_imagenes()}")
+                recuperadas = True
+
+            procesados = procesar_lote_imagenes(app.static_folder)
+
+            # Si el lote vino lleno probablemente quedan más pendientes
+            if procesados < IMAGENES_LOTE:
+                _esperar(conexion)
+
+        except Exception as e:
+            print(f"Error en el worker de imágenes: {e}")
+            if conexion is not None and not conexion.closed:
+                conexion.close()
+            conexion = None
+            time.sleep(5)
+
+
+if __name__ == '__main__':
+    main()